@@ -16,6 +16,7 @@ def clean():
     local('rm -rf build')
     local('rm -rf test/unit/__pycache__')
     local('rm -rf test/integration/__pycache__')
+    local('rm -rf test/benchmark/__pycache__')
 
     with lcd('doc'):
         local('make clean')
@@ -42,6 +43,16 @@ def coverage():
         local("coverage report  --show-missing")
 
 
+@task
+def benchmark(*names):
+    local('python test/benchmark/run_benchmarks.py ' + ' '.join(names))
+
+
+@task
+def import_time():
+    local('python test/benchmark/import_time.py')
+
+
 @task
 def push():
     local('git push origin')
@@ -30,9 +30,18 @@ CLASSIFIERS = [
 ]
 
 REQUIREMENTS = [
-    'requests'
+    'requests',
+    'futures; python_version < "3.2"'
 ]
 
+EXTRAS = {
+    'async': ['aiohttp']
+}
+
+ENTRY_POINTS = {
+    'console_scripts': ['stac = stac.cli:main']
+}
+
 with codecs.open('README.rst', 'r', 'utf-8') as handle:
     LONG_DESCRIPTION = handle.read()
 
@@ -47,5 +56,7 @@ setup(
     license=LICENSE,
     url=URL,
     install_requires=REQUIREMENTS,
+    extras_require=EXTRAS,
+    entry_points=ENTRY_POINTS,
     zip_safe=True,
     packages=['stac'])
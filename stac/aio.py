@@ -0,0 +1,310 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.aio
+~~~~~~~~
+
+Asyncio based counterparts of the clients in :mod:`stac.client` and the DAO in
+:mod:`stac.http`. Using this module requires Python 3.5 or newer and the optional
+`aiohttp <https://aiohttp.readthedocs.io/>`_ library.
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=protected-access
+import asyncio
+import collections
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover
+    aiohttp = None
+
+import stac.client
+import stac.exceptions
+import stac.http
+import stac.util
+import stac.version
+
+
+def new_async_maven_client(base_url, repo, is_snapshot=False, username=None, password=None):
+    """Get a new :class:`AsyncGenericArtifactoryClient` for use with Maven repository
+    layouts, optionally using the provided authentication.
+
+    This is the asyncio equivalent of :func:`stac.client.new_maven_client` and should be
+    called from within a running event loop. For example:
+
+    >>> async with new_async_maven_client(
+    ...         'https://www.example.com/artifactory', 'libs-release') as client:
+    ...     latest = await client.get_latest_version('com.example.users.service')
+    '1.6.0'
+
+    :param str base_url: URL to root of the Artifactory installation. Example,
+        "https://artifactory.example.com/artifactory".
+    :param str repo: Which repository should searches be done against. Example, "libs-release-local"
+        or "libs-snapshot-local".
+    :param bool is_snapshot: Does the repository to perform searches against contain SNAPSHOT
+        (a.k.a. integration) versions? Default is ``False``
+    :param str username: Optional username for authentication when making API calls.
+    :param str password: Optional password for authentication when making API calls.
+    :return: New asyncio Artifactory client for use with Maven repositories
+    :rtype: AsyncGenericArtifactoryClient
+    :raises RuntimeError: If the aiohttp library is not installed
+    """
+    if aiohttp is None:
+        raise RuntimeError("The aiohttp library is required to use the asyncio client")
+
+    auth = None
+    if username is not None and password is not None:
+        auth = aiohttp.BasicAuth(username, password)
+    session = aiohttp.ClientSession(auth=auth)
+
+    config = stac.client.GenericArtifactoryClientConfig()
+    config.is_integration = is_snapshot
+    config.http_dao = AsyncVersionApiDao(session, base_url, repo)
+    config.url_generator = stac.client.MavenArtifactUrlGenerator(base_url, repo)
+
+    return AsyncGenericArtifactoryClient(config, session=session)
+
+
+class AsyncGenericArtifactoryClient(object):
+    """Asyncio Artifactory client for use with multiple different repository layouts.
+
+    Methods of this client have the same semantics as the methods of the same name
+    on :class:`stac.client.GenericArtifactoryClient` but methods that make network
+    requests are coroutines. The configured DAO is expected to be an
+    :class:`AsyncVersionApiDao` or another DAO with coroutine methods.
+
+    The client can be used as an asynchronous context manager to close the HTTP
+    session it was created with when done.
+    """
+
+    _logger = stac.util.get_log()
+
+    def __init__(self, config, session=None):
+        """Create a new asyncio client instance based on the supplied configuration.
+
+        :param stac.client.GenericArtifactoryClientConfig config: Required configuration
+            for this client
+        :param aiohttp.ClientSession session: Optional session to close when this client
+            is closed.
+        """
+        self._is_integration = config.is_integration
+        self._dao = config.http_dao
+        self._urls = config.url_generator
+        self._session = session
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        await self.close()
+
+    async def close(self):
+        """Close the HTTP session this client was created with, if any."""
+        if self._session is not None:
+            await self._session.close()
+
+    def get_version_url(self, full_name, packaging, version, descriptor=None):
+        """Get the URL to a specific version of the given project.
+
+        See :meth:`stac.client.GenericArtifactoryClient.get_version_url`. This method does
+        not make any network requests and so is not a coroutine.
+        """
+        group, artifact = stac.client._parse_full_name(full_name)
+        return self._urls.get_url(group, artifact, packaging, version, descriptor)
+
+    def get_version_urls(self, artifacts):
+        """Get the URLs of many specific versions of projects.
+
+        See :meth:`stac.client.GenericArtifactoryClient.get_version_urls`. This method does
+        not make any network requests and so is not a coroutine.
+        """
+        return self._urls.get_urls(stac.client._parse_full_names(artifacts))
+
+    async def get_latest_version(self, full_name, remote=False):
+        """Get the most recent version of the given project.
+
+        See :meth:`stac.client.GenericArtifactoryClient.get_latest_version`.
+        """
+        group, artifact = stac.client._parse_full_name(full_name)
+        try:
+            if not self._is_integration:
+                version = await self._dao.get_most_recent_release(group, artifact, remote=remote)
+            else:
+                versions = await self._dao.get_most_recent_versions(
+                    group, artifact, remote=remote, limit=1, integration=True)
+                version = versions[0] if versions else None
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                raise self._get_wrapped_exception(group, artifact, cause=e)
+            raise
+
+        if not version:
+            raise self._get_wrapped_exception(group, artifact)
+        return version
+
+    async def get_latest_versions(self, full_name, remote=False,
+                                  limit=stac.client.DEFAULT_VERSION_LIMIT):
+        """Get the most recent versions of the given project, ordered most recent to least
+        recent.
+
+        See :meth:`stac.client.GenericArtifactoryClient.get_latest_versions`.
+        """
+        if limit < 1:
+            raise ValueError("Releases limit must be positive")
+
+        group, artifact = stac.client._parse_full_name(full_name)
+        try:
+            versions = await self._dao.get_most_recent_versions(
+                group, artifact, remote=remote, limit=limit, integration=self._is_integration)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                raise self._get_wrapped_exception(group, artifact, cause=e)
+            raise
+
+        if not versions:
+            raise self._get_wrapped_exception(group, artifact)
+        return versions
+
+    async def get_latest_versions_many(self, full_names, remote=False):
+        """Get the most recent version of each of the given projects, performing
+        lookups concurrently.
+
+        See :meth:`stac.client.GenericArtifactoryClient.get_latest_versions_many`. The
+        number of requests in flight at once is bounded only by the connection limit
+        of the HTTP session. Failed lookups (for example a 503 response or a timeout) are
+        returned in place of the version as the :class:`aiohttp.ClientError` or
+        :class:`asyncio.TimeoutError` raised.
+        """
+        names = list(collections.OrderedDict.fromkeys(full_names))
+        results = await asyncio.gather(
+            *[self._get_latest_version_or_error(name, remote) for name in names])
+        return collections.OrderedDict(zip(names, results))
+
+    async def get_version_index(self, full_name, remote=False):
+        """Get an index of every version of the given project, for finding the most
+        recent version within version ranges.
+
+        See :meth:`stac.client.GenericArtifactoryClient.get_version_index`.
+        """
+        group, artifact = stac.client._parse_full_name(full_name)
+        return stac.version.VersionIndex(await self._get_all_versions(group, artifact, remote))
+
+    async def resolve_version(self, full_name, version_range, remote=False):
+        """Get the most recent version of the given project within a version range.
+
+        See :meth:`stac.client.GenericArtifactoryClient.resolve_version`.
+        """
+        result = await self.resolve_versions(full_name, [version_range], remote=remote)
+        version = next(iter(result.values()))
+        if isinstance(version, stac.exceptions.NoMatchingVersionsError):
+            raise version
+        return version
+
+    async def resolve_versions(self, full_name, version_ranges, remote=False):
+        """Get the most recent version of the given project within each of several
+        version ranges.
+
+        See :meth:`stac.client.GenericArtifactoryClient.resolve_versions`.
+        """
+        ranges = stac.client._parse_ranges(version_ranges)
+        group, artifact = stac.client._parse_full_name(full_name)
+        index = stac.version.VersionIndex(await self._get_all_versions(group, artifact, remote))
+
+        result = collections.OrderedDict()
+        for spec, version_range in ranges.items():
+            version = index.latest(version_range)
+            result[spec] = version if version is not None else \
+                stac.client._new_no_matching_range_error(group, artifact, version_range)
+        return result
+
+    async def _get_all_versions(self, group, artifact, remote):
+        try:
+            versions = await self._dao.get_most_recent_versions(
+                group, artifact, remote=remote, limit=stac.client._ALL_VERSIONS,
+                integration=self._is_integration)
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                raise self._get_wrapped_exception(group, artifact, cause=e)
+            raise
+
+        if not versions:
+            raise self._get_wrapped_exception(group, artifact)
+        return versions
+
+    async def _get_latest_version_or_error(self, full_name, remote):
+        try:
+            return await self.get_latest_version(full_name, remote=remote)
+        except (stac.exceptions.NoMatchingVersionsError, aiohttp.ClientError,
+                asyncio.TimeoutError) as e:
+            return e
+
+    def _get_wrapped_exception(self, group, artifact, cause=None):
+        return stac.client._new_no_matching_versions_error(
+            group, artifact, self._is_integration, cause=cause)
+
+
+class AsyncVersionApiDao(object):
+    """Asyncio HTTP DAO to get one or multiple versions of a particular artifact.
+
+    This is the asyncio equivalent of :class:`stac.http.VersionApiDao`. Methods
+    raise :class:`aiohttp.ClientResponseError` for non-success HTTP responses.
+    """
+
+    _logger = stac.util.get_log()
+
+    def __init__(self, session, base_url, repo):
+        """Set the session for making requests and the Artifactory location.
+
+        :param aiohttp.ClientSession session: Session for making HTTP requests to
+            the Artifactory API. This session should be configured with any required
+            credentials for accessing the API.
+        :param str base_url: Base URL to the Artifactory installation
+        :param str repo: Name of repository to search against.
+        """
+        self._session = session
+        self._base_url = base_url
+        self._repo = repo
+
+    async def get_most_recent_release(self, group, artifact, remote=False):
+        """Get the version number of the most recent release (non-integration version)
+        of a particular group and artifact combination.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_release`.
+        """
+        url = self._base_url + '/api/search/latestVersion'
+        params = {'g': group, 'a': artifact, 'repos': self._repo, 'remote': int(remote)}
+        self._logger.debug("Using latest version API at %s - params %s", url, params)
+
+        async with self._session.get(url, params=params) as response:
+            response.raise_for_status()
+            text = await response.text()
+        return text.strip()
+
+    async def get_most_recent_versions(self, group, artifact, limit, remote=False,
+                                       integration=False):
+        """Get a list of the version numbers of the most recent artifacts (integration
+        or non-integration), ordered by the version number, for a particular group and
+        artifact combination.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_versions`.
+        """
+        if limit < 1:
+            raise ValueError("Releases limit must be positive")
+
+        url = self._base_url + '/api/search/versions'
+        params = {'g': group, 'a': artifact, 'repos': self._repo, 'remote': int(remote)}
+        self._logger.debug("Using all version API at %s - params %s", url, params)
+
+        async with self._session.get(url, params=params) as response:
+            response.raise_for_status()
+            json = await response.json(content_type=None)
+        return stac.http._select_most_recent_versions(json['results'], limit, integration)
@@ -12,34 +12,132 @@ stac.api
 ~~~~~~~~
 
 Public API of the Stac library.
+
+Members of this module are imported from the module they are defined in when they
+are first used, so that importing this module is fast and only the dependencies
+of the parts of the library actually used (e.g. ``requests`` or ``aiohttp``) are
+loaded.
 """
 
 from __future__ import absolute_import as _
 
-from .client import (
-    new_maven_client,
-    ArtifactoryClient,
-    GenericArtifactoryClient,
-    GenericArtifactoryClientConfig,
-    ArtifactUrlGenerator,
-    MavenArtifactUrlGenerator
-)
-from .exceptions import (
-    StacError,
-    NoMatchingVersionsError
-)
-from .http import (
-    VersionApiDao
-)
+import importlib as _importlib
+import sys as _sys
+
+# Name of each member of the public API and the module it is defined in
+_EXPORTS = {
+    'new_maven_client': 'client',
+    'new_async_maven_client': 'aio',
+    'new_session': 'http',
+    'new_maven_watcher': 'watch',
+    'ArtifactoryClient': 'client',
+    'GenericArtifactoryClient': 'client',
+    'GenericArtifactoryClientConfig': 'client',
+    'AsyncGenericArtifactoryClient': 'aio',
+    'ArtifactUrlGenerator': 'client',
+    'MavenArtifactUrlGenerator': 'client',
+    'SnapshotResolver': 'snapshot',
+    'VersionApiDao': 'http',
+    'AqlVersionDao': 'http',
+    'AsyncVersionApiDao': 'aio',
+    'MultiRepoVersionDao': 'multirepo',
+    'LruTtlCache': 'cache',
+    'CachingVersionDao': 'cache',
+    'RefreshingVersionDao': 'cache',
+    'CoalescingVersionDao': 'cache',
+    'SqliteCache': 'diskcache',
+    'IndexedVersionDao': 'index',
+    'ArtifactDownloader': 'download',
+    'DownloadResult': 'download',
+    'ArtifactStore': 'store',
+    'RetryPolicy': 'retry',
+    'HedgingPolicy': 'hedge',
+    'MetricsSink': 'metrics',
+    'MetricsRegistry': 'metrics',
+    'ArtifactWatcher': 'watch',
+    'VersionEvent': 'watch',
+    'VersionIndex': 'version',
+    'VersionRange': 'version',
+    'parse_range': 'version',
+    'StacError': 'exceptions',
+    'NoMatchingVersionsError': 'exceptions',
+    'DownloadError': 'exceptions',
+    'ChecksumMismatchError': 'exceptions',
+}
 
 __all__ = [
     'new_maven_client',
+    'new_async_maven_client',
+    'new_session',
+    'new_maven_watcher',
     'ArtifactoryClient',
     'GenericArtifactoryClient',
     'GenericArtifactoryClientConfig',
+    'AsyncGenericArtifactoryClient',
     'ArtifactUrlGenerator',
     'MavenArtifactUrlGenerator',
+    'SnapshotResolver',
     'VersionApiDao',
+    'AqlVersionDao',
+    'AsyncVersionApiDao',
+    'MultiRepoVersionDao',
+    'LruTtlCache',
+    'CachingVersionDao',
+    'RefreshingVersionDao',
+    'CoalescingVersionDao',
+    'SqliteCache',
+    'IndexedVersionDao',
+    'ArtifactDownloader',
+    'DownloadResult',
+    'ArtifactStore',
+    'RetryPolicy',
+    'HedgingPolicy',
+    'MetricsSink',
+    'MetricsRegistry',
+    'ArtifactWatcher',
+    'VersionEvent',
+    'VersionIndex',
+    'VersionRange',
+    'parse_range',
     'StacError',
-    'NoMatchingVersionsError'
+    'NoMatchingVersionsError',
+    'DownloadError',
+    'ChecksumMismatchError'
 ]
+
+if _sys.version_info < (3, 5):
+    # The asyncio based client uses syntax that requires Python 3.5 or newer
+    __all__ = [_name for _name in __all__ if _EXPORTS[_name] != 'aio']
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(__name__, name))
+
+    value = getattr(_importlib.import_module('stac.' + module), name)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+if _sys.version_info < (3, 5):
+    # Module level __getattr__ is not supported, import everything up front
+    for _name in __all__:
+        __getattr__(_name)
+elif _sys.version_info < (3, 7):
+    # Module level __getattr__ is not supported but the class of a module can be
+    # changed, so members (and dependencies like aiohttp) are still loaded lazily
+    import types as _types
+
+    class _LazyModule(_types.ModuleType):
+        def __getattr__(self, name):
+            return __getattr__(name)
+
+        def __dir__(self):
+            return __dir__()
+
+    _sys.modules[__name__].__class__ = _LazyModule
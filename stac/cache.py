@@ -0,0 +1,456 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.cache
+~~~~~~~~~~
+
+Caching and coalescing of the results of Artifactory API calls. It is typically
+not required for users of the Stac library to interact with this module directly,
+caching and coalescing can be enabled via :func:`stac.client.new_maven_client`.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import concurrent.futures
+import functools
+import threading
+import time
+
+import stac.metrics
+import stac.util
+
+DEFAULT_CACHE_SIZE = 1024
+
+DEFAULT_HOT_REQUESTS = 3
+
+DEFAULT_REFRESH_WORKERS = 2
+
+# Maximum number of keys to count requests for when finding frequently requested results
+_MAX_TRACKED_KEYS = 10000
+
+# Methods of wrapped DAOs that are passed through as-is, when the wrapped DAO has them.
+# Version indexes are kept up to date by the DAO that builds them, caching them (or
+# the versions used to refresh them) would only make them stale.
+_PASS_THROUGH_METHODS = frozenset(['get_version_index', 'get_versions_since'])
+
+
+class LruTtlCache(object):
+    """Bounded in-memory cache that evicts the least recently used entry when
+    full and expires entries a fixed number of seconds after they were stored.
+
+    Counters for the number of hits, misses, and evictions (entries removed
+    because the cache was full or because they expired) are maintained.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, ttl, max_size=DEFAULT_CACHE_SIZE, clock=time.time):
+        """Create a new cache with the given time to live and maximum size.
+
+        :param float ttl: Number of seconds an entry is valid for after being stored.
+        :param int max_size: Maximum number of entries to store before evicting the
+            least recently used one.
+        :param callable clock: Function returning the current time in seconds. Only
+            useful for testing.
+        :raises ValueError: If the TTL is negative or the size is not positive
+        """
+        if ttl < 0:
+            raise ValueError("Cache TTL must not be negative")
+        if max_size < 1:
+            raise ValueError("Cache size must be positive")
+
+        self._ttl = ttl
+        self._max_size = max_size
+        self._clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    @property
+    def hits(self):
+        """Number of lookups that found a valid entry."""
+        return self._hits
+
+    @property
+    def misses(self):
+        """Number of lookups that did not find a valid entry."""
+        return self._misses
+
+    @property
+    def evictions(self):
+        """Number of entries removed because the cache was full or they expired."""
+        return self._evictions
+
+    def get(self, key, default=None):
+        """Get the value stored for a key if present and not expired.
+
+        :param key: Hashable key to look up
+        :param default: Value to return if there is no valid entry for the key
+        :return: The stored value or the default
+        """
+        now = self._clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return default
+
+            expires, value = entry
+            if expires <= now:
+                del self._entries[key]
+                self._evictions += 1
+                self._misses += 1
+                return default
+
+            # Re-insert the entry to mark it as the most recently used
+            del self._entries[key]
+            self._entries[key] = entry
+            self._hits += 1
+            return value
+
+    def set(self, key, value):
+        """Store a value for a key, evicting the least recently used entry if the
+        cache is full.
+
+        :param key: Hashable key to store the value under
+        :param value: Value to store
+        """
+        expires = self._clock() + self._ttl
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (expires, value)
+            while len(self._entries) > self._max_size:
+                self._entries.popitem(last=False)
+                self._evictions += 1
+
+    def clear(self):
+        """Remove all entries from the cache. Counters are not reset."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+
+class CachingVersionDao(object):
+    """Version DAO that wraps another DAO, caching the results of successful
+    calls to it.
+
+    Any DAO with the same methods as :class:`stac.http.VersionApiDao` may be
+    wrapped. Errors raised by the wrapped DAO are never cached. If the wrapped DAO
+    keeps an index of versions (see :class:`stac.index.IndexedVersionDao`), calls
+    to ``get_version_index`` and ``get_versions_since`` are passed through to it
+    without caching.
+
+    This class is thread safe if the wrapped DAO is.
+    """
+
+    _logger = stac.util.get_log()
+
+    def __init__(self, dao, cache, metrics=None):
+        """Set the DAO to wrap and the cache to store results in.
+
+        :param dao: DAO to get versions from when there is no cached result
+        :param LruTtlCache cache: Cache to store results in, or any object with
+            the same ``get`` and ``set`` methods such as :class:`stac.diskcache.SqliteCache`
+        :param stac.metrics.MetricsSink metrics: Optional sink to record cache hits
+            and misses to. Default is not to record metrics.
+        """
+        self._dao = dao
+        self._cache = cache
+        self._metrics = stac.metrics.get_sink(metrics)
+
+    def get_most_recent_release(self, group, artifact, remote=False):
+        """Get the version number of the most recent release, using a cached
+        value if available.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_release`.
+        """
+        key = ('release', group, artifact, bool(remote))
+        return self._lookup(key, functools.partial(
+            self._dao.get_most_recent_release, group, artifact, remote=remote))
+
+    def get_most_recent_versions(self, group, artifact, limit, remote=False, integration=False):
+        """Get the version numbers of the most recent artifacts, using cached
+        values if available.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_versions`.
+        """
+        if limit < 1:
+            raise ValueError("Releases limit must be positive")
+
+        key = ('versions', group, artifact, bool(remote), bool(integration), limit)
+        versions = self._lookup(key, functools.partial(
+            self._get_versions, group, artifact, limit, remote, integration))
+        # Each caller gets their own copy of the cached result
+        return list(versions)
+
+    def _get_versions(self, group, artifact, limit, remote, integration):
+        return tuple(self._dao.get_most_recent_versions(
+            group, artifact, limit, remote=remote, integration=integration))
+
+    def _lookup(self, key, fetch):
+        value = self._cache.get(key)
+        if value is not None:
+            self._record('hit')
+            self._logger.debug("Cache hit for %s", key)
+            return value
+
+        self._record('miss')
+        value = fetch()
+        if value is not None:
+            self._cache.set(key, value)
+        return value
+
+    def _record(self, result):
+        self._metrics.increment('stac_cache_requests_total', labels={'result': result})
+
+    def __getattr__(self, name):
+        return _get_pass_through(self, name)
+
+
+class RefreshingVersionDao(CachingVersionDao):
+    """Caching version DAO that keeps serving results after they expire while
+    refreshing them in the background (a.k.a. stale-while-revalidate).
+
+    Results are fresh for ``ttl`` seconds after being stored. A lookup of a result
+    that expired less than ``stale_ttl`` seconds ago returns it immediately and
+    starts refreshing it in the background. Results requested at least
+    ``hot_requests`` times since they were stored are also refreshed in the
+    background once they are within ``refresh_ahead`` seconds of expiring, so the
+    most frequently requested results are normally never seen expired. Only
+    lookups of results that are not cached (or that expired longer ago than the
+    stale window) wait for the wrapped DAO.
+
+    Results are stored along with the time they are fresh until, so the cache must
+    be dedicated to this DAO and keep entries for at least ``ttl + stale_ttl``
+    seconds. Any cache with the same methods as :class:`LruTtlCache` may be used.
+
+    At most one refresh of each result is in progress at a time. Errors refreshing
+    a result are logged and the stale result is served until the stale window ends.
+
+    This class is thread safe if the wrapped DAO is.
+    """
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, dao, cache, ttl, stale_ttl, refresh_ahead=None,
+                 hot_requests=DEFAULT_HOT_REQUESTS, max_workers=DEFAULT_REFRESH_WORKERS,
+                 metrics=None, clock=time.time):
+        """Set the DAO to wrap, the cache to store results in, and when to refresh them.
+
+        :param dao: DAO to get versions from when there is no usable cached result
+        :param LruTtlCache cache: Cache to store results in
+        :param float ttl: Number of seconds a result is fresh for after being stored.
+        :param float stale_ttl: Number of seconds after a result expires that it may still
+            be served while being refreshed.
+        :param float refresh_ahead: Number of seconds before a frequently requested result
+            expires that it is refreshed. Default is a fifth of the TTL.
+        :param int hot_requests: Number of times a result must be requested after being
+            stored to be refreshed before it expires. Default is 3.
+        :param int max_workers: Maximum number of results to refresh concurrently.
+            Default is 2.
+        :param stac.metrics.MetricsSink metrics: Optional sink to record cache hits,
+            misses, stale hits, and refreshes to. Default is not to record metrics.
+        :param callable clock: Function returning the current time in seconds. Only
+            useful for testing.
+        :raises ValueError: If the TTL or stale TTL is negative
+        """
+        if ttl < 0:
+            raise ValueError("Cache TTL must not be negative")
+        if stale_ttl < 0:
+            raise ValueError("Cache stale TTL must not be negative")
+
+        super(RefreshingVersionDao, self).__init__(dao, cache, metrics=metrics)
+        self._ttl = ttl
+        self._refresh_ahead = ttl / 5.0 if refresh_ahead is None else refresh_ahead
+        self._hot_requests = hot_requests
+        self._clock = clock
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._requests = collections.Counter()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._refreshes = 0
+
+    @property
+    def refreshes(self):
+        """Number of background refreshes started."""
+        return self._refreshes
+
+    def close(self):
+        """Wait for any refreshes in progress and stop refreshing results in the background."""
+        self._executor.shutdown(wait=True)
+
+    def _lookup(self, key, fetch):
+        now = self._clock()
+        entry = self._cache.get(key)
+        if entry is None:
+            self._record('miss')
+            value = fetch()
+            if value is not None:
+                self._store(key, value)
+            return value
+
+        fresh_until, value = entry
+        if fresh_until <= now:
+            self._record('stale')
+            self._logger.debug("Stale cache hit for %s", key)
+            self._refresh(key, fetch)
+        else:
+            self._record('hit')
+            self._logger.debug("Cache hit for %s", key)
+            hot = self._count_request(key) >= self._hot_requests
+            if hot and fresh_until - now <= self._refresh_ahead:
+                self._refresh(key, fetch)
+        return value
+
+    def _count_request(self, key):
+        with self._lock:
+            # Forget about rarely requested results instead of tracking every key forever
+            if key not in self._requests and len(self._requests) >= _MAX_TRACKED_KEYS:
+                self._requests.clear()
+            self._requests[key] += 1
+            return self._requests[key]
+
+    def _store(self, key, value):
+        self._cache.set(key, (self._clock() + self._ttl, value))
+        with self._lock:
+            self._requests.pop(key, None)
+
+    def _refresh(self, key, fetch):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+            self._refreshes += 1
+
+        self._logger.debug("Refreshing %s in the background", key)
+        try:
+            self._executor.submit(self._run_refresh, key, fetch)
+        except RuntimeError:
+            # Closed, keep serving whatever is cached
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _run_refresh(self, key, fetch):
+        result = 'ok'
+        try:
+            value = fetch()
+            if value is not None:
+                self._store(key, value)
+        except Exception as e:  # pylint: disable=broad-except
+            self._logger.warning("Could not refresh %s: %s", key, e)
+            result = 'error'
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+        self._metrics.increment('stac_cache_refreshes_total', labels={'result': result})
+
+
+class CoalescingVersionDao(object):
+    """Version DAO that wraps another DAO, sharing a single call to it between
+    concurrent identical lookups.
+
+    When a lookup is made while an identical lookup (same method, group, artifact,
+    and arguments) is already in progress, it waits for the in progress call and
+    gets the same result, or the same error, instead of calling the wrapped DAO
+    again. Nothing is kept once a call completes, so this can be combined with
+    :class:`CachingVersionDao` (by wrapping this DAO with it) to also reuse results
+    of completed calls.
+
+    Any DAO with the same methods as :class:`stac.http.VersionApiDao` may be
+    wrapped. A count of the number of lookups that shared another's call is
+    maintained. Calls to ``get_version_index`` and ``get_versions_since``, if the
+    wrapped DAO has them, are passed through to it as-is.
+
+    This class is thread safe if the wrapped DAO is.
+    """
+
+    _logger = stac.util.get_log()
+
+    def __init__(self, dao):
+        """Set the DAO to wrap.
+
+        :param dao: DAO to get versions from
+        """
+        self._dao = dao
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._coalesced = 0
+
+    @property
+    def coalesced(self):
+        """Number of lookups that shared an in progress call instead of making their own."""
+        return self._coalesced
+
+    def __getattr__(self, name):
+        return _get_pass_through(self, name)
+
+    def get_most_recent_release(self, group, artifact, remote=False):
+        """Get the version number of the most recent release, sharing any identical
+        call in progress.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_release`.
+        """
+        key = ('release', group, artifact, bool(remote))
+        return self._call(key, self._dao.get_most_recent_release, group, artifact, remote=remote)
+
+    def get_most_recent_versions(self, group, artifact, limit, remote=False, integration=False):
+        """Get the version numbers of the most recent artifacts, sharing any identical
+        call in progress.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_versions`.
+        """
+        if limit < 1:
+            raise ValueError("Releases limit must be positive")
+
+        key = ('versions', group, artifact, bool(remote), bool(integration), limit)
+        versions = self._call(
+            key, self._dao.get_most_recent_versions, group, artifact, limit,
+            remote=remote, integration=integration)
+        # Each caller gets their own copy of the shared result
+        return list(versions)
+
+    def _call(self, key, func, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = concurrent.futures.Future()
+                self._calls[key] = future
+            else:
+                self._coalesced += 1
+
+        if not leader:
+            self._logger.debug("Waiting for in progress call for %s", key)
+            return future.result()
+
+        try:
+            future.set_result(func(*args, **kwargs))
+        except BaseException as e:  # pylint: disable=broad-except
+            # Waiting callers must never be left waiting, whatever went wrong
+            future.set_exception(e)
+        finally:
+            with self._lock:
+                del self._calls[key]
+
+        return future.result()
+
+
+def _get_pass_through(wrapper, name):
+    # Only called for attributes the wrapper doesn't have, so the wrapper has a method
+    # like get_version_index exactly when the DAO it wraps does.
+    dao = wrapper.__dict__.get('_dao')
+    if dao is None or name not in _PASS_THROUGH_METHODS:
+        raise AttributeError(name)
+    return getattr(dao, name)
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.cli
+~~~~~~~~
+
+Command line interface for resolving (and optionally downloading) many artifacts
+at once. Installed as the ``stac`` command.
+
+Artifacts to resolve are read from a manifest, one per line. Each line is either
+whitespace separated fields::
+
+    NAME PACKAGING [VERSION] [DESCRIPTOR]
+
+or a JSON object with string ``name``, ``packaging``, and optionally ``version`` and
+``descriptor`` keys. A missing version, or a version of ``latest``, means the
+latest version of the artifact. Blank lines and lines starting with ``#`` are
+ignored. For example::
+
+    com.example.services.mail war
+    com.example.services.mail jar latest sources
+    com.example.services.auth jar 1.4.5
+    {"name": "com.example.services.users", "packaging": "war"}
+
+Artifacts are resolved as lines are read, so a manifest may be piped from another
+command that is still running. A JSON object is written to standard output for
+each artifact as soon as it has been resolved, with the ``url`` of the artifact
+(and its ``path`` if downloaded) or the ``error`` encountered. The exit status is
+non-zero if any artifact could not be resolved.
+"""
+
+from __future__ import absolute_import, print_function
+
+import argparse
+import collections
+import concurrent.futures
+import json
+import logging
+import os
+import sys
+import threading
+
+import requests
+
+import stac
+import stac.client
+import stac.exceptions
+import stac.retry
+import stac.util
+
+LATEST = 'latest'
+
+# Results of version lookups are reused for the rest of a run
+_CACHE_TTL = 300
+
+_EXIT_FAILED = 1
+
+# Type of strings parsed from JSON (unicode on Python 2)
+_TEXT = type(u'')
+
+
+# pylint: disable=too-few-public-methods
+class ManifestEntry(object):
+    """Artifact to resolve, parsed from a line of a manifest."""
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, line, name, packaging, version=None, descriptor=None):
+        #: Line number of the entry in the manifest, starting at one.
+        self.line = line
+
+        #: Fully qualified name of the artifact.
+        self.name = name
+
+        #: Type of packaging / file format of the artifact.
+        self.packaging = packaging
+
+        #: Version of the artifact or ``None`` for the latest version.
+        self.version = version
+
+        #: Tag of a particular variant of the artifact or ``None``.
+        self.descriptor = descriptor
+
+
+def parse_manifest(lines):
+    """Parse the lines of a manifest, yielding a :class:`ManifestEntry` for each
+    artifact or a ``ValueError`` for each line that could not be parsed.
+
+    :param iterable lines: Lines of the manifest
+    :return: Generator of entries and errors
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+
+        try:
+            yield _parse_line(number, line)
+        except ValueError as e:
+            yield ValueError("Line {0}: {1}".format(number, e))
+
+
+def _parse_line(number, line):
+    if line.startswith('{'):
+        fields = json.loads(line)
+        if not isinstance(fields, dict) or 'name' not in fields or 'packaging' not in fields:
+            raise ValueError("JSON entries must have a name and packaging")
+        for key in ('name', 'packaging'):
+            if not isinstance(fields[key], _TEXT) or not fields[key]:
+                raise ValueError("JSON entry {0} must be a non-empty string".format(key))
+        for key in ('version', 'descriptor'):
+            if fields.get(key) is not None and not isinstance(fields[key], _TEXT):
+                raise ValueError("JSON entry {0} must be a string or null".format(key))
+        name, packaging = fields['name'], fields['packaging']
+        version, descriptor = fields.get('version'), fields.get('descriptor')
+    else:
+        fields = line.split()
+        if not 2 <= len(fields) <= 4:
+            raise ValueError("Expected NAME PACKAGING [VERSION] [DESCRIPTOR]")
+        fields.extend([None] * (4 - len(fields)))
+        name, packaging, version, descriptor = fields
+
+    if version == LATEST:
+        version = None
+    return ManifestEntry(number, name, packaging, version, descriptor)
+
+
+def resolve(client, entry, remote=False, directory=None):
+    """Resolve the version and URL of an artifact and optionally download it.
+
+    :param stac.client.ArtifactoryClient client: Client to resolve the artifact with
+    :param ManifestEntry entry: Artifact to resolve
+    :param bool remote: Should remote repositories be searched for the latest version?
+    :param str directory: Optional directory to download the artifact to
+    :return: Result to output for the artifact
+    :rtype: collections.OrderedDict
+    """
+    result = collections.OrderedDict([
+        ('line', entry.line),
+        ('name', entry.name),
+        ('packaging', entry.packaging),
+        ('descriptor', entry.descriptor),
+    ])
+
+    try:
+        version = entry.version
+        if version is None:
+            version = client.get_latest_version(entry.name, remote=remote)
+        result['version'] = version
+        result['url'] = client.get_version_url(
+            entry.name, entry.packaging, version, descriptor=entry.descriptor)
+        if directory is not None:
+            result['path'] = client.download_version(
+                entry.name, entry.packaging, version, directory, descriptor=entry.descriptor)
+    except (stac.exceptions.StacError, requests.exceptions.RequestException, IOError) as e:
+        result['error'] = str(e)
+    except Exception as e:  # pylint: disable=broad-except
+        # Anything else (e.g. a malformed version) only affects this artifact too
+        result['error'] = '{0}: {1}'.format(type(e).__name__, e)
+    return result
+
+
+def _new_parser():
+    parser = argparse.ArgumentParser(
+        prog='stac', description="Resolve the URLs of many artifacts in Artifactory concurrently.")
+    parser.add_argument('--version', action='version', version='%(prog)s ' + stac.__version__)
+    parser.add_argument('-u', '--url', required=True,
+                        help="URL of the Artifactory installation, for example "
+                             "https://example.com/artifactory")
+    parser.add_argument('-r', '--repo', required=True, help="Repository to search")
+    parser.add_argument('-m', '--manifest', default='-',
+                        help="File to read artifacts from, '-' for standard input (default)")
+    parser.add_argument('-d', '--download', metavar='DIRECTORY',
+                        help="Download artifacts to this directory")
+    parser.add_argument('-w', '--workers', type=int, default=stac.client.DEFAULT_MAX_WORKERS,
+                        help="Number of artifacts to resolve concurrently (default %(default)s)")
+    parser.add_argument('--snapshot', action='store_true',
+                        help="The repository contains SNAPSHOT (integration) versions")
+    parser.add_argument('--pin-snapshots', action='store_true',
+                        help="Use the timestamped file of the most recent build of SNAPSHOT "
+                             "versions instead of the -SNAPSHOT file")
+    parser.add_argument('--remote', action='store_true',
+                        help="Search remote repositories for the latest versions")
+    parser.add_argument('--username', help="Username for authentication")
+    parser.add_argument('--password',
+                        help="Password for authentication, default is the STAC_PASSWORD "
+                             "environment variable")
+    parser.add_argument('--timeout', type=float,
+                        help="Seconds to wait to connect or for data (default is to wait forever)")
+    parser.add_argument('--retries', type=int, default=0,
+                        help="Times to retry requests that fail because of transient errors "
+                             "(default %(default)s)")
+    parser.add_argument('-v', '--verbose', action='store_true',
+                        help="Log requests to standard error")
+    return parser
+
+
+def main(args=None):
+    """Run the ``stac`` command.
+
+    :param list args: Command line arguments, default is ``sys.argv[1:]``
+    :return: Exit status
+    :rtype: int
+    """
+    options = _new_parser().parse_args(args)
+    if options.workers < 1:
+        _new_parser().error("Number of workers must be positive")
+    if options.download is not None and not os.path.isdir(options.download):
+        _new_parser().error("Download directory {0} does not exist".format(options.download))
+
+    manifest = sys.stdin
+    if options.manifest != '-':
+        try:
+            manifest = open(options.manifest, 'r')
+        except (IOError, OSError) as e:
+            _new_parser().error("Could not open manifest {0}: {1}".format(
+                options.manifest, e.strerror or e))
+
+    if options.verbose:
+        logging.basicConfig(stream=sys.stderr)
+        stac.util.get_log().setLevel(logging.DEBUG)
+
+    retry_policy = None
+    if options.retries:
+        retry_policy = stac.retry.RetryPolicy(max_attempts=options.retries + 1)
+
+    client = stac.client.new_maven_client(
+        options.url, options.repo, is_snapshot=options.snapshot, username=options.username,
+        password=options.password or os.environ.get('STAC_PASSWORD'), cache_ttl=_CACHE_TTL,
+        coalesce=True, pool_maxsize=options.workers, connect_timeout=options.timeout,
+        read_timeout=options.timeout, retry_policy=retry_policy,
+        resolve_snapshots=options.pin_snapshots)
+
+    if manifest is sys.stdin:
+        return _run(client, manifest, options)
+    with manifest:
+        return _run(client, manifest, options)
+
+
+def _run(client, manifest, options):
+    writer = _ResultWriter()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=options.workers) as executor:
+        # Iterating over a file on Python 2 reads ahead, waiting for more lines to arrive
+        for entry in parse_manifest(iter(manifest.readline, '')):
+            if isinstance(entry, ValueError):
+                writer.write({'error': str(entry)})
+                continue
+            future = executor.submit(resolve, client, entry, options.remote, options.download)
+            future.add_done_callback(lambda done: writer.write(done.result()))
+    return _EXIT_FAILED if writer.failed else 0
+
+
+class _ResultWriter(object):
+    # Writes results from any thread, one per line, as soon as they're ready
+
+    def __init__(self):
+        self.failed = False
+        self._lock = threading.Lock()
+
+    def write(self, result):
+        with self._lock:
+            if 'error' in result:
+                self.failed = True
+            sys.stdout.write(json.dumps(result) + '\n')
+            sys.stdout.flush()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -18,13 +18,35 @@ the Stac library.
 
 from __future__ import absolute_import
 from abc import ABCMeta, abstractmethod
-import requests
+import collections
+import os
 import stac.exceptions
-import stac.http
+import stac.metrics
 import stac.util
+import stac.version
 
 DEFAULT_VERSION_LIMIT = 5
 
+# Same as the default connection pool size of requests. Requests (and the modules
+# that use it) are only imported once a client that makes requests is created so
+# that generating URLs doesn't require loading them.
+DEFAULT_POOL_SIZE = 10
+
+# Match the connection pool size so that concurrent lookups don't end up waiting
+# on (or discarding) connections.
+DEFAULT_MAX_WORKERS = DEFAULT_POOL_SIZE
+
+# Same as the defaults of the cache and store modules, which are only imported once
+# a client that caches results or stores artifacts is created.
+DEFAULT_CACHE_SIZE = 1024
+DEFAULT_STORE_SIZE = 10 * 1024 * 1024 * 1024
+
+# Maximum number of group and artifact combinations to keep precompiled URLs for
+_MAX_CACHED_URL_PARTS = 10000
+
+# Limit used to fetch every version of an artifact to build an index of them
+_ALL_VERSIONS = 2 ** 31 - 1
+
 
 class ArtifactoryClient(object):
     """Interface for getting URLs and versions of artifacts.
@@ -51,6 +73,28 @@ class ArtifactoryClient(object):
     def get_latest_versions(self, full_name, remote=False, limit=DEFAULT_VERSION_LIMIT):
         pass
 
+    # Methods added to the interface since it was first published aren't abstract so
+    # that existing implementations can still be created, they raise NotImplementedError
+    # instead.
+
+    def get_latest_versions_many(self, full_names, remote=False):
+        raise NotImplementedError()
+
+    def download_version(self, full_name, packaging, version, destination, descriptor=None):
+        raise NotImplementedError()
+
+    def get_version_urls(self, artifacts):
+        raise NotImplementedError()
+
+    def get_version_index(self, full_name, remote=False):
+        raise NotImplementedError()
+
+    def resolve_version(self, full_name, version_range, remote=False):
+        raise NotImplementedError()
+
+    def resolve_versions(self, full_name, version_ranges, remote=False):
+        raise NotImplementedError()
+
 
 class ArtifactUrlGenerator(object):
     """Interface for generating the URL to download a particular version of an
@@ -67,8 +111,29 @@ class ArtifactUrlGenerator(object):
     def get_url(self, group, artifact, packaging, version, descriptor):
         pass
 
+    def get_urls(self, artifacts):
+        """Get the URLs of many versions of artifacts.
 
-def new_maven_client(base_url, repo, is_snapshot=False, username=None, password=None):
+        Implementations may override this to generate URLs faster than calling
+        :meth:`get_url` for each version.
+
+        :param iterable artifacts: Tuples of the group, artifact, packaging, version,
+            and descriptor (or ``None``) of each version to get the URL of.
+        :return: Generator of URLs, in the same order as the artifacts
+        """
+        for group, artifact, packaging, version, descriptor in artifacts:
+            yield self.get_url(group, artifact, packaging, version, descriptor)
+
+
+# pylint: disable=too-many-arguments
+def new_maven_client(base_url, repo, is_snapshot=False, username=None, password=None,
+                     cache_ttl=None, cache_size=DEFAULT_CACHE_SIZE, download_segments=1,
+                     store_path=None, store_size=DEFAULT_STORE_SIZE, use_aql=False,
+                     streaming=False, pool_connections=DEFAULT_POOL_SIZE,
+                     pool_maxsize=DEFAULT_POOL_SIZE, connect_timeout=None,
+                     read_timeout=None, tcp_keepalive=False, retry_policy=None,
+                     hedging_policy=None, coalesce=False, metrics=None, cache_path=None,
+                     cache_stale_ttl=None, index_interval=None, resolve_snapshots=False):
     """Get a new implementation of :class:`ArtifactoryClient` for use with Maven repository
     layouts, optionally using the provided authentication.
 
@@ -81,25 +146,164 @@ def new_maven_client(base_url, repo, is_snapshot=False, username=None, password=
     :param str base_url: URL to root of the Artifactory installation. Example,
         "https://artifactory.example.com/artifactory".
     :param str repo: Which repository should searches be done against. Example, "libs-release-local"
-        or "libs-snapshot-local".
+        or "libs-snapshot-local". May be a list of repositories to search all of them concurrently
+        and merge the versions found, see :class:`stac.multirepo.MultiRepoVersionDao`. Clients
+        searching several repositories can't generate URLs or download artifacts, since a version
+        may be in any of them. To find which repository has a version, use the DAO directly.
     :param bool is_snapshot: Does the repository to perform searches against contain SNAPSHOT
         (a.k.a. integration) versions? Default is ``False``
     :param str username: Optional username for authentication when making API calls and
         downloading artifacts.
     :param str password: Optional password for authentication when making API calls and
         downloading artifacts.
+    :param float cache_ttl: If set, cache the results of version lookups in memory for
+        this many seconds. Default is not to cache results.
+    :param int cache_size: Maximum number of version lookups to cache when caching is
+        enabled. Default is 1024.
+    :param int download_segments: Maximum number of byte ranges of an artifact to download
+        concurrently. Only large artifacts are split into multiple ranges and only if the
+        server supports range requests. Default is to download artifacts as a single stream.
+    :param str store_path: If set, keep downloaded artifacts in a local store in this directory
+        and use them instead of downloading an artifact again. Default is not to store artifacts.
+    :param int store_size: Maximum total size in bytes of artifacts kept in the local store.
+        Default is 10 GiB.
+    :param bool use_aql: Should versions be searched for using the Artifactory Query Language?
+        This lets Artifactory filter and limit the versions returned, which is much faster for
+        artifacts with many versions. See :class:`stac.http.AqlVersionDao` for caveats. Default
+        is to use the version search API.
+    :param bool streaming: Should responses from the version search API be parsed incrementally,
+        keeping only the requested number of versions in memory? Default is false.
+    :param int pool_connections: Number of hosts to keep HTTP connection pools for. Default
+        is 10.
+    :param int pool_maxsize: Maximum number of HTTP connections to keep open to each host.
+        This is also the maximum number of concurrent lookups made by
+        :meth:`GenericArtifactoryClient.get_latest_versions_many`. When searching several
+        repositories, this many connections are kept open for each repository. Default is 10.
+    :param float connect_timeout: Seconds to wait to establish a connection to Artifactory.
+        Default is to wait forever.
+    :param float read_timeout: Seconds to wait for Artifactory to send data once connected.
+        Default is to wait forever.
+    :param bool tcp_keepalive: Should TCP keep-alive probes be sent on idle connections to
+        detect connections that have been silently dropped? Default is false.
+    :param stac.retry.RetryPolicy retry_policy: Optional policy for retrying version lookups
+        and downloads that fail because of transient errors like connection resets or 503
+        responses. Default is not to retry.
+    :param stac.hedge.HedgingPolicy hedging_policy: Optional policy for sending a duplicate
+        version lookup when a lookup is slow to complete, using whichever response arrives
+        first. Default is not to hedge lookups.
+    :param bool coalesce: Should concurrent identical version lookups share a single request
+        to Artifactory? Default is false.
+    :param stac.metrics.MetricsSink metrics: Optional sink to record metrics about requests to
+        Artifactory, client operations, and caching to, for example a
+        :class:`stac.metrics.MetricsRegistry`. Default is not to record metrics.
+    :param str cache_path: If set along with ``cache_ttl``, cache the results of version
+        lookups in a SQLite database at this path instead of in memory. The database may be
+        shared by any number of processes on the same host, results are kept apart for each
+        URL, repository, search method, and user. Default is to cache in memory.
+    :param float cache_stale_ttl: If set along with ``cache_ttl``, keep returning cached results
+        for up to this many seconds after they expire while refreshing them in the background,
+        and refresh frequently requested results before they expire. See
+        :class:`stac.cache.RefreshingVersionDao`. Default is to look up expired results
+        before returning.
+    :param float index_interval: If set, keep a sorted index of every version of each artifact
+        looked up and answer lookups from it, refreshing it at most every this many seconds
+        with only new versions. With ``use_aql``, refreshes fetch only versions deployed since
+        the previous refresh. See :class:`stac.index.IndexedVersionDao`. Default is not to
+        index versions.
+    :param bool resolve_snapshots: Should URLs (and downloads) of SNAPSHOT versions use the
+        unique timestamped file of the most recent build, found using the ``maven-metadata.xml``
+        of the version, instead of the ``-SNAPSHOT`` file name? Files are resolved once a minute
+        at most, so every URL generated meanwhile points at the same file. See
+        :class:`stac.snapshot.SnapshotResolver`. Default is false.
     :return: New Artifactory client for use with Maven repositories
     :rtype: GenericArtifactoryClient
+    :raises ValueError: If several repositories are given along with options that only
+        affect URLs or downloads.
     """
+    import stac.cache
+    import stac.download
+    import stac.http
+
+    repos = list(repo) if isinstance(repo, (list, tuple)) else [repo]
+    if len(repos) > 1 and (download_segments > 1 or store_path is not None or resolve_snapshots):
+        raise ValueError("URLs and downloads are not supported when searching several "
+                         "repositories, download and snapshot options can't be used")
+
+    # Each concurrent lookup searches every repository at the same time
+    session = stac.http.new_session(
+        username=username, password=password, pool_connections=pool_connections,
+        pool_maxsize=pool_maxsize * len(repos), tcp_keepalive=tcp_keepalive)
+
+    timeout = None
+    if connect_timeout is not None or read_timeout is not None:
+        timeout = (connect_timeout, read_timeout)
+
+    daos = []
+    for name in repos:
+        if use_aql:
+            dao = stac.http.AqlVersionDao(
+                session, base_url, name, timeout=timeout, retry_policy=retry_policy,
+                hedging_policy=hedging_policy, metrics=metrics)
+        else:
+            dao = stac.http.VersionApiDao(
+                session, base_url, name, streaming=streaming, timeout=timeout,
+                retry_policy=retry_policy, hedging_policy=hedging_policy, metrics=metrics)
+        if index_interval is not None:
+            import stac.index
+            dao = stac.index.IndexedVersionDao(
+                dao, refresh_interval=index_interval, metrics=metrics)
+        daos.append((name, dao))
+
+    if len(daos) > 1:
+        import stac.multirepo
+        dao = stac.multirepo.MultiRepoVersionDao(daos, max_workers=pool_maxsize * len(daos))
+
+    if coalesce:
+        dao = stac.cache.CoalescingVersionDao(dao)
+
+    if cache_ttl is not None:
+        # Stale results are kept in the cache until the end of the stale window
+        entry_ttl = cache_ttl + (cache_stale_ttl or 0)
+        if cache_path is not None:
+            import stac.diskcache
+            # Refreshed results are stored differently, keep them apart from plain results.
+            # Results also depend on how versions are searched for and who searches for them.
+            namespace = (base_url.rstrip('/'), ','.join(repos), cache_stale_ttl is not None,
+                         bool(use_aql), _get_credentials_key(username, password))
+            cache = stac.diskcache.SqliteCache(
+                cache_path, entry_ttl, cache_size, namespace=namespace)
+        else:
+            cache = stac.cache.LruTtlCache(entry_ttl, cache_size)
+
+        if cache_stale_ttl is not None:
+            dao = stac.cache.RefreshingVersionDao(
+                dao, cache, cache_ttl, cache_stale_ttl, metrics=metrics)
+        else:
+            dao = stac.cache.CachingVersionDao(dao, cache, metrics=metrics)
 
-    session = requests.Session()
-    if username is not None and password is not None:
-        session.auth = (username, password)
+    store = None
+    if store_path is not None:
+        import stac.store
+        store = stac.store.ArtifactStore(store_path, max_size=store_size)
+
+    snapshot_resolver = None
+    if resolve_snapshots:
+        import stac.snapshot
+        snapshot_resolver = stac.snapshot.SnapshotResolver(
+            session, base_url, repos[0], timeout=timeout, retry_policy=retry_policy,
+            metrics=metrics)
 
     config = GenericArtifactoryClientConfig()
     config.is_integration = is_snapshot
-    config.http_dao = stac.http.VersionApiDao(session, base_url, repo)
-    config.url_generator = MavenArtifactUrlGenerator(base_url, repo)
+    config.http_dao = dao
+    config.max_workers = pool_maxsize
+    config.metrics = metrics
+    if len(repos) == 1:
+        config.url_generator = MavenArtifactUrlGenerator(
+            base_url, repos[0], snapshot_resolver=snapshot_resolver)
+        config.downloader = stac.download.ArtifactDownloader(
+            session, max_segments=download_segments, store=store, timeout=timeout,
+            retry_policy=retry_policy, metrics=metrics)
 
     return GenericArtifactoryClient(config)
 
@@ -117,9 +321,24 @@ class GenericArtifactoryClientConfig(object):
         #: DAO for interacting with the Artifactory HTTP API.
         self.http_dao = None
 
-        #: URL generator for determining the URL to download an artifact.
+        #: URL generator for determining the URL to download an artifact. If not set, the
+        #: client can't generate URLs or download artifacts.
         self.url_generator = None
 
+        #: Maximum number of lookups to perform concurrently when resolving the versions
+        #: of many artifacts at once. This should be no more than the maximum number of
+        #: connections per host of the HTTP session used by the DAO. Default is the
+        #: connection pool size used by requests.
+        self.max_workers = DEFAULT_MAX_WORKERS
+
+        #: Downloader for fetching artifacts from Artifactory. If not set, the client can't
+        #: download artifacts.
+        self.downloader = None
+
+        #: Optional :class:`stac.metrics.MetricsSink` to record the count, duration, and result
+        #: of each operation to. Default is not to record metrics.
+        self.metrics = None
+
 
 class GenericArtifactoryClient(ArtifactoryClient):
     """Artifactory client for use with multiple different repository layouts.
@@ -141,6 +360,11 @@ class GenericArtifactoryClient(ArtifactoryClient):
         self._is_integration = config.is_integration
         self._dao = config.http_dao
         self._urls = config.url_generator
+        self._max_workers = config.max_workers
+        self._downloader = config.downloader
+        self._metrics = stac.metrics.get_sink(config.metrics)
+        # DAOs that keep indexes of versions can hand them out without sorting again
+        self._indexed = hasattr(self._dao, 'get_version_index')
 
     def get_version_url(self, full_name, packaging, version, descriptor=None):
         """Get the URL to a specific version of the given project, optionally using
@@ -165,7 +389,9 @@ class GenericArtifactoryClient(ArtifactoryClient):
         The example above would return a path object for the sources jar of version 1.4.5
         of some hypothetical user service.
 
-        This method does not make any network requests.
+        This method does not make any network requests, unless the client resolves SNAPSHOT
+        versions to timestamped files (see ``resolve_snapshots`` of :func:`new_maven_client`)
+        and the version is a SNAPSHOT version.
 
         :param str full_name: Fully qualified name of the artifact to get the path of.
         :param str packaging: Type of packaging / file format used for the artifact
@@ -173,9 +399,41 @@ class GenericArtifactoryClient(ArtifactoryClient):
         :param str descriptor: Tag to get a particular variant of a release.
         :return: URL to the artifact with given name and version
         :rtype: str
+        :raises stac.exceptions.StacError: If the client can't generate URLs, e.g. because
+            it searches several repositories.
         """
         group, artifact = _parse_full_name(full_name)
-        return self._urls.get_url(group, artifact, packaging, version, descriptor)
+        return self._get_url_generator().get_url(group, artifact, packaging, version, descriptor)
+
+    def get_version_urls(self, artifacts):
+        """Get the URLs of many specific versions of projects.
+
+        This gives the same URLs as calling :meth:`get_version_url` for each version but
+        is much faster when there are many versions of each project, since each name is
+        only parsed once.
+
+        Example usage:
+
+        >>> client = new_maven_client('https://www.example.com/artifactory', 'libs-release')
+        >>> for url in client.get_version_urls([
+        ...     ('com.example.users.service', 'jar', '1.4.5', None),
+        ...     ('com.example.users.service', 'jar', '1.4.5', 'sources'),
+        ... ]):
+        ...     print(url)
+        https://www.example.com/artifactory/libs-release/com/example/users/service/1.4.5/service-1.4.5.jar
+        https://www.example.com/artifactory/libs-release/com/example/users/service/1.4.5/service-1.4.5-sources.jar
+
+        This method does not make any network requests, except to resolve SNAPSHOT versions
+        as described for :meth:`get_version_url`. URLs are generated as the returned generator
+        is consumed.
+
+        :param iterable artifacts: Tuples of the fully qualified name, packaging, version,
+            and descriptor (or ``None``) of each artifact to get the URL of.
+        :return: Generator of URLs, in the same order as the artifacts
+        :raises stac.exceptions.StacError: If the client can't generate URLs, e.g. because
+            it searches several repositories.
+        """
+        return self._get_url_generator().get_urls(_parse_full_names(artifacts))
 
     def get_latest_version(self, full_name, remote=False):
         """Get the most recent version of the given project.
@@ -203,18 +461,21 @@ class GenericArtifactoryClient(ArtifactoryClient):
         :raises stac.exceptions.NoMatchingVersionsError: If no matching artifact could
             be found
         """
-        group, artifact = _parse_full_name(full_name)
-        try:
-            if not self._is_integration:
-                version = self._get_latest_release_version(group, artifact, remote)
-            else:
-                version = self._get_latest_snapshot_version(group, artifact, remote)
-        except requests.HTTPError as e:
-            # pylint: disable=no-member
-            if e.response is not None and e.response.status_code == requests.codes.not_found:
-                raise self._get_wrapped_exception(group, artifact, cause=e)
-            raise
-        return version
+        with stac.metrics.track_operation(self._metrics, 'get_latest_version', full_name):
+            group, artifact = _parse_full_name(full_name)
+            try:
+                if not self._is_integration:
+                    version = self._get_latest_release_version(group, artifact, remote)
+                else:
+                    version = self._get_latest_snapshot_version(group, artifact, remote)
+            except Exception as e:  # pylint: disable=broad-except
+                if _is_not_found(e):
+                    raise self._get_wrapped_exception(group, artifact, cause=e)
+                raise
+
+            if not version:
+                raise self._get_wrapped_exception(group, artifact)
+            return version
 
     def get_latest_versions(self, full_name, remote=False, limit=DEFAULT_VERSION_LIMIT):
         """Get the most recent versions of the given project, ordered most recent to least
@@ -250,20 +511,223 @@ class GenericArtifactoryClient(ArtifactoryClient):
         if limit < 1:
             raise ValueError("Releases limit must be positive")
 
-        group, artifact = _parse_full_name(full_name)
+        with stac.metrics.track_operation(self._metrics, 'get_latest_versions', full_name):
+            group, artifact = _parse_full_name(full_name)
 
-        try:
-            versions = self._dao.get_most_recent_versions(
-                group, artifact, remote=remote, limit=limit, integration=self._is_integration)
-        except requests.HTTPError as e:
-            # pylint: disable=no-member
-            if e.response is not None and e.response.status_code == requests.codes.not_found:
-                raise self._get_wrapped_exception(group, artifact, cause=e)
-            raise
+            try:
+                versions = self._dao.get_most_recent_versions(
+                    group, artifact, remote=remote, limit=limit, integration=self._is_integration)
+            except Exception as e:  # pylint: disable=broad-except
+                if _is_not_found(e):
+                    raise self._get_wrapped_exception(group, artifact, cause=e)
+                raise
 
-        if not versions:
-            raise self._get_wrapped_exception(group, artifact)
-        return versions
+            if not versions:
+                raise self._get_wrapped_exception(group, artifact)
+            return versions
+
+    def get_latest_versions_many(self, full_names, remote=False):
+        """Get the most recent version of each of the given projects, performing
+        lookups concurrently.
+
+        Each name should be in the same form as the ``full_name`` argument to
+        :meth:`get_latest_version`. Duplicate names are only looked up once.
+
+        Example usage:
+
+        >>> client = new_maven_client('https://www.example.com/artifactory', 'libs-release')
+        >>> client.get_latest_versions_many(
+        ...     ['com.example.users.service', 'com.example.auth.service'])
+        OrderedDict([('com.example.users.service', '1.5.0'), ('com.example.auth.service', '1.6.0')])
+
+        If there are no matching versions of an artifact, the value for it in the result
+        is a :class:`stac.exceptions.NoMatchingVersionsError` instance instead of a version
+        number. Likewise, if looking up an artifact fails (for example because of a 503
+        response or a timeout) the value for it is the :class:`requests.exceptions.RequestException`
+        raised. Lookups of other artifacts are not affected.
+
+        This method makes a single network request per distinct artifact, at most
+        ``max_workers`` (see :class:`GenericArtifactoryClientConfig`) of them at once.
+
+        :param iterable full_names: Fully qualified names of the artifacts to get the
+            version of.
+        :param bool remote: Should remote repositories be searched to find the latest versions
+            (for example if the repository being checked is a virtual repository)? Note that
+            this can make the search much slower. The default is not to check remote repositories.
+        :return: Mapping of each name to the version number of the latest version of the
+            artifact or the error encountered looking it up, in the order the names were given
+        :rtype: collections.OrderedDict
+        """
+        names = list(collections.OrderedDict.fromkeys(full_names))
+        if not names:
+            return collections.OrderedDict()
+
+        import concurrent.futures
+        workers = min(self._max_workers, len(names))
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(self._get_latest_version_or_error, name, remote) for name in names]
+            return collections.OrderedDict(
+                (name, future.result()) for name, future in zip(names, futures))
+
+    def get_version_index(self, full_name, remote=False):
+        """Get an index of every version of the given project, for finding the most
+        recent version within version ranges.
+
+        The index is a snapshot of the versions at the time it was fetched. It can be
+        kept and used to resolve any number of ranges, each of which only costs a
+        binary search of the index.
+
+        Example usage:
+
+        >>> client = new_maven_client('https://www.example.com/artifactory', 'libs-release')
+        >>> index = client.get_version_index('com.example.users.service')
+        >>> index.latest('[1.4,1.5)')
+        '1.4.7'
+
+        This method makes a single network request.
+
+        :param str full_name: Fully qualified name of the artifact to get the versions of.
+        :param bool remote: Should remote repositories be searched to find the versions
+            (for example if the repository being checked is a virtual repository)? Note that
+            this can make the search much slower. The default is not to check remote repositories.
+        :return: Index of all versions of the artifact
+        :rtype: stac.version.VersionIndex
+        :raises stac.exceptions.NoMatchingVersionsError: If no matching artifact could be
+            found
+        """
+        with stac.metrics.track_operation(self._metrics, 'get_version_index', full_name):
+            group, artifact = _parse_full_name(full_name)
+            return self._get_version_index(group, artifact, remote)
+
+    def resolve_version(self, full_name, version_range, remote=False):
+        """Get the most recent version of the given project within a version range.
+
+        Ranges use Maven's syntax, see :mod:`stac.version` for details.
+
+        Example usage:
+
+        >>> client = new_maven_client('https://www.example.com/artifactory', 'libs-release')
+        >>> client.resolve_version('com.example.users.service', '[1.4,1.5)')
+        '1.4.7'
+
+        This method makes a single network request.
+
+        :param str full_name: Fully qualified name of the artifact to get the version of.
+        :param version_range: Range (a :class:`stac.version.VersionRange` or a string to
+            parse) that the version must be within.
+        :param bool remote: Should remote repositories be searched to find the version
+            (for example if the repository being checked is a virtual repository)? Note that
+            this can make the search much slower. The default is not to check remote repositories.
+        :return: Version number of the most recent version within the range
+        :rtype: str
+        :raises ValueError: If the range is not valid
+        :raises stac.exceptions.NoMatchingVersionsError: If no matching artifact could
+            be found or none of its versions are within the range
+        """
+        ranges = _parse_ranges([version_range])
+        with stac.metrics.track_operation(self._metrics, 'resolve_version', full_name):
+            version = next(iter(self._resolve(full_name, ranges, remote).values()))
+            if isinstance(version, stac.exceptions.NoMatchingVersionsError):
+                raise version
+            return version
+
+    def resolve_versions(self, full_name, version_ranges, remote=False):
+        """Get the most recent version of the given project within each of several
+        version ranges.
+
+        All versions of the project are fetched once and each range is resolved with
+        a binary search of them, so resolving many ranges costs about as much as
+        resolving one.
+
+        Example usage:
+
+        >>> client = new_maven_client('https://www.example.com/artifactory', 'libs-release')
+        >>> client.resolve_versions('com.example.users.service', ['[1.4,1.5)', '[2.0,)'])
+        OrderedDict([('[1.4,1.5)', '1.4.7'), ('[2.0,)', '2.1.0')])
+
+        If there are no versions within a range, the value for it in the result is a
+        :class:`stac.exceptions.NoMatchingVersionsError` instance instead of a version
+        number.
+
+        This method makes a single network request.
+
+        :param str full_name: Fully qualified name of the artifact to get the versions of.
+        :param iterable version_ranges: Ranges (:class:`stac.version.VersionRange`
+            instances or strings to parse) to find the most recent version within.
+        :param bool remote: Should remote repositories be searched to find the versions
+            (for example if the repository being checked is a virtual repository)? Note that
+            this can make the search much slower. The default is not to check remote repositories.
+        :return: Mapping of each range (as given) to the version number of the most recent
+            version within it or the error for ranges without any, in the order the ranges
+            were given.
+        :rtype: collections.OrderedDict
+        :raises ValueError: If any of the ranges is not valid
+        :raises stac.exceptions.NoMatchingVersionsError: If no matching artifact could
+            be found
+        """
+        # Parse everything before making any requests so invalid ranges fail fast
+        ranges = _parse_ranges(version_ranges)
+        with stac.metrics.track_operation(self._metrics, 'resolve_versions', full_name):
+            return self._resolve(full_name, ranges, remote)
+
+    # pylint: disable=too-many-arguments
+    def download_version(self, full_name, packaging, version, destination, descriptor=None):
+        """Download a specific version of the given project, optionally using a
+        descriptor to get a particular variant of the version (sources, javadocs, etc.).
+
+        The artifact is streamed to disk in fixed size chunks and verified against the
+        checksums sent by Artifactory as it is written, so memory use does not depend on
+        the size of the artifact.
+
+        Example usage:
+
+        >>> client = new_maven_client('https://www.example.com/artifactory', 'libs-release')
+        >>> client.download_version('com.example.users.service', 'war', '1.4.5', '/tmp')
+        '/tmp/service-1.4.5.war'
+
+        The example above would download version 1.4.5 of the WAR of a hypothetical user
+        service to the ``/tmp`` directory.
+
+        :param str full_name: Fully qualified name of the artifact to download.
+        :param str packaging: Type of packaging / file format used for the artifact
+        :param str version: Version of the artifact to download.
+        :param str destination: Directory to download the artifact to (using the file
+            name from its URL) or path of the file to download it to.
+        :param str descriptor: Tag to get a particular variant of a release.
+        :return: Path of the downloaded artifact
+        :rtype: str
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses
+            from Artifactory.
+        :raises stac.exceptions.ChecksumMismatchError: If the downloaded artifact does
+            not match the checksums sent by Artifactory.
+        :raises stac.exceptions.StacError: If the client can't download artifacts, e.g.
+            because it searches several repositories.
+        """
+        if self._downloader is None:
+            raise stac.exceptions.StacError(
+                "Client has no downloader configured, it can't download artifacts")
+
+        with stac.metrics.track_operation(self._metrics, 'download_version', full_name):
+            url = self.get_version_url(full_name, packaging, version, descriptor=descriptor)
+            path = destination
+            if os.path.isdir(destination):
+                path = os.path.join(destination, url.rsplit('/', 1)[-1])
+            return self._downloader.download(url, path).path
+
+    def _get_url_generator(self):
+        if self._urls is None:
+            raise stac.exceptions.StacError(
+                "Client has no URL generator configured, it can't generate URLs")
+        return self._urls
+
+    def _get_latest_version_or_error(self, full_name, remote):
+        import requests
+        try:
+            return self.get_latest_version(full_name, remote=remote)
+        except (stac.exceptions.NoMatchingVersionsError,
+                requests.exceptions.RequestException) as e:
+            return e
 
     def _get_latest_release_version(self, group, artifact, remote):
         return self._dao.get_most_recent_release(group, artifact, remote=remote)
@@ -275,57 +739,159 @@ class GenericArtifactoryClient(ArtifactoryClient):
             raise self._get_wrapped_exception(group, artifact)
         return snapshot_versions[0]
 
+    def _resolve(self, full_name, ranges, remote):
+        group, artifact = _parse_full_name(full_name)
+        index = self._get_version_index(group, artifact, remote)
+
+        result = collections.OrderedDict()
+        for spec, version_range in ranges.items():
+            version = index.latest(version_range)
+            result[spec] = version if version is not None else \
+                _new_no_matching_range_error(group, artifact, version_range)
+        return result
+
+    def _get_version_index(self, group, artifact, remote):
+        try:
+            if self._indexed:
+                index = self._dao.get_version_index(
+                    group, artifact, remote=remote, integration=self._is_integration)
+            else:
+                index = stac.version.VersionIndex(self._dao.get_most_recent_versions(
+                    group, artifact, _ALL_VERSIONS, remote=remote,
+                    integration=self._is_integration))
+        except Exception as e:  # pylint: disable=broad-except
+            if _is_not_found(e):
+                raise self._get_wrapped_exception(group, artifact, cause=e)
+            raise
+
+        if not index:
+            raise self._get_wrapped_exception(group, artifact)
+        return index
+
     def _get_wrapped_exception(self, group, artifact, cause=None):
-        version_type = 'integration' if self._is_integration else 'non-integration'
-        return stac.exceptions.NoMatchingVersionsError(
-            "No {version_type} versions of {group}.{name} could be found. It might be the "
-            "case that there have not been any {version_type} deployments done yet.".format(
-                version_type=version_type,
-                group=group,
-                name=artifact
-            ), cause=cause
-        )
+        return _new_no_matching_versions_error(group, artifact, self._is_integration, cause=cause)
 
 
 class MavenArtifactUrlGenerator(ArtifactUrlGenerator):
-    """URL generator for use with Maven repositories."""
+    """URL generator for use with Maven repositories.
+
+    The parts of the URL that are the same for every version of a group and artifact
+    combination are computed once and joined with the version, packaging, and
+    descriptor of each URL requested.
+
+    If a snapshot resolver is set, URLs of SNAPSHOT versions point at the unique
+    timestamped file of the most recent build (e.g. ``service-1.2.0-20160404.120000-3.jar``)
+    instead of ``service-1.2.0-SNAPSHOT.jar``. Generating them may make network requests.
+    """
 
-    def __init__(self, base, repo):
+    def __init__(self, base, repo, snapshot_resolver=None):
         """Create a new Maven URL generator, setting the Artifactory base URL and
         repository.
 
         :param str base: Base URL to the Artifactory installation.
         :param str repo: Name of the repository
+        :param stac.snapshot.SnapshotResolver snapshot_resolver: Optional resolver of
+            SNAPSHOT versions to the timestamped files deployed for them. Default is
+            to use the SNAPSHOT version in file names.
         """
         self._base = base
         self._repo = repo
+        self._snapshots = snapshot_resolver
+        self._parts = {}
 
     # pylint: disable=missing-docstring,too-many-arguments
     def get_url(self, group, artifact, packaging, version, descriptor):
-        group_path = group.replace('.', '/')
-
+        prefix, separator = self._parts.get((group, artifact)) or self._get_parts(group, artifact)
+        file_version = version
+        if self._snapshots is not None:
+            file_version = self._snapshots.resolve(group, artifact, version, packaging, descriptor)
         if descriptor is not None:
-            artifact_name = "{name}-{version}-{descriptor}.{ext}".format(
-                name=artifact,
-                version=version,
-                descriptor=descriptor,
-                ext=packaging
-            )
-        else:
-            artifact_name = "{name}-{version}.{ext}".format(
-                name=artifact,
-                version=version,
-                ext=packaging
-            )
-
-        return '/'.join([
-            self._base,
-            self._repo,
-            group_path,
-            artifact,
-            version,
-            artifact_name
-        ])
+            return ''.join(
+                (prefix, version, separator, file_version, '-', descriptor, '.', packaging))
+        return ''.join((prefix, version, separator, file_version, '.', packaging))
+
+    def get_urls(self, artifacts):
+        """Get the URLs of many versions of artifacts.
+
+        This is faster than calling :meth:`get_url` for each version.
+
+        :param iterable artifacts: Tuples of the group, artifact, packaging, version,
+            and descriptor (or ``None``) of each version to get the URL of.
+        :return: Generator of URLs, in the same order as the artifacts
+        """
+        cached = self._parts
+        join = ''.join
+        snapshots = self._snapshots
+        for group, artifact, packaging, version, descriptor in artifacts:
+            prefix, separator = cached.get((group, artifact)) or self._get_parts(group, artifact)
+            file_version = version
+            if snapshots is not None:
+                file_version = snapshots.resolve(group, artifact, version, packaging, descriptor)
+            if descriptor is not None:
+                yield join(
+                    (prefix, version, separator, file_version, '-', descriptor, '.', packaging))
+            else:
+                yield join((prefix, version, separator, file_version, '.', packaging))
+
+    def _get_parts(self, group, artifact):
+        if len(self._parts) >= _MAX_CACHED_URL_PARTS:
+            self._parts.clear()
+        # Everything before the first version and between the two versions in the URL
+        prefix = '/'.join([self._base, self._repo, group.replace('.', '/'), artifact, ''])
+        parts = self._parts[(group, artifact)] = (prefix, '/' + artifact + '-')
+        return parts
+
+
+def _new_no_matching_versions_error(group, artifact, is_integration, cause=None):
+    version_type = 'integration' if is_integration else 'non-integration'
+    return stac.exceptions.NoMatchingVersionsError(
+        "No {version_type} versions of {group}.{name} could be found. It might be the "
+        "case that there have not been any {version_type} deployments done yet.".format(
+            version_type=version_type,
+            group=group,
+            name=artifact
+        ), cause=cause
+    )
+
+
+def _new_no_matching_range_error(group, artifact, version_range):
+    return stac.exceptions.NoMatchingVersionsError(
+        "No versions of {group}.{name} within {range} could be found.".format(
+            group=group,
+            name=artifact,
+            range=version_range
+        )
+    )
+
+
+def _parse_ranges(version_ranges):
+    return collections.OrderedDict(
+        (spec, spec if isinstance(spec, stac.version.VersionRange)
+         else stac.version.parse_range(spec)) for spec in version_ranges)
+
+
+def _get_credentials_key(username, password):
+    # Identifies the credentials used without storing the password anywhere
+    if username is None and password is None:
+        return None
+    import hashlib
+    return hashlib.sha256(repr((username, password)).encode('utf-8')).hexdigest()
+
+
+def _is_not_found(error):
+    import requests
+    # pylint: disable=no-member
+    return (isinstance(error, requests.HTTPError) and error.response is not None and
+            error.response.status_code == requests.codes.not_found)
+
+
+def _parse_full_names(artifacts):
+    names = {}
+    for full_name, packaging, version, descriptor in artifacts:
+        parsed = names.get(full_name)
+        if parsed is None:
+            parsed = names[full_name] = _parse_full_name(full_name)
+        yield parsed[0], parsed[1], packaging, version, descriptor
 
 
 def _parse_full_name(full_name):
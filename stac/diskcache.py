@@ -0,0 +1,257 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.diskcache
+~~~~~~~~~~~~~~
+
+Persistent caching of the results of Artifactory API calls on local disk, shared
+by all processes on a host. It is typically not required for users of the Stac
+library to interact with this module directly, a persistent cache can be enabled
+via :func:`stac.client.new_maven_client`.
+"""
+
+from __future__ import absolute_import
+
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import stac.cache
+import stac.util
+
+# Seconds to wait for other processes to finish writing to the database
+DEFAULT_BUSY_TIMEOUT = 5.0
+
+# Last access times are only updated when older than this many seconds, so that
+# most reads don't need to write to the database.
+_ACCESS_RESOLUTION = 60.0
+
+# Entries are only counted once every this many writes, in between the count is kept
+# up to date with the entries added by this instance.
+_COUNT_INTERVAL = 100
+
+_SCHEMA = [
+    'CREATE TABLE IF NOT EXISTS entries ('
+    ' key TEXT PRIMARY KEY,'
+    ' value TEXT NOT NULL,'
+    ' expires REAL NOT NULL,'
+    ' accessed REAL NOT NULL)',
+    'CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)',
+    'CREATE INDEX IF NOT EXISTS entries_expires ON entries (expires)',
+]
+
+
+class SqliteCache(object):
+    """Bounded cache stored in a SQLite database that evicts the least recently
+    used entries when full and expires entries a fixed number of seconds after
+    they were stored.
+
+    The database uses write-ahead logging so any number of threads and processes
+    on the same host may read from and write to the same cache at once. Keys must
+    be tuples of JSON serializable values and values must be JSON serializable
+    (tuples are returned as lists). Keys are stored under a namespace (such as the
+    URL of the Artifactory installation and the repository) so that caches for
+    different repositories can share a database.
+
+    Usage is tracked to the nearest minute, so eviction of entries used within a
+    minute of each other is in no particular order. Entries added by other processes
+    are only accounted for every hundred writes, so a cache shared by several
+    processes may briefly hold more than its maximum number of entries.
+
+    Errors reading from or writing to the database (e.g. when it is locked by
+    another process for too long) are logged and treated as cache misses, they
+    are never raised by :meth:`get` or :meth:`set`.
+
+    Counters for the number of hits, misses, and evictions made by this instance
+    are maintained.
+
+    This class is thread safe.
+    """
+
+    _logger = stac.util.get_log()
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, path, ttl, max_size=stac.cache.DEFAULT_CACHE_SIZE, namespace=(),
+                 busy_timeout=DEFAULT_BUSY_TIMEOUT, clock=time.time):
+        """Open (creating if needed) the cache database and set the time to live and
+        maximum size of the cache.
+
+        :param str path: Path of the SQLite database file
+        :param float ttl: Number of seconds an entry is valid for after being stored.
+        :param int max_size: Maximum number of entries to store (across all namespaces)
+            before evicting the least recently used ones.
+        :param tuple namespace: JSON serializable values to prefix all keys with.
+        :param float busy_timeout: Seconds to wait for other processes to finish writing
+            before giving up.
+        :param callable clock: Function returning the current time in seconds. Only
+            useful for testing.
+        :raises ValueError: If the TTL is negative or the size is not positive
+        :raises sqlite3.Error: If the database could not be opened or created
+        """
+        if ttl < 0:
+            raise ValueError("Cache TTL must not be negative")
+        if max_size < 1:
+            raise ValueError("Cache size must be positive")
+
+        self._path = path
+        self._ttl = ttl
+        self._max_size = max_size
+        self._namespace = list(namespace)
+        self._busy_timeout = busy_timeout
+        self._clock = clock
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        # Number of entries as of the last count, plus those added since
+        self._count = None
+        self._uncounted_writes = 0
+
+        connection = self._get_connection()
+        with connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+
+    @property
+    def hits(self):
+        """Number of lookups that found a valid entry."""
+        return self._hits
+
+    @property
+    def misses(self):
+        """Number of lookups that did not find a valid entry."""
+        return self._misses
+
+    @property
+    def evictions(self):
+        """Number of entries removed because the cache was full."""
+        return self._evictions
+
+    def get(self, key, default=None):
+        """Get the value stored for a key if present and not expired.
+
+        :param tuple key: Key to look up
+        :param default: Value to return if there is no valid entry for the key
+        :return: The stored value or the default
+        """
+        now = self._clock()
+        encoded = self._encode_key(key)
+        try:
+            connection = self._get_connection()
+            row = connection.execute(
+                'SELECT value, accessed FROM entries WHERE key = ? AND expires > ?',
+                (encoded, now)).fetchone()
+            if row is not None and row[1] < now - _ACCESS_RESOLUTION:
+                with connection:
+                    connection.execute(
+                        'UPDATE entries SET accessed = ? WHERE key = ?', (now, encoded))
+        except sqlite3.Error as e:
+            self._logger.warning("Could not read from cache %s: %s", self._path, e)
+            row = None
+
+        with self._lock:
+            if row is None:
+                self._misses += 1
+                return default
+            self._hits += 1
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """Store a value for a key, evicting the least recently used entries if the
+        cache is full.
+
+        :param tuple key: Key to store the value under
+        :param value: JSON serializable value to store
+        """
+        now = self._clock()
+        encoded = self._encode_key(key)
+        try:
+            connection = self._get_connection()
+            with connection:
+                row = (json.dumps(value), now + self._ttl, now, encoded)
+                added = connection.execute(
+                    'UPDATE entries SET value = ?, expires = ?, accessed = ? WHERE key = ?',
+                    row).rowcount == 0
+                if added:
+                    connection.execute(
+                        'INSERT OR REPLACE INTO entries (value, expires, accessed, key) '
+                        'VALUES (?, ?, ?, ?)', row)
+
+                count = self._get_count(connection, added)
+                if count > self._max_size:
+                    removed = connection.execute(
+                        'DELETE FROM entries WHERE key IN '
+                        '(SELECT key FROM entries ORDER BY accessed LIMIT ?)',
+                        (count - self._max_size,)).rowcount
+                    with self._lock:
+                        self._evictions += removed
+                        if self._count is not None:
+                            self._count -= removed
+        except sqlite3.Error as e:
+            self._logger.warning("Could not write to cache %s: %s", self._path, e)
+
+    def purge(self):
+        """Remove all expired entries from the cache, in all namespaces.
+
+        :return: Number of entries removed
+        :rtype: int
+        """
+        connection = self._get_connection()
+        with connection:
+            removed = connection.execute(
+                'DELETE FROM entries WHERE expires <= ?', (self._clock(),)).rowcount
+        self._reset_count()
+        return removed
+
+    def clear(self):
+        """Remove all entries from the cache, in all namespaces. Counters are not reset."""
+        connection = self._get_connection()
+        with connection:
+            connection.execute('DELETE FROM entries')
+        self._reset_count()
+
+    def __len__(self):
+        return self._get_connection().execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    def _get_count(self, connection, added):
+        with self._lock:
+            if self._count is not None and self._uncounted_writes < _COUNT_INTERVAL:
+                self._uncounted_writes += 1
+                self._count += int(added)
+                return self._count
+
+        count = connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+        with self._lock:
+            self._count = count
+            self._uncounted_writes = 0
+        return count
+
+    def _reset_count(self):
+        with self._lock:
+            self._count = None
+
+    def _encode_key(self, key):
+        return json.dumps(self._namespace + list(key), separators=(',', ':'))
+
+    def _get_connection(self):
+        # Connections can't be shared between threads or with forked child processes
+        connection = getattr(self._local, 'connection', None)
+        if connection is not None and self._local.pid == os.getpid():
+            return connection
+
+        connection = sqlite3.connect(self._path, timeout=self._busy_timeout)
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        self._local.connection = connection
+        self._local.pid = os.getpid()
+        return connection
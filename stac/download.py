@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.download
+~~~~~~~~~~~~~
+
+Downloading of artifacts from Artifactory. It is typically not required for
+users of the Stac library to interact with this module directly, artifacts can
+be downloaded via :meth:`stac.client.GenericArtifactoryClient.download_version`.
+"""
+
+from __future__ import absolute_import
+
+import concurrent.futures
+import contextlib
+import hashlib
+import json
+import os
+import threading
+
+import stac.exceptions
+import stac.metrics
+import stac.util
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+DEFAULT_MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+
+# Suffix of the file recording which byte ranges of a segmented download are complete
+STATE_SUFFIX = '.segments'
+
+# Suffix of the file recording the validator of the artifact a streamed download is of
+VALIDATOR_SUFFIX = '.validator'
+
+# Checksums Artifactory sends with artifact downloads, strongest first.
+CHECKSUM_HEADERS = [
+    ('sha256', 'X-Checksum-Sha256'),
+    ('sha1', 'X-Checksum-Sha1'),
+    ('md5', 'X-Checksum-Md5'),
+]
+
+
+# pylint: disable=too-few-public-methods
+class DownloadResult(object):
+    """Location, size, and checksums of a downloaded artifact."""
+
+    def __init__(self, path, size, checksums):
+        #: Path the artifact was downloaded to.
+        self.path = path
+
+        #: Size of the artifact in bytes.
+        self.size = size
+
+        #: Mapping of checksum algorithm name (``sha256``, ``sha1``, ``md5``) to the
+        #: hex digest of the artifact computed using it.
+        self.checksums = checksums
+
+
+class ArtifactDownloader(object):
+    """Downloader that streams artifacts to disk in fixed size chunks, verifying
+    them against the checksums sent by Artifactory.
+
+    Memory use is constant regardless of the size of the artifact. Checksums are
+    computed as the artifact is written and compared to any ``X-Checksum-*``
+    headers in the response. Artifacts are written to a temporary file next to
+    the destination and only moved into place once they have been verified.
+
+    Large artifacts can optionally be downloaded as several byte ranges fetched
+    concurrently. This is only done when Artifactory advertises support for range
+    requests, otherwise the artifact is downloaded as a single stream.
+
+    Interrupted downloads are resumed from where they left off the next time the
+    same artifact is downloaded to the same path. Downloads are only resumed if
+    Artifactory sent a strong validator (an ``ETag`` or ``Last-Modified`` header)
+    for the artifact, which is sent in an ``If-Range`` header when resuming so the
+    artifact is downloaded from the start if it has changed meanwhile.
+
+    This class is thread safe. Concurrent downloads to the same path are made one at
+    a time, since they share a temporary file.
+    """
+
+    _logger = stac.util.get_log()
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, session, chunk_size=DEFAULT_CHUNK_SIZE, max_segments=1,
+                 min_segment_size=DEFAULT_MIN_SEGMENT_SIZE, store=None, timeout=None,
+                 retry_policy=None, metrics=None):
+        """Set the session for making requests and size of chunks to read.
+
+        :param requests.Session session: Session for making HTTP requests to
+            Artifactory. This session should be configured with any required
+            credentials for downloading artifacts.
+        :param int chunk_size: Number of bytes to read and write at a time.
+        :param int max_segments: Maximum number of byte ranges of an artifact to fetch
+            concurrently. Default is to download artifacts as a single stream.
+        :param int min_segment_size: Minimum number of bytes in each byte range when
+            downloading an artifact as multiple ranges.
+        :param stac.store.ArtifactStore store: Optional local store of artifacts. If
+            set, artifacts are looked up in the store by the SHA-1 checksum Artifactory
+            reports for them before being downloaded, and are added to the store after
+            being downloaded.
+        :param float|tuple timeout: Timeout for connecting and for each read in seconds,
+            or a tuple of the connect and read timeouts, as accepted by requests. Default
+            is to wait forever.
+        :param stac.retry.RetryPolicy retry_policy: Optional policy for retrying requests
+            that fail because of transient errors. Failures part way through a download
+            are retried by resuming the download. Default is not to retry requests.
+        :param stac.metrics.MetricsSink metrics: Optional sink to record the count, duration,
+            and size of requests to. Default is not to record metrics.
+        :raises ValueError: If the maximum number of segments is not positive
+        """
+        if max_segments < 1:
+            raise ValueError("Maximum number of segments must be positive")
+
+        self._session = session
+        self._chunk_size = chunk_size
+        self._max_segments = max_segments
+        self._min_segment_size = min_segment_size
+        self._store = store
+        self._timeout = timeout
+        self._retry_policy = retry_policy
+        self._metrics = stac.metrics.get_sink(metrics)
+        # Lock and number of downloads using it for each path being downloaded to
+        self._path_locks = {}
+        self._lock = threading.Lock()
+
+    def download(self, url, path):
+        """Download the artifact at the given URL to the given path.
+
+        :param str url: URL of the artifact to download
+        :param str path: Path of the file to write the artifact to. Any existing
+            file will be replaced.
+        :return: The location, size, and checksums of the downloaded artifact
+        :rtype: DownloadResult
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses
+            from Artifactory.
+        :raises stac.exceptions.DownloadError: If the artifact could not be completely
+            downloaded.
+        :raises stac.exceptions.ChecksumMismatchError: If the downloaded artifact
+            does not match a checksum sent by Artifactory.
+        """
+        with self._lock_path(path):
+            return self._download(url, path)
+
+    @contextlib.contextmanager
+    def _lock_path(self, path):
+        key = os.path.abspath(path)
+        with self._lock:
+            lock, users = self._path_locks.get(key) or (threading.Lock(), 0)
+            self._path_locks[key] = (lock, users + 1)
+
+        try:
+            with lock:
+                yield
+        finally:
+            with self._lock:
+                lock, users = self._path_locks[key]
+                if users == 1:
+                    del self._path_locks[key]
+                else:
+                    self._path_locks[key] = (lock, users - 1)
+
+    def _download(self, url, path):
+        headers = None
+        if self._store is not None or self._max_segments > 1:
+            headers = self._call(self._get_headers, url)
+
+        if self._store is not None:
+            sha1 = headers.get('X-Checksum-Sha1')
+            if sha1 and self._store.fetch(sha1, path):
+                self._logger.debug("Using stored copy of %s for %s", url, path)
+                return DownloadResult(path, os.path.getsize(path), {'sha1': sha1.lower()})
+
+        self._logger.debug("Downloading %s to %s", url, path)
+        tmp_path = path + '.part'
+
+        segments = None
+        if self._max_segments > 1:
+            segments = self._get_segments(url, headers)
+
+        if segments:
+            self._download_segments(url, tmp_path, segments, _get_validator(headers))
+            size, checksums = _hash_file(tmp_path)
+        else:
+            headers, size, checksums = self._call(self._download_stream, url, tmp_path)
+
+        try:
+            _verify_checksums(url, headers, checksums)
+        except stac.exceptions.ChecksumMismatchError:
+            os.remove(tmp_path)
+            raise
+
+        stac.util.replace_file(tmp_path, path)
+        if self._store is not None:
+            self._store.put(checksums['sha1'], path)
+        return DownloadResult(path, size, checksums)
+
+    def _call(self, func, *args):
+        if self._retry_policy is None:
+            return func(*args)
+        return self._retry_policy.call(func, *args)
+
+    def _get_headers(self, url):
+        with stac.metrics.track_request(self._metrics, 'download_info') as request:
+            response = request.response = self._session.head(
+                url, allow_redirects=True, timeout=self._timeout)
+            response.raise_for_status()
+            return response.headers
+
+    def _download_stream(self, url, tmp_path):
+        hashes = _new_hashes()
+        offset = 0
+        validator = _load_validator(tmp_path)
+
+        if os.path.exists(tmp_path + STATE_SUFFIX):
+            # Partial segmented download, may contain holes so it can't be appended to
+            _remove_partial(tmp_path)
+        elif validator is not None and os.path.exists(tmp_path):
+            offset = _update_hashes(hashes, tmp_path)
+
+        with stac.metrics.track_request(self._metrics, 'download') as request:
+            response = None
+            if offset:
+                self._logger.debug("Resuming download of %s from byte %s", url, offset)
+                headers = {'Range': 'bytes={0}-'.format(offset), 'If-Range': validator}
+                response = self._session.get(
+                    url, stream=True, headers=headers, timeout=self._timeout)
+                if response.status_code != 206:
+                    # Artifact changed, or range not supported or not satisfiable, start
+                    # over from the beginning
+                    response.close()
+                    response = None
+                    hashes = _new_hashes()
+                    offset = 0
+
+            if response is None:
+                response = self._session.get(url, stream=True, timeout=self._timeout)
+
+            request.response = response
+            size = offset
+            try:
+                response.raise_for_status()
+                if not offset:
+                    _save_validator(tmp_path, _get_validator(response.headers))
+                with open(tmp_path, 'ab' if offset else 'wb') as handle:
+                    for chunk in request.count(response.iter_content(chunk_size=self._chunk_size)):
+                        handle.write(chunk)
+                        size += len(chunk)
+                        for digest in hashes.values():
+                            digest.update(chunk)
+            finally:
+                response.close()
+
+        _save_validator(tmp_path, None)
+        checksums = dict((name, digest.hexdigest()) for name, digest in hashes.items())
+        return response.headers, size, checksums
+
+    def _get_segments(self, url, headers):
+        accept_ranges = headers.get('Accept-Ranges', '')
+        length = headers.get('Content-Length')
+        if accept_ranges.lower() != 'bytes' or not length:
+            self._logger.debug("Range requests not supported for %s, using a single stream", url)
+            return None
+
+        size = int(length)
+        count = min(self._max_segments, size // self._min_segment_size)
+        if count < 2:
+            return None
+
+        step = -(-size // count)
+        return [(start, min(start + step, size) - 1) for start in range(0, size, step)]
+
+    def _download_segments(self, url, tmp_path, segments, validator):
+        state_path = tmp_path + STATE_SUFFIX
+        size = segments[-1][1] + 1
+        done = _load_segment_state(state_path, tmp_path, size, len(segments), validator)
+        # Any partial streamed download is overwritten
+        _save_validator(tmp_path, None)
+
+        if not done:
+            with open(tmp_path, 'wb') as handle:
+                handle.truncate(size)
+
+        remaining = [segment for i, segment in enumerate(segments) if i not in done]
+        self._logger.debug(
+            "Downloading %s of %s segments of %s", len(remaining), len(segments), url)
+
+        lock = threading.Lock()
+
+        def fetch(index, segment):
+            self._call(self._download_segment, url, tmp_path, segment, validator)
+            with lock:
+                done.add(index)
+                _save_segment_state(state_path, size, len(segments), done, validator)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=len(remaining) or 1) as executor:
+            futures = [
+                executor.submit(fetch, i, segment)
+                for i, segment in enumerate(segments) if i not in done]
+            for future in futures:
+                future.result()
+
+        os.remove(state_path)
+
+    def _download_segment(self, url, tmp_path, segment, validator):
+        start, end = segment
+        with stac.metrics.track_request(self._metrics, 'download') as request:
+            headers = {'Range': 'bytes={0}-{1}'.format(start, end)}
+            if validator is not None:
+                # Artifactory sends the whole artifact if it changed since the first segment
+                headers['If-Range'] = validator
+            response = request.response = self._session.get(
+                url, stream=True, headers=headers, timeout=self._timeout)
+            try:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise stac.exceptions.DownloadError(
+                        "Range request for {url} was not honored (status {status})".format(
+                            url=url, status=response.status_code))
+
+                written = 0
+                with open(tmp_path, 'r+b') as handle:
+                    handle.seek(start)
+                    for chunk in request.count(response.iter_content(chunk_size=self._chunk_size)):
+                        handle.write(chunk)
+                        written += len(chunk)
+            finally:
+                response.close()
+
+        if written != end - start + 1:
+            raise stac.exceptions.DownloadError(
+                "Expected {expected} bytes of {url} starting at {start} but got {actual}".format(
+                    expected=end - start + 1, url=url, start=start, actual=written))
+
+
+def _new_hashes():
+    return dict((name, hashlib.new(name)) for name, _ in CHECKSUM_HEADERS)
+
+
+def _update_hashes(hashes, path):
+    size = 0
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(DEFAULT_CHUNK_SIZE), b''):
+            size += len(chunk)
+            for digest in hashes.values():
+                digest.update(chunk)
+    return size
+
+
+def _hash_file(path):
+    hashes = _new_hashes()
+    size = _update_hashes(hashes, path)
+    return size, dict((name, digest.hexdigest()) for name, digest in hashes.items())
+
+
+def _get_validator(headers):
+    # Strong validator of the artifact, for If-Range requests. Weak ETags can't be used.
+    etag = headers.get('ETag')
+    if etag and not etag.startswith('W/'):
+        return etag
+    return headers.get('Last-Modified') or None
+
+
+def _load_validator(tmp_path):
+    try:
+        with open(tmp_path + VALIDATOR_SUFFIX, 'r') as handle:
+            return handle.read() or None
+    except (IOError, OSError):
+        return None
+
+
+def _save_validator(tmp_path, validator):
+    # Partial downloads without a validator are never resumed
+    validator_path = tmp_path + VALIDATOR_SUFFIX
+    if validator is not None:
+        with open(validator_path, 'w') as handle:
+            handle.write(validator)
+    elif os.path.exists(validator_path):
+        os.remove(validator_path)
+
+
+def _load_segment_state(state_path, tmp_path, size, count, validator):
+    try:
+        with open(state_path, 'r') as handle:
+            state = json.load(handle)
+    except (IOError, OSError, ValueError):
+        return set()
+
+    if state.get('size') != size or state.get('segments') != count:
+        return set()
+    if validator is None or state.get('validator') != validator:
+        # Can't tell if the artifact is the same one the segments are from
+        return set()
+    if not os.path.exists(tmp_path) or os.path.getsize(tmp_path) != size:
+        return set()
+    return set(state.get('done', []))
+
+
+def _save_segment_state(state_path, size, count, done, validator):
+    with open(state_path, 'w') as handle:
+        json.dump({'size': size, 'segments': count, 'done': sorted(done),
+                   'validator': validator}, handle)
+
+
+def _remove_partial(tmp_path):
+    for partial in (tmp_path, tmp_path + STATE_SUFFIX, tmp_path + VALIDATOR_SUFFIX):
+        if os.path.exists(partial):
+            os.remove(partial)
+
+
+def _verify_checksums(url, headers, checksums):
+    for name, header in CHECKSUM_HEADERS:
+        expected = headers.get(header)
+        if expected and expected.lower() != checksums[name]:
+            raise stac.exceptions.ChecksumMismatchError(
+                "Downloaded artifact {url} has {name} checksum {actual} but expected "
+                "{expected}".format(
+                    url=url, name=name, actual=checksums[name], expected=expected),
+                algorithm=name, expected=expected, actual=checksums[name])
@@ -18,7 +18,9 @@ from __future__ import print_function, division
 
 __all__ = [
     'StacError',
-    'NoMatchingVersionsError'
+    'NoMatchingVersionsError',
+    'DownloadError',
+    'ChecksumMismatchError'
 ]
 
 
@@ -39,3 +41,20 @@ class NoMatchingVersionsError(StacError):
         if self.cause is not None:
             return "{0} {1}".format(super(NoMatchingVersionsError, self).__str__(), self.cause)
         return super(NoMatchingVersionsError, self).__str__()
+
+
+class DownloadError(StacError):
+    """Raised when an artifact could not be downloaded completely"""
+
+
+class ChecksumMismatchError(DownloadError):
+    """Raised when a downloaded artifact does not match the checksum sent by Artifactory"""
+
+    def __init__(self, *args, **kwargs):
+        #: Name of the checksum algorithm that did not match, e.g. "sha1".
+        self.algorithm = kwargs.pop("algorithm", None)
+        #: Checksum sent by Artifactory.
+        self.expected = kwargs.pop("expected", None)
+        #: Checksum of the downloaded artifact.
+        self.actual = kwargs.pop("actual", None)
+        super(ChecksumMismatchError, self).__init__(*args, **kwargs)
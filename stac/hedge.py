@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.hedge
+~~~~~~~~~~
+
+Hedging of slow requests to Artifactory to reduce tail latency. It is typically
+not required for users of the Stac library to interact with this module directly,
+a hedging policy can be passed to :func:`stac.client.new_maven_client`.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import concurrent.futures
+import threading
+import time
+
+import stac.util
+
+DEFAULT_DELAY = 0.5
+
+DEFAULT_WINDOW = 100
+
+DEFAULT_MAX_RATE = 0.05
+
+DEFAULT_MAX_WORKERS = 20
+
+# Number of latency samples required before a percentile is used instead of the fixed delay
+_MIN_SAMPLES = 10
+
+# Maximum number of hedges that can be sent in a burst after a period without any
+_MAX_TOKENS = 10.0
+
+
+class HedgingPolicy(object):
+    """Policy for sending a duplicate ("hedged") request when a request has not
+    completed after some delay, using the result of whichever completes first.
+
+    The delay is either fixed or a percentile of the latency of recent requests.
+    For example, using the 95th percentile means a duplicate request is only sent
+    for the slowest 5% of requests. Latency is measured from the start of each
+    first request until it completes, whether or not it was hedged.
+
+    To avoid adding too much load to Artifactory, the number of hedged requests
+    is limited to a fraction of all requests made using the policy. A count of the
+    number of hedged requests is maintained.
+
+    Requests are made by a pool of threads owned by the policy. Requests that lose
+    are cancelled if they have not started yet, otherwise their results are discarded
+    when they complete.
+
+    This class is thread safe.
+    """
+
+    _logger = stac.util.get_log()
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, delay=DEFAULT_DELAY, percentile=None, window=DEFAULT_WINDOW,
+                 max_rate=DEFAULT_MAX_RATE, max_workers=DEFAULT_MAX_WORKERS, clock=time.time):
+        """Set how long to wait before hedging a request and how often requests may
+        be hedged.
+
+        :param float delay: Seconds to wait for a request to complete before sending a
+            duplicate request. If a percentile is given, this is only used until enough
+            requests have been made to compute it.
+        :param float percentile: Optional percentile (between 0 and 100) of the latency of
+            recent requests to wait for before sending a duplicate request.
+        :param int window: Number of recent requests to compute the latency percentile from.
+        :param float max_rate: Maximum fraction of requests (between 0 and 1) that may be
+            hedged.
+        :param int max_workers: Maximum number of requests to make concurrently. This should
+            be at least twice the number of threads using the policy.
+        :param callable clock: Function returning the current time in seconds. Only useful
+            for testing.
+        :raises ValueError: If the delay is negative, the percentile or max rate are out of
+            range, or the window is not positive
+        """
+        if delay < 0:
+            raise ValueError("Hedge delay must not be negative")
+        if percentile is not None and not 0 < percentile <= 100:
+            raise ValueError("Hedge percentile must be between 0 and 100")
+        if window < 1:
+            raise ValueError("Hedge window must be positive")
+        if not 0 <= max_rate <= 1:
+            raise ValueError("Hedge rate must be between 0 and 1")
+
+        self._delay = delay
+        self._percentile = percentile
+        self._max_rate = max_rate
+        self._clock = clock
+        self._latencies = collections.deque(maxlen=window)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._tokens = 0.0
+        self._hedges = 0
+
+    @property
+    def hedges(self):
+        """Number of duplicate requests sent using this policy."""
+        return self._hedges
+
+    @property
+    def delay(self):
+        """Seconds the next request will be waited for before sending a duplicate."""
+        with self._lock:
+            if self._percentile is None or len(self._latencies) < _MIN_SAMPLES:
+                return self._delay
+
+            latencies = sorted(self._latencies)
+        index = max(0, int(round(len(latencies) * self._percentile / 100.0)) - 1)
+        return latencies[index]
+
+    def call(self, func, *args, **kwargs):
+        """Call a function making an idempotent request, calling it again concurrently
+        if it doesn't complete quickly enough and returning the first successful result.
+
+        :param callable func: Function to call
+        :param args: Positional arguments to pass to the function
+        :param kwargs: Keyword arguments to pass to the function
+        :return: The result of the function
+        :raises Exception: The first error raised by the function if no call succeeded
+        """
+        start = self._clock()
+        with self._lock:
+            # Each request earns a fraction of a hedge, each hedge spends a whole one
+            self._tokens = min(_MAX_TOKENS, self._tokens + self._max_rate)
+
+        primary = self._executor.submit(self._timed, start, func, *args, **kwargs)
+
+        done, _ = concurrent.futures.wait([primary], timeout=self.delay)
+        if done or not self._acquire():
+            return primary.result()
+
+        self._logger.debug(
+            "Request not complete after %.3fs, sending hedged request", self._clock() - start)
+        hedge = self._executor.submit(func, *args, **kwargs)
+
+        pending = set([primary, hedge])
+        error = None
+        while pending:
+            done, pending = concurrent.futures.wait(
+                pending, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None:
+                    for other in pending:
+                        other.cancel()
+                    return future.result()
+                if error is None:
+                    error = future.exception()
+
+        raise error
+
+    def _timed(self, start, func, *args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            latency = self._clock() - start
+            with self._lock:
+                self._latencies.append(latency)
+
+    def _acquire(self):
+        with self._lock:
+            if self._tokens < 1:
+                return False
+            self._tokens -= 1
+            self._hedges += 1
+            return True
@@ -17,10 +17,77 @@ with this module directly.
 """
 
 from __future__ import absolute_import
-# pylint: disable=import-error,no-name-in-module
-import distutils.version
+import codecs
+import json
+import socket
+import requests
+import requests.adapters
 import stac.exceptions
+import stac.metrics
 import stac.util
+import stac.version
+
+_STREAM_CHUNK_SIZE = 16 * 1024
+
+# Seconds a connection is idle before TCP keep-alive probes are sent, the interval
+# between probes, and the number of unanswered probes before the connection is dropped.
+TCP_KEEPALIVE_IDLE = 60
+TCP_KEEPALIVE_INTERVAL = 15
+TCP_KEEPALIVE_COUNT = 4
+
+
+# pylint: disable=too-many-arguments
+def new_session(username=None, password=None, pool_connections=requests.adapters.DEFAULT_POOLSIZE,
+                pool_maxsize=requests.adapters.DEFAULT_POOLSIZE, tcp_keepalive=False):
+    """Get a new :class:`requests.Session` configured for making many requests
+    to Artifactory, optionally using the provided authentication.
+
+    :param str username: Optional username for authentication
+    :param str password: Optional password for authentication
+    :param int pool_connections: Number of hosts to keep connection pools for.
+    :param int pool_maxsize: Maximum number of connections to keep open to each host.
+        This should be at least the number of requests that will be made concurrently,
+        otherwise connections will be discarded and re-established.
+    :param bool tcp_keepalive: Should TCP keep-alive probes be sent on idle connections?
+        This allows connections dropped by firewalls or load balancers to be detected.
+    :return: New session for making HTTP requests
+    :rtype: requests.Session
+    """
+    session = requests.Session()
+    if username is not None and password is not None:
+        session.auth = (username, password)
+
+    socket_options = _get_keepalive_socket_options() if tcp_keepalive else None
+    adapter = _SessionAdapter(
+        socket_options=socket_options, pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+
+class _SessionAdapter(requests.adapters.HTTPAdapter):
+    # Adapter that sets extra options on each socket it creates
+
+    def __init__(self, socket_options=None, **kwargs):
+        self._socket_options = socket_options
+        super(_SessionAdapter, self).__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        if self._socket_options is not None:
+            kwargs['socket_options'] = self._socket_options
+        super(_SessionAdapter, self).init_poolmanager(*args, **kwargs)
+
+
+def _get_keepalive_socket_options():
+    # Keep the default options (i.e. disabling Nagle's algorithm) and add keep-alive
+    options = [(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+               (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+    for name, value in (('TCP_KEEPIDLE', TCP_KEEPALIVE_IDLE),
+                        ('TCP_KEEPINTVL', TCP_KEEPALIVE_INTERVAL),
+                        ('TCP_KEEPCNT', TCP_KEEPALIVE_COUNT)):
+        if hasattr(socket, name):
+            options.append((socket.IPPROTO_TCP, getattr(socket, name), value))
+    return options
 
 
 class VersionApiDao(object):
@@ -28,11 +95,18 @@ class VersionApiDao(object):
 
     This DAO interacts with the Artifactory API over HTTP or HTTPS.
 
+    Optionally, responses from the version search API can be parsed incrementally
+    as they are received, keeping only the most recent versions found so far. This
+    makes memory use depend on the number of versions requested instead of the total
+    number of versions of an artifact.
+
     This class is thread safe.
     """
     _logger = stac.util.get_log()
 
-    def __init__(self, session, base_url, repo):
+    # pylint: disable=too-many-arguments
+    def __init__(self, session, base_url, repo, streaming=False, timeout=None, retry_policy=None,
+                 hedging_policy=None, metrics=None):
         """Set the factory for requests session and factory for API urls.
 
         :param requests.Session session: Session for making HTTP requests to
@@ -40,10 +114,27 @@ class VersionApiDao(object):
             credentials for accessing the API.
         :param str|unicode base_url: Base URL to the Artifactory installation
         :param str|unicode repo: Name of repository to search against.
+        :param bool streaming: Should responses from the version search API be parsed
+            incrementally as they are received? Default is false.
+        :param float|tuple timeout: Timeout for each request in seconds, or a tuple of
+            the connect and read timeouts, as accepted by requests. Default is to wait
+            forever.
+        :param stac.retry.RetryPolicy retry_policy: Optional policy for retrying requests
+            that fail because of transient errors. Default is not to retry requests.
+        :param stac.hedge.HedgingPolicy hedging_policy: Optional policy for sending duplicate
+            requests when requests are slow to complete. Each attempt made by the retry policy
+            is hedged separately. Default is not to hedge requests.
+        :param stac.metrics.MetricsSink metrics: Optional sink to record the count, duration,
+            and size of requests to. Default is not to record metrics.
         """
         self._session = session
         self._base_url = base_url
         self._repo = repo
+        self._streaming = streaming
+        self._timeout = timeout
+        self._retry_policy = retry_policy
+        self._hedging_policy = hedging_policy
+        self._metrics = stac.metrics.get_sink(metrics)
 
     def get_most_recent_release(self, group, artifact, remote=False):
         """Get the version number of the most recent release (non-integration version)
@@ -62,15 +153,15 @@ class VersionApiDao(object):
         params = {'g': group, 'a': artifact, 'repos': self._repo, 'remote': int(remote)}
         self._logger.debug("Using latest version API at %s - params %s", url, params)
 
-        response = self._session.get(url, params=params)
-        response.raise_for_status()
-        return response.text.strip()
+        return self._call(self._get_text, url, params)
 
     def get_most_recent_versions(self, group, artifact, limit, remote=False, integration=False):
         """Get a list of the version numbers of the most recent artifacts (integration
         or non-integration), ordered by the version number, for a particular group and
         artifact combination.
 
+        Version numbers are ordered the same way Maven orders them, see :mod:`stac.version`.
+
         :param str group: Group of the artifact to get versions of
         :param str artifact: Name of the artifact to get versions of
         :param int limit: Fetch only this many of the most recent releases
@@ -91,12 +182,414 @@ class VersionApiDao(object):
         params = {'g': group, 'a': artifact, 'repos': self._repo, 'remote': int(remote)}
         self._logger.debug("Using all version API at %s - params %s", url, params)
 
-        response = self._session.get(url, params=params)
-        response.raise_for_status()
+        return self._call(self._get_versions, url, params, limit, integration)
+
+    def get_versions_since(self, group, artifact, since=None, remote=False, integration=False):
+        """Get the version numbers of all artifacts (integration or non-integration) for a
+        particular group and artifact combination, in no particular order.
+
+        The version search API can't filter by deployment time, so all versions are
+        always returned, whatever ``since`` is. This is indicated by returning ``None``
+        as the watermark. See :meth:`AqlVersionDao.get_versions_since`.
+
+        :param str group: Group of the artifact to get versions of
+        :param str artifact: Name of the artifact to get versions of
+        :param since: Ignored
+        :param bool remote: Should remote repositories be searched to find the
+            versions? Note this can make the request much slower. Default is false.
+        :param bool integration: If true, fetch only "integration versions", otherwise
+            fetch only non-integration versions.
+        :return: Tuple of all version numbers and ``None``
+        :rtype: tuple
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses
+            from the Artifactory API.
+        """
+        url = self._base_url + '/api/search/versions'
+        params = {'g': group, 'a': artifact, 'repos': self._repo, 'remote': int(remote)}
+        self._logger.debug("Using all version API at %s - params %s", url, params)
+
+        return self._call(self._get_versions, url, params, None, integration), None
+
+    def get_most_recent_version_if_changed(self, group, artifact, validators=None, remote=False,
+                                           integration=False):
+        """Get the version number of the most recent release (or integration version) of a
+        particular group and artifact combination, unless it hasn't changed since a previous
+        call.
+
+        Conditional requests are made using the ``ETag`` and ``Last-Modified`` headers of the
+        previous response, when Artifactory sends them, so that an unchanged version costs
+        only an empty ``304 Not Modified`` response. When Artifactory doesn't send them, the
+        full response is fetched every time.
+
+        :param str group: Group of the artifact to get the version of
+        :param str artifact: Name of the artifact to get the version of
+        :param dict validators: Validators returned by the previous call for this artifact,
+            or ``None`` for the first call.
+        :param bool remote: Should remote repositories be searched to find the latest
+            version? Note this can make the request much slower. Default is false.
+        :param bool integration: If true, get the most recent integration version, otherwise
+            get the most recent release.
+        :return: ``None`` if the version hasn't changed, otherwise a tuple of the version
+            number (or ``None`` if there are no matching versions) and the validators to pass
+            to the next call.
+        :rtype: tuple
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses
+            from the Artifactory API.
+        """
+        params = {'g': group, 'a': artifact, 'repos': self._repo, 'remote': int(remote)}
+        if not integration:
+            url = self._base_url + '/api/search/latestVersion'
+            endpoint = 'latestVersion'
+            parse = _parse_text
+        else:
+            url = self._base_url + '/api/search/versions'
+            endpoint = 'versions'
+            parse = _parse_most_recent_integration
+        self._logger.debug("Using %s API at %s - params %s - validators %s",
+                           endpoint, url, params, validators)
+
+        return self._call(self._get_if_changed, endpoint, url, params, validators or {}, parse)
+
+    def _call(self, func, *args):
+        if self._hedging_policy is not None:
+            args = (func,) + args
+            func = self._hedging_policy.call
+        if self._retry_policy is None:
+            return func(*args)
+        return self._retry_policy.call(func, *args)
+
+    def _get_text(self, url, params):
+        with stac.metrics.track_request(self._metrics, 'latestVersion') as request:
+            response = request.response = self._session.get(
+                url, params=params, timeout=self._timeout)
+            response.raise_for_status()
+            request.received = _get_size(response)
+            return response.text.strip()
+
+    def _get_if_changed(self, endpoint, url, params, validators, parse):
+        with stac.metrics.track_request(self._metrics, endpoint) as request:
+            response = request.response = self._session.get(
+                url, params=params, headers=validators, timeout=self._timeout)
+            if response.status_code == requests.codes.not_modified:  # pylint: disable=no-member
+                return None
+            response.raise_for_status()
+            request.received = _get_size(response)
+            return parse(response), _get_validators(response)
+
+    def _get_versions(self, url, params, limit, integration):
+        if not self._streaming:
+            with stac.metrics.track_request(self._metrics, 'versions') as request:
+                response = request.response = self._session.get(
+                    url, params=params, timeout=self._timeout)
+                response.raise_for_status()
+                request.received = _get_size(response)
+                return _select_most_recent_versions(response.json()['results'], limit, integration)
+
+        with stac.metrics.track_request(self._metrics, 'versions') as request:
+            response = request.response = self._session.get(
+                url, params=params, stream=True, timeout=self._timeout)
+            try:
+                response.raise_for_status()
+                chunks = request.count(response.iter_content(chunk_size=_STREAM_CHUNK_SIZE))
+                results = _iter_json_array(_iter_text(chunks, response.encoding), 'results')
+                return _select_most_recent_versions(results, limit, integration)
+            finally:
+                response.close()
+
+
+class AqlVersionDao(object):
+    """HTTP DAO to get one or multiple versions of a particular artifact using the
+    Artifactory Query Language (AQL) search API.
+
+    Unlike :class:`VersionApiDao`, filtering by repository, artifact, and type of
+    version (integration or not) as well as limiting the number of results is done
+    by Artifactory. Only the requested number of versions are sent in responses,
+    no matter how many versions of an artifact exist.
+
+    Artifactory cannot sort versions by version number, so the ``limit`` most
+    recently deployed versions are selected by Artifactory and then ordered by
+    version number. For artifacts that have releases deployed out of order (e.g.
+    a fix to an old version deployed after a newer version) this may differ from
+    the versions selected by :class:`VersionApiDao`. The most recent release is
+    always found using the latest version search API of the fallback DAO, which
+    Artifactory answers with a single version number, so it is the highest release
+    rather than the most recently deployed one. Integration versions are all fetched
+    and then ordered by version number, so the highest are always selected.
+
+    AQL cannot search remote repositories. Requests that include remote repositories
+    are made using a :class:`VersionApiDao` instead.
+
+    This class is thread safe.
+    """
+    _logger = stac.util.get_log()
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, session, base_url, repo, fallback=None, timeout=None, retry_policy=None,
+                 hedging_policy=None, metrics=None):
+        """Set the session for making requests, the Artifactory location, and a DAO
+        to use for searching remote repositories.
+
+        :param requests.Session session: Session for making HTTP requests to
+            the Artifactory API. This session should be configured with any required
+            credentials for accessing the API.
+        :param str|unicode base_url: Base URL to the Artifactory installation
+        :param str|unicode repo: Name of repository to search against.
+        :param fallback: DAO to use when remote repositories should be searched. Default
+            is a :class:`VersionApiDao` using the same session, URL, repository, timeout,
+            and retry policy.
+        :param float|tuple timeout: Timeout for each request in seconds, or a tuple of
+            the connect and read timeouts, as accepted by requests. Default is to wait
+            forever.
+        :param stac.retry.RetryPolicy retry_policy: Optional policy for retrying requests
+            made using the default fallback DAO. AQL searches are made using POST requests
+            and so are never retried.
+        :param stac.hedge.HedgingPolicy hedging_policy: Optional policy for hedging requests
+            made using the default fallback DAO. AQL searches are never hedged.
+        :param stac.metrics.MetricsSink metrics: Optional sink to record the count, duration,
+            and size of requests to, including those made by the default fallback DAO. Default
+            is not to record metrics.
+        """
+        self._session = session
+        self._base_url = base_url
+        self._repo = repo
+        self._timeout = timeout
+        self._metrics = stac.metrics.get_sink(metrics)
+        self._fallback = fallback if fallback is not None else VersionApiDao(
+            session, base_url, repo, timeout=timeout, retry_policy=retry_policy,
+            hedging_policy=hedging_policy, metrics=metrics)
+
+    def get_most_recent_release(self, group, artifact, remote=False):
+        """Get the version number of the most recent release (non-integration version)
+        of a particular group and artifact combination, using the fallback DAO.
+
+        See :meth:`VersionApiDao.get_most_recent_release`.
+        """
+        # AQL can only select the most recently deployed release, not the highest one
+        return self._fallback.get_most_recent_release(group, artifact, remote=remote)
+
+    def get_most_recent_versions(self, group, artifact, limit, remote=False, integration=False):
+        """Get a list of the version numbers of the most recently deployed artifacts
+        (non-integration) or the highest integration versions, ordered by the version
+        number, for a particular group and artifact combination.
+
+        :param str group: Group of the artifact to get versions of
+        :param str artifact: Name of the artifact to get versions of
+        :param int limit: Fetch only this many of the most recent releases
+        :param bool remote: Should remote repositories be searched to find the latest
+            versions? Note this can make the request much slower. Default is false.
+        :param bool integration: If true, fetch only "integration versions", otherwise
+            fetch only non-integration versions.
+        :return: Version numbers of the most recent artifacts
+        :rtype: list
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses
+            from the Artifactory API.
+        :raises ValueError: If limit is 0 or negative.
+        """
+        if limit < 1:
+            raise ValueError("Releases limit must be positive")
+
+        if remote:
+            return self._fallback.get_most_recent_versions(
+                group, artifact, limit, remote=remote, integration=integration)
+
+        return self._find_versions(group, artifact, limit, integration)
+
+    def get_versions_since(self, group, artifact, since=None, remote=False, integration=False):
+        """Get the version numbers of artifacts (integration or non-integration) deployed
+        since a previous call for a particular group and artifact combination, in no
+        particular order.
+
+        Along with the versions, a watermark (the deployment time of the most recently
+        deployed version) is returned to pass as ``since`` to the next call. Versions
+        deployed at exactly the watermark are returned again by the next call, since
+        more of them might have been deployed after the previous call. Versions that
+        have been deleted are not reported.
+
+        When searching remote repositories, the fallback DAO is used instead, which may
+        return all versions and a watermark of ``None``.
+
+        :param str group: Group of the artifact to get versions of
+        :param str artifact: Name of the artifact to get versions of
+        :param str since: Watermark returned by the previous call, or ``None`` to get
+            all versions.
+        :param bool remote: Should remote repositories be searched to find the
+            versions? Note this can make the request much slower. Default is false.
+        :param bool integration: If true, fetch only "integration versions", otherwise
+            fetch only non-integration versions.
+        :return: Tuple of the version numbers and the watermark for the next call (or
+            ``None`` if there are no versions at all)
+        :rtype: tuple
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses
+            from the Artifactory API.
+        """
+        if remote:
+            return self._fallback.get_versions_since(
+                group, artifact, since=since, remote=remote, integration=integration)
+
+        results = self._search(group, artifact, None, integration, since=since)
+        # Results are sorted by deployment time, most recent first
+        watermark = results[0]['created'] if results else since
+        return [item['name'] for item in results], watermark
+
+    def _find_versions(self, group, artifact, limit, integration):
+        # The most recently deployed SNAPSHOT isn't necessarily the highest (e.g. when
+        # an older branch is built after a newer one) and there are typically few of
+        # them, so all of them are fetched and the highest are picked here instead.
+        search_limit = None if integration else limit
+        names = [item['name'] for item in self._search(group, artifact, search_limit, integration)]
+        return stac.version.most_recent(names, limit)
+
+    def _search(self, group, artifact, limit, integration, since=None):
+        url = self._base_url + '/api/search/aql'
+        query = _get_version_query(self._repo, group, artifact, limit, integration, since=since)
+        self._logger.debug("Using AQL search API at %s - query %s", url, query)
+
+        with stac.metrics.track_request(self._metrics, 'aql') as request:
+            response = request.response = self._session.post(
+                url, data=query, headers={'Content-Type': 'text/plain'}, timeout=self._timeout)
+            response.raise_for_status()
+            request.received = _get_size(response)
+            return response.json()['results']
+
+
+def _parse_text(response):
+    return response.text.strip()
+
+
+def _parse_most_recent_integration(response):
+    versions = _select_most_recent_versions(response.json()['results'], 1, True)
+    return versions[0] if versions else None
+
+
+def _get_validators(response):
+    validators = {}
+    if response.headers.get('ETag'):
+        validators['If-None-Match'] = response.headers['ETag']
+    if response.headers.get('Last-Modified'):
+        validators['If-Modified-Since'] = response.headers['Last-Modified']
+    return validators
+
+
+def _get_size(response):
+    # Size of the already read body of a non-streaming response
+    content = response.content
+    return len(content) if isinstance(content, bytes) else 0
+
+
+def _iter_text(chunks, encoding):
+    decoder = codecs.getincrementaldecoder(encoding or 'utf-8')()
+    for chunk in chunks:
+        text = decoder.decode(chunk)
+        if text:
+            yield text
+
+    text = decoder.decode(b'', final=True)
+    if text:
+        yield text
+
+
+def _iter_json_array(chunks, key):
+    # Yield each item of the array under the given key of a JSON object, parsing the
+    # object incrementally from chunks of text. Other keys of the object are skipped.
+    stream = _JsonStream(chunks)
+    stream.expect('{')
+    if stream.peek() == '}':
+        return
+
+    while True:
+        name = stream.decode()
+        stream.expect(':')
+        if name == key:
+            stream.expect('[')
+            if stream.peek() == ']':
+                stream.expect(']')
+            else:
+                while True:
+                    yield stream.decode()
+                    if stream.expect(',]') == ']':
+                        break
+        else:
+            stream.decode()
+
+        if stream.expect(',}') == '}':
+            return
+
+
+class _JsonStream(object):
+    # Incremental reader of JSON values from an iterable of text chunks. Only enough
+    # text to decode the current value is kept in memory.
+
+    _whitespace = ' \t\n\r'
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._buffer = ''
+        self._pos = 0
+
+    def peek(self):
+        while True:
+            while self._pos < len(self._buffer) and self._buffer[self._pos] in self._whitespace:
+                self._pos += 1
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON document")
+
+    def expect(self, chars):
+        char = self.peek()
+        if char not in chars:
+            raise ValueError(
+                "Expected one of {0!r} in JSON document but got {1!r}".format(chars, char))
+        self._pos += 1
+        return char
+
+    def decode(self):
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except ValueError:
+                if not self._fill():
+                    raise
+                continue
+
+            # Numbers at the end of the buffer might continue in the next chunk
+            if end < len(self._buffer) or not self._fill():
+                self._pos = end
+                return value
+
+    def _fill(self):
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+        self._buffer = self._buffer[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+
+def _get_version_query(repo, group, artifact, limit, integration, since=None):
+    # Each version of a Maven artifact is a folder named after the version in the
+    # folder of the artifact, integration versions being named "*-SNAPSHOT".
+    path = '/'.join(part for part in (group.replace('.', '/'), artifact) if part)
+    criteria = {
+        'repo': repo,
+        'path': path,
+        'type': 'folder',
+        'name': {'$match' if integration else '$nmatch': '*-SNAPSHOT'}
+    }
+    if since is not None:
+        criteria['created'] = {'$gte': since}
+
+    query = 'items.find({criteria}).include("name","created").sort({{"$desc":["created"]}})'.format(
+        criteria=json.dumps(criteria, sort_keys=True))
+    if limit is not None:
+        query += '.limit({limit})'.format(limit=int(limit))
+    return query
+
 
-        json = response.json()
-        versions = [
-            item['version'] for item in json['results'] if item['integration'] is integration]
-        # pylint: disable=no-member
-        versions.sort(key=distutils.version.LooseVersion, reverse=True)
-        return versions[:limit]
+def _select_most_recent_versions(results, limit, integration):
+    versions = (item['version'] for item in results if item['integration'] is integration)
+    if limit is None:
+        return list(versions)
+    return stac.version.most_recent(versions, limit)
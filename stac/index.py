@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.index
+~~~~~~~~~~
+
+Long lived indexes of the versions of artifacts, kept up to date by fetching only
+new versions. It is typically not required for users of the Stac library to interact
+with this module directly, indexing can be enabled via :func:`stac.client.new_maven_client`.
+"""
+
+from __future__ import absolute_import
+
+import collections
+import itertools
+import threading
+import time
+
+import stac.cache
+import stac.metrics
+import stac.util
+import stac.version
+
+DEFAULT_REBUILD_INTERVAL = 3600
+
+
+class _Entry(object):
+    # pylint: disable=too-few-public-methods
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.index = None
+        self.watermark = None
+        self.refreshed = None
+        self.built = None
+
+
+class IndexedVersionDao(object):
+    """Version DAO that keeps a sorted index of every version of each artifact looked
+    up, answering lookups from the index.
+
+    When an index is refreshed, only versions that aren't in it already are inserted
+    (using a binary search each) instead of sorting every version again. When the
+    wrapped DAO supports it (:class:`stac.http.AqlVersionDao` does), only versions
+    deployed since the last refresh are fetched. Otherwise all versions are fetched
+    and compared to the index.
+
+    A DAO that only reports new versions can't report deleted ones, so indexes are
+    rebuilt from all versions every ``rebuild_interval`` seconds. Indexes built from
+    all versions drop deleted versions straight away.
+
+    The wrapped DAO must have a ``get_versions_since`` method, like
+    :meth:`stac.http.VersionApiDao.get_versions_since`.
+
+    This class is thread safe. Concurrent lookups of the same artifact share a single
+    refresh.
+    """
+
+    _logger = stac.util.get_log()
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, dao, refresh_interval=0, rebuild_interval=DEFAULT_REBUILD_INTERVAL,
+                 max_size=stac.cache.DEFAULT_CACHE_SIZE, metrics=None, clock=time.time):
+        """Set the DAO to fetch versions with and how often to refresh indexes.
+
+        :param dao: DAO to fetch versions with
+        :param float refresh_interval: Seconds after refreshing an index before it is
+            refreshed again by a lookup. Default is to refresh it on every lookup.
+        :param float rebuild_interval: Seconds after building an index from all versions
+            before it is built from all versions again. Default is one hour.
+        :param int max_size: Maximum number of artifacts to keep indexes of before
+            discarding the least recently used one. Default is 1024.
+        :param stac.metrics.MetricsSink metrics: Optional sink to record refreshes of
+            indexes to. Default is not to record metrics.
+        :param callable clock: Function returning the current time in seconds. Only
+            useful for testing.
+        :raises ValueError: If an interval is negative or the size is not positive
+        """
+        if refresh_interval < 0 or rebuild_interval < 0:
+            raise ValueError("Refresh and rebuild intervals must not be negative")
+        if max_size < 1:
+            raise ValueError("Index size must be positive")
+
+        self._dao = dao
+        self._refresh_interval = refresh_interval
+        self._rebuild_interval = rebuild_interval
+        self._max_size = max_size
+        self._metrics = stac.metrics.get_sink(metrics)
+        self._clock = clock
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_most_recent_release(self, group, artifact, remote=False):
+        """Get the version number of the most recent release.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_release`.
+        """
+        return self._lookup(group, artifact, remote, False, lambda index: index.latest())
+
+    def get_most_recent_versions(self, group, artifact, limit, remote=False, integration=False):
+        """Get the version numbers of the most recent artifacts.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_versions`.
+        """
+        if limit < 1:
+            raise ValueError("Releases limit must be positive")
+
+        return self._lookup(group, artifact, remote, integration,
+                            lambda index: list(itertools.islice(reversed(index), limit)))
+
+    def get_version_index(self, group, artifact, remote=False, integration=False):
+        """Get a copy of the index of every version of an artifact, refreshing it first
+        if needed.
+
+        :param str group: Group of the artifact to get versions of
+        :param str artifact: Name of the artifact to get versions of
+        :param bool remote: Should remote repositories be searched to find the
+            versions? Default is false.
+        :param bool integration: If true, index only "integration versions", otherwise
+            index only non-integration versions.
+        :return: Index of all versions of the artifact
+        :rtype: stac.version.VersionIndex
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses
+            from the Artifactory API.
+        """
+        return self._lookup(group, artifact, remote, integration, lambda index: index.copy())
+
+    def __len__(self):
+        with self._lock:
+            return len(self._entries)
+
+    def _lookup(self, group, artifact, remote, integration, read):
+        entry = self._get_entry((group, artifact, bool(remote), bool(integration)))
+        with entry.lock:
+            self._refresh(entry, group, artifact, remote, integration)
+            return read(entry.index)
+
+    def _get_entry(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is None:
+                entry = _Entry()
+                while len(self._entries) >= self._max_size:
+                    self._entries.popitem(last=False)
+            self._entries[key] = entry
+            return entry
+
+    def _refresh(self, entry, group, artifact, remote, integration):
+        now = self._clock()
+        if entry.index is not None and now - entry.refreshed < self._refresh_interval:
+            return
+
+        rebuild = entry.index is None or now - entry.built >= self._rebuild_interval
+        since = None if rebuild else entry.watermark
+        versions, watermark = self._dao.get_versions_since(
+            group, artifact, since=since, remote=remote, integration=integration)
+
+        if since is None or watermark is None:
+            # All versions were fetched, so versions missing from them have been deleted
+            fetched = set(versions)
+            known = set(entry.index) if entry.index is not None else None
+            if known is None or not known <= fetched:
+                entry.index = stac.version.VersionIndex(versions)
+                result = 'full'
+            else:
+                result = _add_versions(entry.index, fetched - known)
+            entry.built = now
+        else:
+            result = _add_versions(entry.index, versions)
+
+        self._logger.debug("Refreshed index of %s.%s - %s", group, artifact, result)
+        self._metrics.increment('stac_index_refreshes_total', labels={'result': result})
+        entry.watermark = watermark
+        entry.refreshed = now
+
+
+def _add_versions(index, versions):
+    added = [version for version in versions if index.add(version)]
+    return 'delta' if added else 'unchanged'
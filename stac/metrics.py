@@ -0,0 +1,356 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.metrics
+~~~~~~~~~~~~
+
+Instrumentation of requests made to Artifactory and of client operations. Metrics
+are sent to a :class:`MetricsSink`, for example an in-process :class:`MetricsRegistry`
+which can render them in the Prometheus text format. A sink can be passed to
+:func:`stac.client.new_maven_client`.
+
+The following metrics are recorded:
+
+* ``stac_requests_total`` - Counter of HTTP requests by ``endpoint`` and ``status``
+  (the HTTP status code, or ``error`` if no response was received).
+* ``stac_request_duration_seconds`` - Histogram of the time taken by HTTP requests,
+  including reading the response body, by ``endpoint``.
+* ``stac_received_bytes_total`` - Counter of response body bytes received by ``endpoint``.
+* ``stac_operation_duration_seconds`` - Histogram of the time taken by client operations
+  by ``operation`` and ``artifact``, including any retries.
+* ``stac_operations_total`` - Counter of client operations by ``operation``, ``artifact``,
+  and ``result`` (``ok``, ``not_found``, or ``error``).
+* ``stac_cache_requests_total`` - Counter of cached version lookups by ``result``
+  (``hit``, ``miss``, or ``stale`` for expired results returned while being refreshed).
+* ``stac_cache_refreshes_total`` - Counter of background refreshes of cached version
+  lookups by ``result`` (``ok`` or ``error``).
+* ``stac_watch_polls_total`` - Counter of polls made by watchers by ``result``
+  (``changed``, ``unchanged``, ``not_modified``, or ``error``).
+* ``stac_index_refreshes_total`` - Counter of refreshes of version indexes by ``result``
+  (``full``, ``delta``, or ``unchanged``).
+
+Endpoints are ``latestVersion``, ``versions``, ``aql``, ``download``, ``download_info``
+(requests for the size and checksums of an artifact), and ``metadata`` (requests for the
+``maven-metadata.xml`` of SNAPSHOT versions).
+"""
+
+from __future__ import absolute_import
+
+from abc import ABCMeta, abstractmethod
+import bisect
+import threading
+import timeit
+
+import stac.exceptions
+
+__all__ = [
+    'MetricsSink',
+    'NullMetricsSink',
+    'MetricsRegistry',
+    'Histogram'
+]
+
+# Upper bounds in seconds of histogram buckets, suitable for HTTP request latencies
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+_COUNTER, _HISTOGRAM = 'counter', 'histogram'
+
+
+class MetricsSink(object):
+    """Interface for recording metrics.
+
+    Implementations may store metrics in process or forward them to an external
+    system. Implementations must be thread safe.
+    """
+
+    __metaclass__ = ABCMeta
+
+    @abstractmethod
+    def increment(self, name, value=1, labels=None):
+        """Increment a counter.
+
+        :param str name: Name of the counter
+        :param float value: Amount to increment the counter by
+        :param dict labels: Optional names and values of labels of the counter
+        """
+        pass
+
+    @abstractmethod
+    def observe(self, name, value, labels=None):
+        """Record a value (typically a duration in seconds) in a histogram.
+
+        :param str name: Name of the histogram
+        :param float value: Value to record
+        :param dict labels: Optional names and values of labels of the histogram
+        """
+        pass
+
+
+class NullMetricsSink(MetricsSink):
+    """Metrics sink that discards all metrics."""
+
+    def increment(self, name, value=1, labels=None):
+        pass
+
+    def observe(self, name, value, labels=None):
+        pass
+
+
+class Histogram(object):
+    """Count of observed values in each of a fixed set of buckets, along with the
+    total count and sum of values.
+    """
+
+    def __init__(self, buckets):
+        """Set the upper bounds of the buckets.
+
+        :param tuple buckets: Increasing upper bounds of the buckets. Values larger
+            than the last bound are only included in the total count.
+        """
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        """Record a value.
+
+        :param float value: Value to record
+        """
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.count += 1
+        self.sum += value
+
+
+class MetricsRegistry(MetricsSink):
+    """In-process metrics sink that keeps the current value of every counter and
+    histogram and can render them in the Prometheus text exposition format.
+
+    This class is thread safe.
+    """
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        """Set the buckets to use for histograms.
+
+        :param tuple buckets: Increasing upper bounds of the buckets of all histograms.
+        :raises ValueError: If the buckets are empty or not increasing
+        """
+        if not buckets or list(buckets) != sorted(set(buckets)):
+            raise ValueError("Histogram buckets must be non-empty and increasing")
+
+        self._buckets = tuple(buckets)
+        self._types = {}
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def increment(self, name, value=1, labels=None):
+        key = _get_key(labels)
+        with self._lock:
+            series = self._get_series(name, _COUNTER)
+            series[key] = series.get(key, 0) + value
+
+    def observe(self, name, value, labels=None):
+        key = _get_key(labels)
+        with self._lock:
+            series = self._get_series(name, _HISTOGRAM)
+            histogram = series.get(key)
+            if histogram is None:
+                histogram = series[key] = Histogram(self._buckets)
+            histogram.observe(value)
+
+    def get_count(self, name, labels=None):
+        """Get the current value of a counter.
+
+        :param str name: Name of the counter
+        :param dict labels: Optional names and values of labels of the counter
+        :return: Value of the counter, zero if it has never been incremented
+        :rtype: float
+        """
+        with self._lock:
+            return self._metrics.get(name, {}).get(_get_key(labels), 0)
+
+    def get_histogram(self, name, labels=None):
+        """Get a copy of the current state of a histogram.
+
+        :param str name: Name of the histogram
+        :param dict labels: Optional names and values of labels of the histogram
+        :return: The histogram or ``None`` if no values have been recorded in it
+        :rtype: Histogram
+        """
+        with self._lock:
+            histogram = self._metrics.get(name, {}).get(_get_key(labels))
+            if histogram is None:
+                return None
+
+            copy = Histogram(histogram.buckets)
+            copy.counts = list(histogram.counts)
+            copy.count = histogram.count
+            copy.sum = histogram.sum
+            return copy
+
+    def render(self):
+        """Render all metrics in the Prometheus text exposition format.
+
+        :return: Metrics in the Prometheus text format
+        :rtype: str
+        """
+        lines = []
+        with self._lock:
+            for name in sorted(self._metrics):
+                metric_type = self._types[name]
+                lines.append('# TYPE {0} {1}'.format(name, metric_type))
+                series = self._metrics[name]
+                for key in sorted(series):
+                    if metric_type == _COUNTER:
+                        lines.append(_format_sample(name, key, series[key]))
+                    else:
+                        lines.extend(_format_histogram(name, key, series[key]))
+
+        return '\n'.join(lines) + '\n' if lines else ''
+
+    def _get_series(self, name, metric_type):
+        existing = self._types.setdefault(name, metric_type)
+        if existing != metric_type:
+            raise ValueError("Metric {0} is a {1}, not a {2}".format(name, existing, metric_type))
+        return self._metrics.setdefault(name, {})
+
+
+class _Request(object):
+    # State of a request being tracked by track_request()
+
+    def __init__(self):
+        self.response = None
+        self.received = 0
+
+    def count(self, chunks):
+        # Count the size of each chunk of a response body as it is consumed
+        for chunk in chunks:
+            self.received += len(chunk)
+            yield chunk
+
+
+class track_request(object):  # pylint: disable=invalid-name
+    """Context manager recording the count, duration, and size of an HTTP request
+    to a metrics sink.
+
+    The ``response`` attribute of the object returned when entering the context
+    should be set once a response is received and ``received`` should be set (or
+    ``count()`` used to wrap an iterator of chunks of the body) to the number of
+    bytes of the body read.
+
+    :param MetricsSink sink: Sink to record metrics to
+    :param str endpoint: Name of the Artifactory endpoint the request is made to
+    """
+
+    def __init__(self, sink, endpoint, clock=timeit.default_timer):
+        self._sink = sink
+        self._endpoint = endpoint
+        self._clock = clock
+        self._request = _Request()
+        self._start = None
+
+    def __enter__(self):
+        self._start = self._clock()
+        return self._request
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        response = self._request.response
+        status = str(response.status_code) if response is not None else 'error'
+        labels = {'endpoint': self._endpoint}
+
+        elapsed = self._clock() - self._start
+
+        self._sink.increment('stac_requests_total', labels=dict(labels, status=status))
+        self._sink.observe('stac_request_duration_seconds', elapsed, labels=labels)
+        if self._request.received:
+            self._sink.increment('stac_received_bytes_total', self._request.received, labels=labels)
+        return False
+
+
+class track_operation(object):  # pylint: disable=invalid-name
+    """Context manager recording the count, duration, and result of a client
+    operation on an artifact to a metrics sink.
+
+    :param MetricsSink sink: Sink to record metrics to
+    :param str operation: Name of the client operation
+    :param str artifact: Fully qualified name of the artifact
+    """
+
+    def __init__(self, sink, operation, artifact, clock=timeit.default_timer):
+        self._sink = sink
+        self._labels = {'operation': operation, 'artifact': artifact}
+        self._clock = clock
+        self._start = None
+
+    def __enter__(self):
+        self._start = self._clock()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            result = 'ok'
+        elif issubclass(exc_type, stac.exceptions.NoMatchingVersionsError):
+            result = 'not_found'
+        else:
+            result = 'error'
+
+        elapsed = self._clock() - self._start
+
+        self._sink.increment('stac_operations_total', labels=dict(self._labels, result=result))
+        self._sink.observe('stac_operation_duration_seconds', elapsed, labels=self._labels)
+        return False
+
+
+def get_sink(metrics):
+    """Get the given metrics sink, or a sink that discards metrics if it is ``None``.
+
+    :param MetricsSink metrics: Optional metrics sink
+    :return: A metrics sink
+    :rtype: MetricsSink
+    """
+    return metrics if metrics is not None else _NULL_SINK
+
+
+_NULL_SINK = NullMetricsSink()
+
+
+def _get_key(labels):
+    if not labels:
+        return ()
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ''
+    return '{' + ','.join('{0}="{1}"'.format(name, _escape(value)) for name, value in pairs) + '}'
+
+
+def _format_sample(name, key, value, extra=()):
+    return '{0}{1} {2}'.format(name, _format_labels(key, extra), str(value))
+
+
+def _format_histogram(name, key, histogram):
+    lines = []
+    cumulative = 0
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        cumulative += count
+        lines.append(_format_sample(name + '_bucket', key, cumulative, (('le', str(bound)),)))
+    lines.append(_format_sample(name + '_bucket', key, histogram.count, (('le', '+Inf'),)))
+    lines.append(_format_sample(name + '_sum', key, histogram.sum))
+    lines.append(_format_sample(name + '_count', key, histogram.count))
+    return lines
+
+
+def _escape(value):
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
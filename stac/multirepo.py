@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.multirepo
+~~~~~~~~~~~~~~
+
+Searching several repositories for versions of an artifact at once. It is typically
+not required for users of the Stac library to interact with this module directly,
+multiple repositories can be searched by passing a list of repositories to
+:func:`stac.client.new_maven_client`.
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=protected-access
+import collections
+import concurrent.futures
+
+import stac.client
+import stac.util
+import stac.version
+
+
+class MultiRepoVersionDao(object):
+    """Version DAO that searches several repositories concurrently, merging the
+    versions found in each of them.
+
+    Each repository is searched using its own DAO (any DAO with the same methods as
+    :class:`stac.http.VersionApiDao`), all at the same time, so a lookup takes as long
+    as the slowest repository instead of the sum of all of them. Versions found in
+    more than one repository are only included once. The ``*_with_repos`` methods
+    also return which repositories each version was found in.
+
+    Repositories that don't contain the artifact at all (that respond with a 404)
+    are skipped. If none of them contain it, the error from the first repository is
+    raised. Any other error from any repository is raised as soon as it happens,
+    without waiting for the remaining repositories, since the most recent versions
+    can't be known without every repository's results.
+
+    This class is thread safe if the wrapped DAOs are.
+    """
+
+    _logger = stac.util.get_log()
+
+    def __init__(self, daos, max_workers=None):
+        """Set the DAO to search each repository with.
+
+        :param list daos: Pairs of repository name and the DAO to search that repository
+            with. When a version is in several repositories, they are listed in this order.
+        :param int max_workers: Maximum number of repository searches to make concurrently,
+            shared by all lookups made with this DAO. For concurrent lookups (e.g. by
+            :meth:`stac.client.GenericArtifactoryClient.get_latest_versions_many`) not to wait
+            for each other, this should be the number of concurrent lookups times the number
+            of repositories. Default is the number of repositories, enough for one lookup.
+        :raises ValueError: If no DAOs are given
+        """
+        self._daos = list(daos)
+        if not self._daos:
+            raise ValueError("At least one repository must be searched")
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers or len(self._daos))
+
+    @property
+    def repos(self):
+        """Names of the repositories searched, in order."""
+        return [repo for repo, _ in self._daos]
+
+    def get_most_recent_release(self, group, artifact, remote=False):
+        """Get the version number of the most recent release in any repository.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_release`.
+        """
+        return self.get_most_recent_release_with_repos(group, artifact, remote=remote)[0]
+
+    def get_most_recent_release_with_repos(self, group, artifact, remote=False):
+        """Get the version number of the most recent release in any repository and the
+        repositories it was found in.
+
+        :param str group: Group of the artifact to get the version of
+        :param str artifact: Name of the artifact to get the version of
+        :param bool remote: Should remote repositories be searched to find the latest
+            version? Default is false.
+        :return: Tuple of the version number (or ``None`` if there are no releases) and
+            a tuple of the repositories it was found in.
+        :rtype: tuple
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses
+            from the Artifactory API, except from repositories without the artifact.
+        """
+        results = self._search('get_most_recent_release', group, artifact, remote=remote)
+        found = [(version, repo) for repo, version in results if version]
+        if not found:
+            return None, ()
+
+        latest = max((version for version, _ in found), key=stac.version.version_key)
+        return latest, tuple(repo for version, repo in found if version == latest)
+
+    def get_most_recent_versions(self, group, artifact, limit, remote=False, integration=False):
+        """Get the version numbers of the most recent artifacts in any repository.
+
+        See :meth:`stac.http.VersionApiDao.get_most_recent_versions`.
+        """
+        return [version for version, _ in self.get_most_recent_versions_with_repos(
+            group, artifact, limit, remote=remote, integration=integration)]
+
+    def get_most_recent_versions_with_repos(self, group, artifact, limit, remote=False,
+                                            integration=False):
+        """Get the version numbers of the most recent artifacts in any repository and the
+        repositories each was found in, ordered by version number.
+
+        :param str group: Group of the artifact to get versions of
+        :param str artifact: Name of the artifact to get versions of
+        :param int limit: Fetch only this many of the most recent versions
+        :param bool remote: Should remote repositories be searched to find the latest
+            versions? Default is false.
+        :param bool integration: If true, fetch only "integration versions", otherwise
+            fetch only non-integration versions.
+        :return: Tuples of each version number and a tuple of the repositories it was
+            found in, most recent first.
+        :rtype: list
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses
+            from the Artifactory API, except from repositories without the artifact.
+        :raises ValueError: If limit is 0 or negative.
+        """
+        if limit < 1:
+            raise ValueError("Releases limit must be positive")
+
+        results = self._search(
+            'get_most_recent_versions', group, artifact, limit, remote=remote,
+            integration=integration)
+
+        # There are at most limit versions per repository, so sorting them all is cheap.
+        # The sort is stable, so equal versions come out in the order of the repositories.
+        tagged = sorted(
+            ((version, repo) for repo, versions in results for version in versions),
+            key=lambda item: stac.version.version_key(item[0]), reverse=True)
+        merged = collections.OrderedDict()
+        for version, repo in tagged:
+            if version in merged:
+                merged[version].append(repo)
+            elif len(merged) < limit:
+                merged[version] = [repo]
+        return [(version, tuple(repos)) for version, repos in merged.items()]
+
+    def _search(self, method, *args, **kwargs):
+        futures = collections.OrderedDict(
+            (self._executor.submit(getattr(dao, method), *args, **kwargs), repo)
+            for repo, dao in self._daos)
+
+        errors = {}
+        try:
+            for future in concurrent.futures.as_completed(futures):
+                error = future.exception()
+                if error is None:
+                    continue
+                if not stac.client._is_not_found(error):
+                    raise error
+                self._logger.debug("No versions in %s - %s", futures[future], error)
+                errors[future] = error
+        finally:
+            # Nothing to wait for if a repository failed
+            for future in futures:
+                future.cancel()
+
+        results = [(repo, future.result()) for future, repo in futures.items()
+                   if future not in errors]
+        if not results:
+            raise next(errors[future] for future in futures)
+        return results
@@ -0,0 +1,174 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.retry
+~~~~~~~~~~
+
+Retrying of requests to Artifactory that fail because of transient errors. It
+is typically not required for users of the Stac library to interact with this
+module directly, a retry policy can be passed to :func:`stac.client.new_maven_client`.
+"""
+
+from __future__ import absolute_import
+
+import email.utils
+import random
+import threading
+import time
+
+import requests
+
+import stac.util
+
+DEFAULT_MAX_ATTEMPTS = 3
+
+DEFAULT_BACKOFF = 0.1
+
+DEFAULT_MAX_BACKOFF = 10.0
+
+# Status codes indicating Artifactory (or a proxy in front of it) is temporarily unavailable
+DEFAULT_RETRY_STATUSES = frozenset([429, 502, 503, 504])
+
+# Errors from requests that don't depend on the response status code and are safe to retry
+_TRANSIENT_ERRORS = (
+    requests.exceptions.ConnectionError,
+    requests.exceptions.Timeout,
+    requests.exceptions.ChunkedEncodingError,
+)
+
+
+class RetryPolicy(object):
+    """Policy for retrying idempotent requests that fail because of connection
+    errors, timeouts, or HTTP status codes indicating a temporary problem.
+
+    Retries are delayed using exponential backoff with "full jitter": the delay
+    before each retry is a random amount of time between zero and an exponentially
+    increasing maximum. If the response to a failed request includes a ``Retry-After``
+    header, the delay it specifies is used instead, up to the maximum backoff.
+
+    A count of the number of retries performed is maintained.
+
+    This class is thread safe.
+    """
+
+    _logger = stac.util.get_log()
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, max_attempts=DEFAULT_MAX_ATTEMPTS, backoff=DEFAULT_BACKOFF,
+                 max_backoff=DEFAULT_MAX_BACKOFF, time_budget=None, statuses=DEFAULT_RETRY_STATUSES,
+                 clock=time.time, sleep=time.sleep):
+        """Set the number of attempts to make and how long to wait between them.
+
+        :param int max_attempts: Maximum number of times to attempt a request, including
+            the first attempt.
+        :param float backoff: Maximum delay in seconds before the first retry. The maximum
+            delay doubles for each subsequent retry.
+        :param float max_backoff: Upper bound in seconds of the maximum delay before a retry,
+            including delays requested by ``Retry-After`` headers.
+        :param float time_budget: Optional maximum number of seconds to spend on all attempts
+            of a request. No retry is made if it would exceed this.
+        :param frozenset statuses: HTTP status codes that should cause a request to be retried.
+        :param callable clock: Function returning the current time in seconds. Only useful
+            for testing.
+        :param callable sleep: Function to sleep for a number of seconds. Only useful for
+            testing.
+        :raises ValueError: If the maximum number of attempts is not positive
+        """
+        if max_attempts < 1:
+            raise ValueError("Maximum attempts must be positive")
+
+        self._max_attempts = max_attempts
+        self._backoff = backoff
+        self._max_backoff = max_backoff
+        self._time_budget = time_budget
+        self._statuses = statuses
+        self._clock = clock
+        self._sleep = sleep
+        self._random = random.Random()
+        self._lock = threading.Lock()
+        self._retries = 0
+
+    @property
+    def retries(self):
+        """Number of retries performed using this policy."""
+        return self._retries
+
+    def call(self, func, *args, **kwargs):
+        """Call a function making an idempotent request, retrying it if it fails
+        with a transient error.
+
+        The function is expected to raise :class:`requests.exceptions.HTTPError`
+        for non-success responses (e.g. by calling ``raise_for_status()``).
+
+        :param callable func: Function to call
+        :param args: Positional arguments to pass to the function
+        :param kwargs: Keyword arguments to pass to the function
+        :return: The result of the function
+        :raises requests.exceptions.RequestException: The last error raised by the
+            function if it could not be retried.
+        """
+        start = self._clock()
+        attempt = 1
+        while True:
+            try:
+                return func(*args, **kwargs)
+            except requests.exceptions.RequestException as e:
+                if attempt >= self._max_attempts or not self._is_transient(e):
+                    raise
+
+                delay = self._get_delay(attempt, e)
+                elapsed = self._clock() - start
+                if self._time_budget is not None and elapsed + delay > self._time_budget:
+                    raise
+
+                self._logger.debug(
+                    "Attempt %s of %s failed (%s), retrying in %.3fs",
+                    attempt, self._max_attempts, e, delay)
+                with self._lock:
+                    self._retries += 1
+                self._sleep(delay)
+                attempt += 1
+
+    def _is_transient(self, error):
+        if isinstance(error, requests.exceptions.HTTPError):
+            return error.response is not None and error.response.status_code in self._statuses
+        return isinstance(error, _TRANSIENT_ERRORS)
+
+    def _get_delay(self, attempt, error):
+        retry_after = _get_retry_after(error)
+        if retry_after is not None:
+            # Don't let the server make callers wait for an arbitrary amount of time
+            return min(self._max_backoff, retry_after)
+
+        ceiling = min(self._max_backoff, self._backoff * 2 ** (attempt - 1))
+        return self._random.uniform(0, ceiling)
+
+
+def _get_retry_after(error):
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+
+    try:
+        value = response.headers.get('Retry-After')
+    except (AttributeError, TypeError):
+        return None
+    if not isinstance(value, str) or not value:
+        return None
+
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+
+    parsed = email.utils.parsedate_tz(value)
+    if parsed is None:
+        return None
+    return max(0.0, email.utils.mktime_tz(parsed) - time.time())
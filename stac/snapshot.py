@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.snapshot
+~~~~~~~~~~~~~
+
+Resolution of SNAPSHOT versions to the unique timestamped files deployed for them.
+It is typically not required for users of the Stac library to interact with this
+module directly, snapshot resolution can be enabled via :func:`stac.client.new_maven_client`.
+
+Each deployment of a SNAPSHOT version of a Maven artifact stores a file with a unique
+name, e.g. ``service-1.2.0-20160404.120000-3.jar`` in the ``1.2.0-SNAPSHOT`` folder.
+Which file is the most recent is recorded in the ``maven-metadata.xml`` file in the
+same folder. Requesting ``service-1.2.0-SNAPSHOT.jar`` makes Artifactory look that up
+on every request, and the file returned changes whenever a new build is deployed.
+"""
+
+from __future__ import absolute_import
+
+import time
+import xml.etree.ElementTree as ElementTree
+
+import stac.cache
+import stac.metrics
+import stac.util
+
+DEFAULT_SNAPSHOT_TTL = 60
+
+_SNAPSHOT_SUFFIX = '-SNAPSHOT'
+
+_METADATA_CHUNK_SIZE = 8 * 1024
+
+
+class SnapshotResolver(object):
+    """Resolver of SNAPSHOT versions to the version in the name of the most recently
+    deployed file for them, using the ``maven-metadata.xml`` file of each version.
+
+    The metadata of each version is fetched once and cached for ``ttl`` seconds, so
+    every URL generated for a SNAPSHOT version within that time points at the same
+    immutable file, even if a new build is deployed meanwhile.
+
+    Versions without metadata (or with metadata that doesn't name unique files) are
+    resolved to themselves.
+
+    This class is thread safe.
+    """
+
+    _logger = stac.util.get_log()
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, session, base_url, repo, ttl=DEFAULT_SNAPSHOT_TTL,
+                 max_size=stac.cache.DEFAULT_CACHE_SIZE, timeout=None, retry_policy=None,
+                 metrics=None, clock=time.time):
+        """Set the session for making requests, the Artifactory location, and how
+        long to cache metadata for.
+
+        :param requests.Session session: Session for making HTTP requests to
+            Artifactory. This session should be configured with any required
+            credentials for accessing the repository.
+        :param str base_url: Base URL to the Artifactory installation
+        :param str repo: Name of the repository to fetch metadata from
+        :param float ttl: Number of seconds to cache the metadata of each version for.
+            Default is 60 seconds.
+        :param int max_size: Maximum number of versions to cache the metadata of.
+            Default is 1024.
+        :param float|tuple timeout: Timeout for each request in seconds, or a tuple of
+            the connect and read timeouts, as accepted by requests. Default is to wait
+            forever.
+        :param stac.retry.RetryPolicy retry_policy: Optional policy for retrying requests
+            that fail because of transient errors. Default is not to retry requests.
+        :param stac.metrics.MetricsSink metrics: Optional sink to record the count, duration,
+            and size of requests to. Default is not to record metrics.
+        :param callable clock: Function returning the current time in seconds. Only
+            useful for testing.
+        """
+        self._session = session
+        self._base_url = base_url.rstrip('/')
+        self._repo = repo
+        self._timeout = timeout
+        self._retry_policy = retry_policy
+        self._metrics = stac.metrics.get_sink(metrics)
+        self._cache = stac.cache.LruTtlCache(ttl, max_size, clock=clock)
+
+    def resolve(self, group, artifact, version, packaging, descriptor=None):
+        """Get the version in the name of the most recently deployed file of a SNAPSHOT
+        version, e.g. ``1.2.0-20160404.120000-3`` for ``1.2.0-SNAPSHOT``.
+
+        :param str group: Group of the artifact
+        :param str artifact: Name of the artifact
+        :param str version: Version of the artifact. Versions that aren't SNAPSHOT
+            versions are returned as is, without making any requests.
+        :param str packaging: Type of packaging / file format of the file
+        :param str descriptor: Tag of a particular variant of the version, if any
+        :return: Version in the name of the file
+        :rtype: str
+        :raises requests.exceptions.HTTPError: For any non-success HTTP responses from
+            Artifactory other than the metadata not existing.
+        """
+        if not version.endswith(_SNAPSHOT_SUFFIX):
+            return version
+
+        key = (group, artifact, version)
+        files = self._cache.get(key)
+        if files is None:
+            files = self._call(self._get_files, group, artifact, version)
+            self._cache.set(key, files)
+        return files.get((packaging, descriptor)) or files.get(None) or version
+
+    def _call(self, func, *args):
+        if self._retry_policy is None:
+            return func(*args)
+        return self._retry_policy.call(func, *args)
+
+    def _get_files(self, group, artifact, version):
+        url = '/'.join([
+            self._base_url, self._repo, group.replace('.', '/'), artifact, version,
+            'maven-metadata.xml'])
+        self._logger.debug("Using snapshot metadata at %s", url)
+
+        with stac.metrics.track_request(self._metrics, 'metadata') as request:
+            response = request.response = self._session.get(
+                url, stream=True, timeout=self._timeout)
+            try:
+                if response.status_code == 404:
+                    self._logger.debug("No snapshot metadata at %s", url)
+                    return {}
+                response.raise_for_status()
+                chunks = request.count(response.iter_content(chunk_size=_METADATA_CHUNK_SIZE))
+                return _parse_metadata(chunks, version)
+            finally:
+                response.close()
+
+
+def _parse_metadata(chunks, version):
+    # Map the packaging and descriptor of each file listed to the version in its name,
+    # and None to the version of the most recent build, for files that aren't listed.
+    # Elements are discarded once read so memory use doesn't depend on the size of
+    # the metadata.
+    files = {}
+    parser = _new_parser()
+    for chunk in chunks:
+        parser.feed(chunk)
+        _read_elements(parser, version, files)
+    parser.close()
+    _read_elements(parser, version, files)
+    return files
+
+
+def _new_parser():
+    pull_parser = getattr(ElementTree, 'XMLPullParser', None)
+    if pull_parser is not None:
+        return pull_parser(events=('end',))
+    return _EndEventParser()
+
+
+class _EndEventParser(object):
+    """Parser for the "end" events of elements, for Python versions before 3.4 where
+    :class:`xml.etree.ElementTree.XMLPullParser` is not available.
+    """
+
+    def __init__(self):
+        self._target = _EndEventTarget()
+        self._parser = ElementTree.XMLParser(target=self._target)
+
+    def feed(self, data):
+        self._parser.feed(data)
+
+    def close(self):
+        self._parser.close()
+
+    def read_events(self):
+        events, self._target.events = self._target.events, []
+        return events
+
+
+class _EndEventTarget(object):
+    """Target of an XML parser that builds elements and records when each ends."""
+
+    def __init__(self):
+        self.events = []
+        self._builder = ElementTree.TreeBuilder()
+
+    def start(self, tag, attrib):
+        return self._builder.start(tag, attrib)
+
+    def data(self, data):
+        self._builder.data(data)
+
+    def end(self, tag):
+        element = self._builder.end(tag)
+        self.events.append(('end', element))
+        return element
+
+    def close(self):
+        return self._builder.close()
+
+
+def _read_elements(parser, version, files):
+    for _, element in parser.read_events():
+        tag = _local_name(element.tag)
+        if tag == 'snapshotVersion':
+            fields = _get_fields(element)
+            if fields.get('value') and fields.get('extension'):
+                files[(fields['extension'], fields.get('classifier') or None)] = fields['value']
+            element.clear()
+        elif tag == 'snapshot':
+            # Older metadata only names the most recent build, not each file
+            fields = _get_fields(element)
+            if fields.get('timestamp') and fields.get('buildNumber'):
+                files.setdefault(None, '{0}-{1}-{2}'.format(
+                    version[:-len(_SNAPSHOT_SUFFIX)], fields['timestamp'],
+                    fields['buildNumber']))
+            element.clear()
+
+
+def _get_fields(element):
+    return dict(
+        (_local_name(child.tag), (child.text or '').strip()) for child in element)
+
+
+def _local_name(tag):
+    # Metadata may use the Maven metadata namespace
+    return tag.rsplit('}', 1)[-1]
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.store
+~~~~~~~~~~
+
+Local on-disk storage of downloaded artifacts. It is typically not required
+for users of the Stac library to interact with this module directly, the store
+can be enabled via :func:`stac.client.new_maven_client`.
+"""
+
+from __future__ import absolute_import
+
+import hashlib
+import os
+import re
+import shutil
+import tempfile
+import threading
+
+import stac.util
+
+DEFAULT_STORE_SIZE = 10 * 1024 * 1024 * 1024
+
+_SHA1_PATTERN = re.compile(r'[0-9a-fA-F]{40}\Z')
+
+_READ_CHUNK_SIZE = 64 * 1024
+
+
+class ArtifactStore(object):
+    """Content addressed store of artifacts on local disk, keyed by the SHA-1
+    checksum of each artifact.
+
+    Artifacts are placed in destinations by hard linking them when possible,
+    falling back to copying them (for example when the destination is on another
+    file system). When the total size of stored artifacts exceeds the maximum
+    size, the least recently used artifacts are removed.
+
+    Artifacts are verified against their checksum once, when they are stored. A
+    stored artifact changes if a hard linked copy of it is modified in place, so
+    artifacts placed by the store shouldn't be modified unless hard links are
+    disabled.
+
+    Multiple processes may safely share the same store directory. Each keeps a
+    running total of the size of the store, found when it first stores an artifact
+    and updated with the artifacts it stores, so artifacts stored by other processes
+    are only accounted for the next time the store is over its maximum size. This
+    class is thread safe.
+    """
+
+    _logger = stac.util.get_log()
+
+    def __init__(self, root, max_size=DEFAULT_STORE_SIZE, hard_links=True):
+        """Set the directory of the store and its maximum size.
+
+        :param str root: Directory to store artifacts in. It will be created if it
+            does not exist.
+        :param int max_size: Maximum total size of stored artifacts in bytes.
+        :param bool hard_links: Should artifacts be hard linked into (and out of) the
+            store when possible? If false, artifacts are always copied.
+        :raises ValueError: If the maximum size is not positive
+        """
+        if max_size < 1:
+            raise ValueError("Store size must be positive")
+
+        self._root = root
+        self._max_size = max_size
+        self._hard_links = hard_links
+        self._lock = threading.Lock()
+        # Total size of stored artifacts, unknown until artifacts are first evicted
+        self._size = None
+
+        if not os.path.isdir(root):
+            os.makedirs(root)
+
+    def contains(self, sha1):
+        """Is an artifact with the given SHA-1 checksum stored?
+
+        :param str sha1: Hex encoded SHA-1 checksum of the artifact
+        :return: True if the artifact is stored, false otherwise (including when
+            the checksum is not a valid SHA-1 checksum)
+        :rtype: bool
+        """
+        return _is_sha1(sha1) and os.path.isfile(self._get_path(sha1))
+
+    def fetch(self, sha1, destination):
+        """Place the stored artifact with the given SHA-1 checksum at the destination,
+        replacing any existing file.
+
+        :param str sha1: Hex encoded SHA-1 checksum of the artifact
+        :param str destination: Path to place the artifact at
+        :return: True if the artifact was stored and placed at the destination,
+            false otherwise (including when the checksum is not a valid SHA-1
+            checksum)
+        :rtype: bool
+        """
+        if not _is_sha1(sha1):
+            return False
+
+        path = self._get_path(sha1)
+        try:
+            os.utime(path, None)
+            self._place(path, destination)
+        except (IOError, OSError):
+            # Not stored, or evicted by another process between the two calls
+            return False
+
+        self._logger.debug("Artifact %s found in store %s", sha1, self._root)
+        return True
+
+    def put(self, sha1, source):
+        """Store the artifact at the given path under its SHA-1 checksum, removing
+        the least recently used artifacts if the store becomes too large.
+
+        :param str sha1: Hex encoded SHA-1 checksum of the artifact
+        :param str source: Path of the artifact to store
+        :raises ValueError: If the checksum is not a valid SHA-1 checksum or the
+            artifact doesn't match it
+        """
+        if not _is_sha1(sha1):
+            raise ValueError("Invalid SHA-1 checksum {0!r}".format(sha1))
+
+        path = self._get_path(sha1)
+        if os.path.isfile(path):
+            os.utime(path, None)
+            return
+
+        parent = os.path.dirname(path)
+        if not os.path.isdir(parent):
+            try:
+                os.makedirs(parent)
+            except OSError:
+                # Created by another thread or process
+                pass
+
+        if _hash_file(source) != sha1.lower():
+            raise ValueError("Artifact {0} doesn't match SHA-1 checksum {1}".format(source, sha1))
+
+        self._place(source, path)
+        self._logger.debug("Stored artifact %s in %s", sha1, self._root)
+
+        size = os.path.getsize(path)
+        with self._lock:
+            if self._size is not None:
+                self._size += size
+            over_size = self._size is None or self._size > self._max_size
+        if over_size:
+            self.evict()
+
+    def evict(self):
+        """Remove the least recently used artifacts until the total size of stored
+        artifacts is no more than the maximum size.
+
+        :return: Number of artifacts removed
+        :rtype: int
+        """
+        with self._lock:
+            entries = []
+            total = 0
+            for parent, _, names in os.walk(self._root):
+                for name in names:
+                    if name.startswith('.'):
+                        continue
+                    path = os.path.join(parent, name)
+                    try:
+                        info = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((info.st_mtime, info.st_size, path))
+                    total += info.st_size
+
+            removed = 0
+            entries.sort()
+            for _, size, path in entries:
+                if total <= self._max_size:
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                removed += 1
+            self._size = total
+
+        if removed:
+            self._logger.debug("Evicted %s artifacts from store %s", removed, self._root)
+        return removed
+
+    def _get_path(self, sha1):
+        sha1 = sha1.lower()
+        return os.path.join(self._root, sha1[:2], sha1)
+
+    def _place(self, source, destination):
+        handle, tmp_path = tempfile.mkstemp(prefix='.', dir=os.path.dirname(destination) or '.')
+        os.close(handle)
+        try:
+            if self._hard_links:
+                try:
+                    os.remove(tmp_path)
+                    os.link(source, tmp_path)
+                except OSError:
+                    shutil.copyfile(source, tmp_path)
+            else:
+                shutil.copyfile(source, tmp_path)
+
+            stac.util.replace_file(tmp_path, destination)
+        except (IOError, OSError):
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+
+def _is_sha1(value):
+    # Checksums become paths in the store, so they must not contain anything else
+    return _SHA1_PATTERN.match(value) is not None
+
+
+def _hash_file(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as handle:
+        for chunk in iter(lambda: handle.read(_READ_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
@@ -17,6 +17,7 @@ Miscellaneous utility methods for the Stac library.
 from __future__ import absolute_import
 
 import logging
+import os
 
 
 def get_log():
@@ -26,3 +27,23 @@ def get_log():
     :rtype: logging.Logger
     """
     return logging.getLogger('stac')
+
+
+def replace_file(source, destination):
+    """Rename a file, replacing the destination if it exists.
+
+    The replacement is atomic on POSIX systems. On Python versions before 3.3 on
+    Windows, the destination is removed before the file is renamed.
+
+    :param str source: Path of the file to rename
+    :param str destination: Path to rename the file to
+    :raises OSError: If the file could not be renamed
+    """
+    replace = getattr(os, 'replace', None)
+    if replace is not None:
+        replace(source, destination)
+        return
+
+    if os.name == 'nt' and os.path.exists(destination):  # pragma: no cover
+        os.remove(destination)
+    os.rename(source, destination)
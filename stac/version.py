@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.version
+~~~~~~~~~~~~
+
+Ordering of version numbers using the same rules as Maven (the ``ComparableVersion``
+class of Maven 3).
+
+Versions are split into numeric and string items separated by ``.``, ``-``, or a
+transition between digits and letters. Numeric items are compared as numbers and
+string items are compared as qualifiers, with well known qualifiers ordered as
+``alpha < beta < milestone < rc < snapshot < (release) < sp`` followed by any
+other qualifier in lexical order. As a result, ``1.0-alpha-1 < 1.0-rc1 <
+1.0-SNAPSHOT < 1.0 < 1.0-sp1 < 1.0.1``.
+
+Version ranges use Maven's syntax. A range is one or more comma separated
+restrictions, each of which is a lower and upper bound (either may be left out)
+surrounded by ``[`` or ``]`` when the bound is inclusive and ``(`` or ``)`` when it
+is exclusive, or a single exact version surrounded by ``[]``. For example:
+
+=================  ======================================
+``[1.0]``          Exactly 1.0
+``[1.4,2.0)``      1.4 (inclusive) to 2.0 (exclusive)
+``[2.0,)``         2.0 or newer
+``(,3.0)``         Older than 3.0
+``(,1.1),(1.1,)``  Anything except 1.1
+=================  ======================================
+
+Unlike Maven, where a version without brackets is only a recommendation, a
+version without brackets matches exactly that version. Note that by Maven's rules
+pre-release versions of 3.0 (e.g. ``3.0-rc1`` and ``3.0-SNAPSHOT``) are older
+than 3.0, so ``[2.0,3.0)`` includes them.
+"""
+
+from __future__ import absolute_import
+
+import bisect
+import collections
+import heapq
+
+__all__ = [
+    'version_key',
+    'most_recent',
+    'parse_range',
+    'VersionRange',
+    'VersionIndex'
+]
+
+_QUALIFIERS = ['alpha', 'beta', 'milestone', 'rc', 'snapshot', '', 'sp']
+
+_RELEASE_INDEX = _QUALIFIERS.index('')
+
+_ALIASES = {'ga': '', 'final': '', 'release': '', 'cr': 'rc'}
+
+_SHORT_QUALIFIERS = {'a': 'alpha', 'b': 'beta', 'm': 'milestone'}
+
+# Item types, in the order Maven sorts them when compared to each other
+_STRING, _LIST, _INT = 0, 1, 2
+
+# Maximum number of version strings to keep sort keys for
+_KEY_CACHE_SIZE = 64 * 1024
+
+_keys = {}
+
+
+def version_key(version):
+    """Get a key for sorting the given version number using Maven ordering rules.
+
+    Keys are tuples that can be compared with each other, so this function can be
+    used as the ``key`` argument to ``sorted()``, ``max()``, etc. Keys are cached
+    per version string.
+
+    Maven's own comparison is not transitive for some unusual mixes of qualifiers
+    and numbers (e.g. ``1-alpha`` vs ``1.sp``). Keys produced by this function
+    always give a consistent order, matching Maven for all other versions.
+
+    :param str version: Version number to get a sort key for
+    :return: Sort key for the version
+    :rtype: tuple
+    """
+    key = _keys.get(version)
+    if key is None:
+        if len(_keys) >= _KEY_CACHE_SIZE:
+            _keys.clear()
+        key = _keys[version] = _encode(_parse(version))
+    return key
+
+
+def most_recent(versions, limit):
+    """Get the ``limit`` most recent version numbers ordered most recent to least
+    recent, without sorting all of them.
+
+    :param iterable versions: Version numbers to select from
+    :param int limit: Number of version numbers to select
+    :return: The most recent version numbers
+    :rtype: list
+    """
+    return heapq.nlargest(limit, versions, key=version_key)
+
+
+def parse_range(spec):
+    """Parse a version range in Maven syntax.
+
+    :param str spec: Version range to parse, e.g. ``[1.4,2.0)``
+    :return: The parsed range
+    :rtype: VersionRange
+    :raises ValueError: If the range is not valid
+    """
+    spec = spec.strip()
+    if not spec:
+        raise ValueError("Version range must not be empty")
+    if spec[0] not in '[(':
+        if any(c in spec for c in '[](),'):
+            raise ValueError("Invalid version range {0}".format(spec))
+        return VersionRange(spec, [_Restriction(spec, True, spec, True)])
+
+    restrictions = []
+    remaining = spec
+    while remaining:
+        end = min(i for i in (remaining.find(']'), remaining.find(')'), len(remaining)) if i >= 0)
+        if remaining[0] not in '[(' or end == len(remaining):
+            raise ValueError("Invalid version range {0}".format(spec))
+
+        restrictions.append(_parse_restriction(spec, remaining[:end + 1]))
+        remaining = remaining[end + 1:].strip()
+        if remaining.startswith(','):
+            remaining = remaining[1:].strip()
+            if not remaining:
+                raise ValueError("Invalid version range {0}".format(spec))
+    return VersionRange(spec, restrictions)
+
+
+def _parse_restriction(spec, restriction):
+    lower_inclusive = restriction[0] == '['
+    upper_inclusive = restriction[-1] == ']'
+    bounds = restriction[1:-1].strip()
+
+    if ',' not in bounds:
+        if not bounds or not lower_inclusive or not upper_inclusive:
+            raise ValueError(
+                "Single version must be surrounded by [] in version range {0}".format(spec))
+        return _Restriction(bounds, True, bounds, True)
+
+    lower, _, upper = (bound.strip() for bound in bounds.partition(','))
+    if ',' in upper:
+        raise ValueError("Too many bounds in version range {0}".format(spec))
+    lower, upper = lower or None, upper or None
+    if lower is not None and upper is not None:
+        if version_key(upper) < version_key(lower) or (
+                lower == upper and not (lower_inclusive and upper_inclusive)):
+            raise ValueError("Empty version range {0}".format(spec))
+    return _Restriction(lower, lower_inclusive, upper, upper_inclusive)
+
+
+class _Restriction(object):
+    """Lower and upper bound of versions, either of which may be ``None``."""
+
+    # pylint: disable=too-few-public-methods
+    def __init__(self, lower, lower_inclusive, upper, upper_inclusive):
+        self.lower = lower
+        self.lower_inclusive = lower_inclusive
+        self.upper = upper
+        self.upper_inclusive = upper_inclusive
+        self.lower_key = version_key(lower) if lower is not None else None
+        self.upper_key = version_key(upper) if upper is not None else None
+
+    def contains(self, key):
+        if self.lower_key is not None:
+            if key < self.lower_key or (key == self.lower_key and not self.lower_inclusive):
+                return False
+        if self.upper_key is not None:
+            if key > self.upper_key or (key == self.upper_key and not self.upper_inclusive):
+                return False
+        return True
+
+    def bisect(self, keys):
+        """Get the slice of the sorted keys within this restriction."""
+        start, end = 0, len(keys)
+        if self.lower_key is not None:
+            find = bisect.bisect_left if self.lower_inclusive else bisect.bisect_right
+            start = find(keys, self.lower_key)
+        if self.upper_key is not None:
+            find = bisect.bisect_right if self.upper_inclusive else bisect.bisect_left
+            end = find(keys, self.upper_key)
+        return start, end
+
+
+class VersionRange(object):
+    """Range of versions, parsed from Maven's range syntax by :func:`parse_range`."""
+
+    def __init__(self, spec, restrictions):
+        """Set the restrictions making up the range.
+
+        :param str spec: Range the restrictions were parsed from
+        :param list restrictions: Restrictions, any of which a version may satisfy
+        """
+        self._spec = spec
+        self._restrictions = restrictions
+
+    def contains(self, version):
+        """Is the given version within this range?
+
+        :param str version: Version number to check
+        :rtype: bool
+        """
+        key = version_key(version)
+        return any(restriction.contains(key) for restriction in self._restrictions)
+
+    def __contains__(self, version):
+        return self.contains(version)
+
+    def __str__(self):
+        return self._spec
+
+    def __repr__(self):
+        return 'VersionRange({0!r})'.format(self._spec)
+
+
+class VersionIndex(object):
+    """Versions of an artifact kept sorted by Maven ordering, for finding the most
+    recent version within any number of ranges with a binary search each.
+
+    This class is not thread safe while versions are being added.
+    """
+
+    def __init__(self, versions=()):
+        """Create an index of the given versions.
+
+        :param iterable versions: Version numbers to index, in any order. Duplicates
+            are ignored.
+        """
+        # Keep the given order so that already sorted versions are cheap to sort
+        self._versions = sorted(collections.OrderedDict.fromkeys(versions), key=version_key)
+        self._keys = [version_key(version) for version in self._versions]
+
+    def copy(self):
+        """Get a copy of the index that versions can be added to independently.
+
+        :rtype: VersionIndex
+        """
+        index = VersionIndex()
+        index._versions = list(self._versions)  # pylint: disable=protected-access
+        index._keys = list(self._keys)  # pylint: disable=protected-access
+        return index
+
+    def add(self, version):
+        """Add a version to the index, keeping it sorted. Does nothing if the version
+        is already in the index.
+
+        :param str version: Version number to add
+        :return: True if the version was added
+        :rtype: bool
+        """
+        key = version_key(version)
+        start = bisect.bisect_left(self._keys, key)
+        end = bisect.bisect_right(self._keys, key, start)
+        if version in self._versions[start:end]:
+            return False
+        self._keys.insert(end, key)
+        self._versions.insert(end, version)
+        return True
+
+    def latest(self, version_range=None):
+        """Get the most recent version within a range.
+
+        :param version_range: Range (a :class:`VersionRange` or a string to parse) that
+            the version must be within, or ``None`` for the most recent of all versions.
+        :return: The most recent matching version number or ``None`` if none match
+        :rtype: str
+        :raises ValueError: If the range is a string that is not a valid range
+        """
+        if version_range is None:
+            return self._versions[-1] if self._versions else None
+        if not isinstance(version_range, VersionRange):
+            version_range = parse_range(version_range)
+
+        best = None
+        # pylint: disable=protected-access
+        for restriction in version_range._restrictions:
+            start, end = restriction.bisect(self._keys)
+            if end > start and (best is None or end > best):
+                best = end
+        return self._versions[best - 1] if best is not None else None
+
+    def matching(self, version_range):
+        """Get all versions within a range, most recent first.
+
+        :param version_range: Range (a :class:`VersionRange` or a string to parse) that
+            the versions must be within.
+        :return: Matching version numbers, most recent first
+        :rtype: list
+        :raises ValueError: If the range is a string that is not a valid range
+        """
+        if not isinstance(version_range, VersionRange):
+            version_range = parse_range(version_range)
+
+        indexes = set()
+        # pylint: disable=protected-access
+        for restriction in version_range._restrictions:
+            indexes.update(range(*restriction.bisect(self._keys)))
+        return [self._versions[i] for i in sorted(indexes, reverse=True)]
+
+    def __len__(self):
+        return len(self._versions)
+
+    def __iter__(self):
+        return iter(self._versions)
+
+    def __reversed__(self):
+        return reversed(self._versions)
+
+    def __contains__(self, version):
+        key = version_key(version)
+        start = bisect.bisect_left(self._keys, key)
+        return version in self._versions[start:bisect.bisect_right(self._keys, key, start)]
+
+
+def _parse(version):
+    version = version.lower()
+    root = []
+    current = root
+    lists = [root]
+    is_digit = False
+    start = 0
+
+    for i, char in enumerate(version):
+        if char == '.' or char == '-':
+            if i == start:
+                current.append(0)
+            else:
+                current.append(_new_item(is_digit, version[start:i]))
+            start = i + 1
+
+            if char == '-':
+                current = _new_list(current, lists)
+        elif '0' <= char <= '9':
+            if not is_digit and i > start:
+                current.append(_new_string(version[start:i], True))
+                start = i
+                current = _new_list(current, lists)
+            is_digit = True
+        else:
+            if is_digit and i > start:
+                current.append(int(version[start:i]))
+                start = i
+                current = _new_list(current, lists)
+            is_digit = False
+
+    if len(version) > start:
+        current.append(_new_item(is_digit, version[start:]))
+
+    for items in reversed(lists):
+        _normalize(items)
+    return root
+
+
+def _new_list(parent, lists):
+    items = []
+    parent.append(items)
+    lists.append(items)
+    return items
+
+
+def _new_item(is_digit, value):
+    if is_digit:
+        return int(value)
+    return _new_string(value, False)
+
+
+def _new_string(value, followed_by_digit):
+    if followed_by_digit and len(value) == 1:
+        value = _SHORT_QUALIFIERS.get(value, value)
+    return _ALIASES.get(value, value)
+
+
+def _is_null(item):
+    # 0, "" (a release), and empty lists are all equivalent to a missing item
+    return item == 0 or item == '' or item == []
+
+
+def _normalize(items):
+    # Remove trailing null items, looking past any trailing sub-lists
+    for i in range(len(items) - 1, -1, -1):
+        item = items[i]
+        if _is_null(item):
+            del items[i]
+        elif not isinstance(item, list):
+            break
+
+
+def _encode(items):
+    # Each item is prefixed with the sign of the comparison between the remainder of
+    # the list (starting at that item) and a missing item. This makes comparisons with
+    # shorter versions (tuples ending in the (0,) marker) behave as Maven pads lists.
+    keys = []
+    sign = 0
+    for item in reversed(items):
+        key = _encode_item(item)
+        item_sign = _null_sign(item, key)
+        if item_sign != 0:
+            sign = item_sign
+        keys.append((sign,) + key)
+
+    keys.reverse()
+    keys.append((0,))
+    return tuple(keys)
+
+
+def _encode_item(item):
+    if isinstance(item, list):
+        return (_LIST, _encode(item))
+    if isinstance(item, int):
+        return (_INT, item)
+    if item in _QUALIFIERS:
+        return (_STRING, _QUALIFIERS.index(item), '')
+    return (_STRING, len(_QUALIFIERS), item)
+
+
+def _null_sign(item, key):
+    if isinstance(item, list):
+        return key[1][0][0]
+    if isinstance(item, int):
+        return 1 if item else 0
+    index = key[1]
+    return (index > _RELEASE_INDEX) - (index < _RELEASE_INDEX)
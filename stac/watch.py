@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+#
+# Stac - Smarter Travel Artifactory Client
+#
+# Copyright 2015-2016 Smarter Travel
+#
+# Available under the MIT license. See LICENSE for details.
+#
+
+"""
+stac.watch
+~~~~~~~~~~
+
+Watching artifacts for new versions. A single :class:`ArtifactWatcher` polls any
+number of artifacts from one scheduler thread, polling each artifact more or less
+often depending on how often new versions of it appear, and reports new versions
+via callbacks or as a stream of events.
+"""
+
+from __future__ import absolute_import
+
+# pylint: disable=protected-access
+import concurrent.futures
+import heapq
+import itertools
+import threading
+import timeit
+
+try:
+    import queue
+except ImportError:  # pragma: no cover
+    import Queue as queue
+
+import stac.client
+import stac.metrics
+import stac.util
+
+# Seconds between polls of an artifact that has just had a new version
+DEFAULT_MIN_INTERVAL = 5.0
+
+# Seconds between polls of an artifact that hasn't had a new version in a long time
+DEFAULT_MAX_INTERVAL = 300.0
+
+DEFAULT_WATCH_WORKERS = 4
+
+# Factor to increase the interval between polls by each time nothing changes
+_BACKOFF = 1.5
+
+# Poll about this many times for each typical interval between new versions
+_POLLS_PER_RELEASE = 10
+
+# Weight given to the most recent interval between new versions when averaging
+_GAP_WEIGHT = 0.3
+
+# Put on the event queue to stop iteration once the watcher is closed
+_CLOSED = object()
+
+
+# pylint: disable=too-many-arguments
+def new_maven_watcher(base_url, repo, is_snapshot=False, username=None, password=None,
+                      min_interval=DEFAULT_MIN_INTERVAL, max_interval=DEFAULT_MAX_INTERVAL,
+                      max_workers=DEFAULT_WATCH_WORKERS, connect_timeout=None,
+                      read_timeout=None, retry_policy=None, metrics=None):
+    """Get a new :class:`ArtifactWatcher` for artifacts in a Maven repository, optionally
+    using the provided authentication.
+
+    For example:
+
+    >>> with new_maven_watcher('https://www.example.com/artifactory', 'libs-release') as watcher:
+    ...     watcher.watch('com.example.users.service', current='1.6.0')
+    ...     for event in watcher.events():
+    ...         print(event.name, event.version)
+    com.example.users.service 1.6.1
+
+    :param str base_url: URL to root of the Artifactory installation. Example,
+        "https://artifactory.example.com/artifactory".
+    :param str repo: Which repository should be watched. Example, "libs-release-local".
+    :param bool is_snapshot: Does the repository contain SNAPSHOT (a.k.a. integration)
+        versions? Default is ``False``
+    :param str username: Optional username for authentication when making API calls.
+    :param str password: Optional password for authentication when making API calls.
+    :param float min_interval: Seconds between polls of artifacts that have just had a
+        new version. Default is 5 seconds.
+    :param float max_interval: Most seconds between polls of artifacts that rarely have
+        new versions. Default is 5 minutes.
+    :param int max_workers: Maximum number of artifacts to poll concurrently. Default is 4.
+    :param float connect_timeout: Seconds to wait to establish a connection to Artifactory.
+        Default is to wait forever.
+    :param float read_timeout: Seconds to wait for Artifactory to send data once connected.
+        Default is to wait forever.
+    :param stac.retry.RetryPolicy retry_policy: Optional policy for retrying polls that fail
+        because of transient errors. Default is not to retry.
+    :param stac.metrics.MetricsSink metrics: Optional sink to record metrics about polls and
+        requests to Artifactory to. Default is not to record metrics.
+    :return: New watcher, not watching any artifacts yet
+    :rtype: ArtifactWatcher
+    """
+    import stac.http
+
+    session = stac.http.new_session(
+        username=username, password=password, pool_maxsize=max_workers)
+
+    timeout = None
+    if connect_timeout is not None or read_timeout is not None:
+        timeout = (connect_timeout, read_timeout)
+
+    dao = stac.http.VersionApiDao(
+        session, base_url, repo, timeout=timeout, retry_policy=retry_policy, metrics=metrics)
+    return ArtifactWatcher(
+        dao, is_integration=is_snapshot, min_interval=min_interval, max_interval=max_interval,
+        max_workers=max_workers, metrics=metrics)
+
+
+# pylint: disable=too-few-public-methods
+class VersionEvent(object):
+    """New version of a watched artifact."""
+
+    def __init__(self, name, version, previous):
+        #: Fully qualified name of the artifact.
+        self.name = name
+
+        #: New most recent version of the artifact.
+        self.version = version
+
+        #: Previous most recent version of the artifact, or ``None`` if it had no versions.
+        self.previous = previous
+
+    def __repr__(self):
+        return 'VersionEvent({0!r}, {1!r}, {2!r})'.format(self.name, self.version, self.previous)
+
+
+class _Watch(object):
+    """State of a single watched artifact."""
+
+    # pylint: disable=too-many-arguments,too-many-instance-attributes
+    def __init__(self, name, callback, remote, current, interval):
+        self.name = name
+        self.group, self.artifact = stac.client._parse_full_name(name)
+        self.callback = callback
+        self.remote = remote
+        self.version = current
+        self.observed = current is not None
+        self.validators = None
+        self.interval = interval
+        self.changed_at = None
+        self.mean_gap = None
+
+    def update_interval(self, changed, now, min_interval, max_interval):
+        """Pick the interval until the next poll based on whether the version just
+        changed and how often it has changed before.
+        """
+        if changed:
+            if self.changed_at is not None:
+                gap = now - self.changed_at
+                if self.mean_gap is None:
+                    self.mean_gap = gap
+                else:
+                    self.mean_gap = _GAP_WEIGHT * gap + (1 - _GAP_WEIGHT) * self.mean_gap
+            self.changed_at = now
+            # New versions tend to be followed by more (e.g. fixes), check again soon
+            self.interval = min_interval
+            return
+
+        ceiling = max_interval
+        if self.mean_gap is not None:
+            ceiling = min(max_interval, max(min_interval, self.mean_gap / _POLLS_PER_RELEASE))
+        self.interval = min(self.interval * _BACKOFF, ceiling)
+
+
+class ArtifactWatcher(object):
+    """Watcher that polls artifacts for new versions, reporting each new version via
+    a callback or as a :class:`VersionEvent` from :meth:`events`.
+
+    All artifacts are scheduled from a single thread and polled using a shared pool
+    of worker threads. Each artifact is polled again ``min_interval`` seconds after a
+    new version of it is seen. While nothing changes, the interval grows up to
+    ``max_interval`` seconds, or up to a tenth of the average time between its new
+    versions if that is shorter, so artifacts that are released often are checked
+    often and the rest hardly at all.
+
+    When the DAO supports them (see
+    :meth:`stac.http.VersionApiDao.get_most_recent_version_if_changed`), conditional
+    requests are used so that polls of unchanged artifacts are cheap.
+
+    Errors polling an artifact are logged and the artifact is polled again later.
+    An artifact that doesn't exist yet is treated as having no versions, so artifacts
+    can be watched before their first release.
+
+    This class is thread safe.
+    """
+
+    _logger = stac.util.get_log()
+
+    # pylint: disable=too-many-arguments
+    def __init__(self, dao, is_integration=False, min_interval=DEFAULT_MIN_INTERVAL,
+                 max_interval=DEFAULT_MAX_INTERVAL, max_workers=DEFAULT_WATCH_WORKERS,
+                 metrics=None, clock=timeit.default_timer):
+        """Set the DAO to poll versions with and how often to poll.
+
+        :param dao: DAO to get versions from, typically a :class:`stac.http.VersionApiDao`.
+            Caching DAOs should not be used since they hide new versions.
+        :param bool is_integration: Watch for new integration versions instead of releases?
+            Default is false.
+        :param float min_interval: Seconds between polls of artifacts that have just had a
+            new version.
+        :param float max_interval: Most seconds between polls of artifacts that rarely have
+            new versions.
+        :param int max_workers: Maximum number of artifacts to poll concurrently.
+        :param stac.metrics.MetricsSink metrics: Optional sink to record the result of each
+            poll to. Default is not to record metrics.
+        :param callable clock: Function returning the current time in seconds. Only
+            useful for testing.
+        :raises ValueError: If the intervals are not positive or the minimum interval is
+            greater than the maximum
+        """
+        if min_interval <= 0 or max_interval <= 0:
+            raise ValueError("Poll intervals must be positive")
+        if min_interval > max_interval:
+            raise ValueError("Minimum poll interval must not be greater than the maximum")
+
+        self._dao = dao
+        self._is_integration = is_integration
+        self._conditional = hasattr(dao, 'get_most_recent_version_if_changed')
+        self._min_interval = min_interval
+        self._max_interval = max_interval
+        self._metrics = stac.metrics.get_sink(metrics)
+        self._clock = clock
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=max_workers)
+        self._events = queue.Queue()
+        self._watches = {}
+        self._schedule = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._closed = False
+
+    def watch(self, full_name, callback=None, remote=False, current=None):
+        """Start watching an artifact for new versions, replacing any existing watch
+        of it. The artifact is polled right away.
+
+        :param str full_name: Fully qualified name of the artifact to watch
+        :param callable callback: Function to call with a :class:`VersionEvent` for each
+            new version, from a worker thread. Default is to make events available from
+            :meth:`events` instead.
+        :param bool remote: Should remote repositories be searched for new versions?
+            Default is false.
+        :param str current: Most recent version already known about, if any. If the
+            first poll finds a different version, that's reported as a new version.
+            Default is to only report versions that appear after the first poll.
+        :raises RuntimeError: If the watcher has been closed
+        """
+        watch = _Watch(full_name, callback, remote, current, self._min_interval)
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Watcher has been closed")
+            self._watches[full_name] = watch
+            self._push(watch, self._clock())
+
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='stac-watcher')
+                self._thread.daemon = True
+                self._thread.start()
+
+    def unwatch(self, full_name):
+        """Stop watching an artifact for new versions. Does nothing if the artifact
+        is not being watched.
+
+        :param str full_name: Fully qualified name of the artifact
+        """
+        with self._condition:
+            self._watches.pop(full_name, None)
+
+    def get_interval(self, full_name):
+        """Get the current number of seconds between polls of a watched artifact.
+
+        :param str full_name: Fully qualified name of the artifact
+        :return: Seconds between polls
+        :rtype: float
+        :raises KeyError: If the artifact is not being watched
+        """
+        with self._condition:
+            return self._watches[full_name].interval
+
+    def events(self, timeout=None):
+        """Get new versions of artifacts watched without a callback, as they are found.
+
+        Iteration ends when the watcher is closed, or if no new version is found for
+        ``timeout`` seconds.
+
+        :param float timeout: Seconds to wait for each new version. Default is to wait
+            until the watcher is closed.
+        :return: Generator of :class:`VersionEvent` instances
+        """
+        while True:
+            try:
+                event = self._events.get(timeout=timeout)
+            except queue.Empty:
+                return
+            if event is _CLOSED:
+                # Leave the marker for any other iterators
+                self._events.put(_CLOSED)
+                return
+            yield event
+
+    def close(self):
+        """Stop watching all artifacts, waiting for any polls in progress to complete."""
+        with self._condition:
+            self._closed = True
+            self._watches.clear()
+            self._condition.notify_all()
+            thread = self._thread
+
+        if thread is not None:
+            thread.join()
+        self._executor.shutdown(wait=True)
+        self._events.put(_CLOSED)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def _push(self, watch, due):
+        heapq.heappush(self._schedule, (due, next(self._sequence), watch))
+        self._condition.notify_all()
+
+    def _run(self):
+        with self._condition:
+            while not self._closed:
+                if not self._schedule:
+                    self._condition.wait()
+                    continue
+
+                due, _, watch = self._schedule[0]
+                delay = due - self._clock()
+                if delay > 0:
+                    self._condition.wait(delay)
+                    continue
+
+                heapq.heappop(self._schedule)
+                # Skip artifacts that have since been unwatched or watched again
+                if self._watches.get(watch.name) is watch:
+                    self._executor.submit(self._poll, watch)
+
+    def _poll(self, watch):
+        event = None
+        changed = False
+        try:
+            result = self._fetch(watch)
+            if result is None:
+                outcome = 'not_modified'
+            else:
+                version, watch.validators = result
+                changed = watch.observed and version != watch.version
+                if changed:
+                    event = VersionEvent(watch.name, version, watch.version)
+                outcome = 'changed' if changed else 'unchanged'
+                watch.version = version
+                watch.observed = True
+        except Exception as e:  # pylint: disable=broad-except
+            self._logger.warning("Could not poll %s for new versions: %s", watch.name, e)
+            outcome = 'error'
+
+        self._metrics.increment('stac_watch_polls_total', labels={'result': outcome})
+        now = self._clock()
+        with self._condition:
+            watch.update_interval(changed, now, self._min_interval, self._max_interval)
+            if not self._closed and self._watches.get(watch.name) is watch:
+                self._push(watch, now + watch.interval)
+
+        if event is not None:
+            self._logger.info("New version %s of %s", event.version, event.name)
+            self._notify(watch, event)
+
+    def _fetch(self, watch):
+        try:
+            if self._conditional:
+                return self._dao.get_most_recent_version_if_changed(
+                    watch.group, watch.artifact, validators=watch.validators, remote=watch.remote,
+                    integration=self._is_integration)
+
+            if self._is_integration:
+                versions = self._dao.get_most_recent_versions(
+                    watch.group, watch.artifact, 1, remote=watch.remote, integration=True)
+                return (versions[0] if versions else None), None
+            return self._dao.get_most_recent_release(
+                watch.group, watch.artifact, remote=watch.remote), None
+        except Exception as e:  # pylint: disable=broad-except
+            if stac.client._is_not_found(e):
+                return None, None
+            raise
+
+    def _notify(self, watch, event):
+        if watch.callback is None:
+            self._events.put(event)
+            return
+        try:
+            watch.callback(event)
+        except Exception:  # pylint: disable=broad-except
+            self._logger.exception("Error in callback for new version of %s", watch.name)
@@ -0,0 +1,206 @@
+# -*- coding: utf-8 -*-
+
+"""Fake Artifactory server for benchmarks.
+
+Serves enough of the Artifactory API (latest version search, version search, AQL
+search, and artifact downloads with checksum headers and range requests) for Stac
+to be used against it, with configurable latency, number of versions per artifact,
+and artifact size. It runs in a separate process so that its CPU time and memory
+use don't count against Stac in benchmarks.
+"""
+
+import hashlib
+import json
+import multiprocessing
+import socketserver
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from urllib.parse import urlparse
+
+CONTEXT = '/artifactory'
+
+REPO = 'libs-release'
+
+# Number of bytes of an artifact to write at a time
+_WRITE_SIZE = 64 * 1024
+
+
+class Settings(object):
+    """Behavior of the fake server."""
+
+    def __init__(self, latency=0.0, versions=100, payload_size=1024 * 1024):
+        #: Seconds to wait before responding to each request.
+        self.latency = latency
+
+        #: Number of versions (releases and snapshots) of each artifact.
+        self.versions = versions
+
+        #: Size in bytes of each artifact.
+        self.payload_size = payload_size
+
+
+def get_versions(count):
+    """Get the versions the fake server has of every artifact, oldest first. Every
+    tenth version is a snapshot.
+    """
+    versions = []
+    for i in range(count):
+        version = '{0}.{1}.{2}'.format(i // 1000 + 1, i // 100 % 10, i % 100)
+        if i % 10 == 9:
+            version += '-SNAPSHOT'
+        versions.append(version)
+    return versions
+
+
+class _Server(socketserver.ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, settings):
+        HTTPServer.__init__(self, address, _Handler)
+        self.settings = settings
+        self.versions = get_versions(settings.versions)
+        self.releases = [v for v in self.versions if not v.endswith('-SNAPSHOT')]
+        self.payload = (bytes(range(256)) * (settings.payload_size // 256 + 1))
+        self.payload = self.payload[:settings.payload_size]
+        self.checksums = {
+            'X-Checksum-Sha256': hashlib.sha256(self.payload).hexdigest(),
+            'X-Checksum-Sha1': hashlib.sha1(self.payload).hexdigest(),
+            'X-Checksum-Md5': hashlib.md5(self.payload).hexdigest(),
+        }
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and bodies are written separately, avoid waiting for delayed ACKs between them
+    disable_nagle_algorithm = True
+
+    # pylint: disable=invalid-name
+    def do_GET(self):
+        self._handle(body=True)
+
+    def do_HEAD(self):
+        self._handle(body=False)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        query = self.rfile.read(length).decode('utf-8')
+        self._delay()
+
+        snapshots = '"$match"' in query
+        matching = [v for v in self.server.versions if v.endswith('-SNAPSHOT') == snapshots]
+        # Versions are deployed in order, a version's position is its deployment time
+        results = [{'name': v, 'created': i} for i, v in reversed(list(enumerate(matching)))]
+        if '"$gte": ' in query:
+            since = int(query.split('"$gte": ', 1)[1].split('}', 1)[0])
+            results = [item for item in results if item['created'] >= since]
+        if '.limit(' in query:
+            results = results[:int(query.rsplit('.limit(', 1)[-1].rstrip(')'))]
+        self._send_json({'results': results, 'range': {'total': len(results)}})
+
+    def log_message(self, *args):  # pylint: disable=arguments-differ
+        pass
+
+    def _handle(self, body):
+        self._delay()
+        path = urlparse(self.path).path
+        if path.startswith(CONTEXT):
+            path = path[len(CONTEXT):]
+
+        if path == '/api/search/latestVersion':
+            self._send(200, self.server.releases[-1].encode('utf-8'), 'text/plain', body=body)
+        elif path == '/api/search/versions':
+            results = [
+                {'version': v, 'integration': v.endswith('-SNAPSHOT')}
+                for v in self.server.versions]
+            self._send_json({'results': results}, body=body)
+        elif path.startswith('/' + REPO + '/'):
+            self._send_artifact(body)
+        else:
+            self._send(404, b'Not found', 'text/plain', body=body)
+
+    def _delay(self):
+        if self.server.settings.latency:
+            time.sleep(self.server.settings.latency)
+
+    def _send_json(self, data, body=True):
+        self._send(200, json.dumps(data).encode('utf-8'), 'application/json', body=body)
+
+    def _send(self, status, content, content_type, body=True):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if body:
+            self.wfile.write(content)
+
+    def _send_artifact(self, body):
+        payload = self.server.payload
+        start, end = 0, len(payload) - 1
+        status = 200
+
+        requested = self.headers.get('Range')
+        if requested and requested.startswith('bytes='):
+            first, _, last = requested[len('bytes='):].partition('-')
+            start = int(first)
+            end = min(int(last), end) if last else end
+            status = 206
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/java-archive')
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        if status == 206:
+            self.send_header('Content-Range', 'bytes {0}-{1}/{2}'.format(start, end, len(payload)))
+        for name, value in self.server.checksums.items():
+            self.send_header(name, value)
+        self.end_headers()
+
+        if body:
+            view = memoryview(payload)
+            for offset in range(start, end + 1, _WRITE_SIZE):
+                self.wfile.write(view[offset:min(offset + _WRITE_SIZE, end + 1)])
+
+
+def _serve(settings, ready):
+    server = _Server(('127.0.0.1', 0), settings)
+    ready.send(server.server_address[1])
+    ready.close()
+    server.serve_forever()
+
+
+class FakeArtifactory(object):
+    """Fake Artifactory server running in a child process.
+
+    Use as a context manager to start and stop the server.
+    """
+
+    def __init__(self, settings=None):
+        self.settings = settings or Settings()
+        self.url = None
+        self._process = None
+
+    def start(self):
+        """Start the server, returning the base URL of the fake Artifactory installation."""
+        receiver, sender = multiprocessing.Pipe(duplex=False)
+        self._process = multiprocessing.Process(target=_serve, args=(self.settings, sender))
+        self._process.daemon = True
+        self._process.start()
+        port = receiver.recv()
+        self.url = 'http://127.0.0.1:{0}{1}'.format(port, CONTEXT)
+        return self.url
+
+    def stop(self):
+        """Stop the server."""
+        if self._process is not None:
+            self._process.terminate()
+            self._process.join()
+            self._process = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
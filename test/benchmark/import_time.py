@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark of the time taken to import Stac and start using it.
+
+Each scenario is run in a fresh interpreter (like a short lived deploy hook would
+be) and times importing Stac and performing a single operation that makes no
+network requests, reporting the 50th and 99th percentile time taken and which
+heavy dependencies ended up being imported.
+
+Usage::
+
+    python test/benchmark/import_time.py [--runs N]
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..')
+
+# Dependencies that are slow to import and should only be loaded when needed
+HEAVY_MODULES = ['requests', 'aiohttp', 'concurrent.futures', 'stac.cache', 'stac.store']
+
+SCENARIOS = collections.OrderedDict([
+    ('import_api', "import stac.api"),
+    ('url_generation', (
+        "import stac.api\n"
+        "generator = stac.api.MavenArtifactUrlGenerator(\n"
+        "    'https://www.example.com/artifactory', 'libs-release')\n"
+        "generator.get_url('com.example.services', 'mail', 'jar', '1.2.3', None)")),
+    ('new_maven_client', (
+        "import stac.api\n"
+        "client = stac.api.new_maven_client(\n"
+        "    'https://www.example.com/artifactory', 'libs-release')\n"
+        "client.get_version_url('com.example.services.mail', 'jar', '1.2.3')")),
+])
+
+_TEMPLATE = """
+import json, sys, timeit
+start = timeit.default_timer()
+{code}
+elapsed = timeit.default_timer() - start
+print(json.dumps([elapsed, [name for name in {heavy!r} if name in sys.modules]]))
+"""
+
+
+def run(code):
+    """Run code in a fresh interpreter, returning the seconds taken and the heavy
+    modules imported.
+    """
+    output = subprocess.check_output(
+        [sys.executable, '-c', _TEMPLATE.format(code=code, heavy=HEAVY_MODULES)], cwd=ROOT)
+    return json.loads(output.decode('utf-8'))
+
+
+def percentile(values, percent):
+    index = max(0, int(round(len(values) * percent / 100.0)) - 1)
+    return values[index]
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmark the time taken to import Stac")
+    parser.add_argument('--runs', type=int, default=20,
+                        help="Number of fresh interpreters to run each scenario in (default 20)")
+    options = parser.parse_args(args)
+
+    print('{0:<20} {1:>10} {2:>10}  {3}'.format('scenario', 'p50 ms', 'p99 ms', 'heavy imports'))
+    for name, code in SCENARIOS.items():
+        times = []
+        imported = []
+        for _ in range(options.runs):
+            elapsed, imported = run(code)
+            times.append(elapsed * 1000)
+
+        times.sort()
+        print('{0:<20} {1:>10.2f} {2:>10.2f}  {3}'.format(
+            name, percentile(times, 50), percentile(times, 99), ', '.join(imported) or '-'))
+
+
+if __name__ == '__main__':
+    main()
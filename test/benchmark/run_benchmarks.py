@@ -0,0 +1,267 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmarks of Stac clients against a local fake Artifactory server.
+
+Each benchmark repeats an operation (e.g. looking up the latest version of an
+artifact) and reports the number of operations per second, the 50th and 99th
+percentile latency of each operation, and the peak memory allocated by Python
+while performing the operation.
+
+Usage::
+
+    python test/benchmark/run_benchmarks.py [--latency MS] [--versions N] ... [NAME ...]
+
+Run with ``--help`` for all options. Pass the names of benchmarks to run only
+those, by default all benchmarks are run.
+"""
+
+from __future__ import print_function
+
+import argparse
+import collections
+import json
+import os
+import shutil
+import sys
+import tempfile
+import timeit
+import tracemalloc
+
+from fake_artifactory import FakeArtifactory, REPO, Settings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+
+import stac.api  # pylint: disable=wrong-import-position
+
+# Number of times each operation is run while measuring memory use
+MEMORY_ITERATIONS = 5
+
+BENCHMARKS = collections.OrderedDict()
+
+
+def benchmark(name):
+    """Register a benchmark setup function under the given name.
+
+    Setup functions are called with the URL of the fake server, the parsed command
+    line options, and a temporary directory. They return the operation to benchmark
+    as a function that takes no arguments.
+    """
+    def register(func):
+        BENCHMARKS[name] = func
+        return func
+    return register
+
+
+def artifact_name(i):
+    return 'com.example.services.service{0}'.format(i)
+
+
+@benchmark('get_latest_version')
+def setup_get_latest_version(url, options, _):
+    client = stac.api.new_maven_client(url, REPO)
+    return lambda: client.get_latest_version(artifact_name(0))
+
+
+@benchmark('get_latest_version_refreshing')
+def setup_get_latest_version_refreshing(url, options, _):
+    # Results expire almost immediately and are refreshed in the background
+    client = stac.api.new_maven_client(url, REPO, cache_ttl=0.01, cache_stale_ttl=60)
+    return lambda: client.get_latest_version(artifact_name(0))
+
+
+@benchmark('get_latest_versions')
+def setup_get_latest_versions(url, options, _):
+    client = stac.api.new_maven_client(url, REPO)
+    return lambda: client.get_latest_versions(artifact_name(0), limit=options.limit)
+
+
+@benchmark('get_latest_versions_streaming')
+def setup_get_latest_versions_streaming(url, options, _):
+    client = stac.api.new_maven_client(url, REPO, streaming=True)
+    return lambda: client.get_latest_versions(artifact_name(0), limit=options.limit)
+
+
+@benchmark('get_latest_versions_aql')
+def setup_get_latest_versions_aql(url, options, _):
+    client = stac.api.new_maven_client(url, REPO, use_aql=True)
+    return lambda: client.get_latest_versions(artifact_name(0), limit=options.limit)
+
+
+@benchmark('get_latest_versions_indexed')
+def setup_get_latest_versions_indexed(url, options, _):
+    # Every lookup refreshes the index with the versions deployed since the last one
+    client = stac.api.new_maven_client(url, REPO, use_aql=True, index_interval=0)
+    return lambda: client.get_latest_versions(artifact_name(0), limit=options.limit)
+
+
+@benchmark('get_latest_versions_multi_repo')
+def setup_get_latest_versions_multi_repo(url, options, _):
+    # The fake server has the same versions in every repository
+    client = stac.api.new_maven_client(url, [REPO, 'libs-staging', 'libs-team'])
+    return lambda: client.get_latest_versions(artifact_name(0), limit=options.limit)
+
+
+@benchmark('get_latest_versions_many')
+def setup_get_latest_versions_many(url, options, _):
+    client = stac.api.new_maven_client(url, REPO, pool_maxsize=options.concurrency)
+    names = [artifact_name(i) for i in range(options.batch_size)]
+    return lambda: client.get_latest_versions_many(names)
+
+
+@benchmark('download_version')
+def setup_download_version(url, options, tmpdir):
+    client = stac.api.new_maven_client(url, REPO)
+    path = os.path.join(tmpdir, 'service.jar')
+    return lambda: client.download_version(artifact_name(0), 'jar', '1.0.0', path)
+
+
+@benchmark('download_version_segments')
+def setup_download_version_segments(url, options, tmpdir):
+    client = stac.api.new_maven_client(url, REPO, download_segments=options.concurrency)
+    client._downloader._min_segment_size = 1024 * 1024  # pylint: disable=protected-access
+    path = os.path.join(tmpdir, 'service.jar')
+    return lambda: client.download_version(artifact_name(0), 'jar', '1.0.0', path)
+
+
+@benchmark('resolve_versions')
+def setup_resolve_versions(url, options, _):
+    # A range per minor version, all resolved with a single lookup
+    client = stac.api.new_maven_client(url, REPO)
+    ranges = ['[1.{0},1.{1})'.format(i % 10, i % 10 + 1) for i in range(options.batch_size)]
+    return lambda: client.resolve_versions(artifact_name(0), ranges)
+
+
+@benchmark('resolve_versions_indexed')
+def setup_resolve_versions_indexed(url, options, _):
+    client = stac.api.new_maven_client(url, REPO, use_aql=True, index_interval=0)
+    ranges = ['[1.{0},1.{1})'.format(i % 10, i % 10 + 1) for i in range(options.batch_size)]
+    return lambda: client.resolve_versions(artifact_name(0), ranges)
+
+
+def url_artifacts(options):
+    """Get the artifacts to generate URLs of in URL generation benchmarks: every
+    packaging and descriptor of the most recent versions of a batch of artifacts.
+    """
+    versions = ['1.0.{0}'.format(i) for i in range(options.limit)]
+    return [
+        (artifact_name(i), packaging, version, descriptor)
+        for i in range(options.batch_size)
+        for version in versions
+        for packaging in ('jar', 'pom')
+        for descriptor in (None, 'sources')]
+
+
+@benchmark('get_version_url')
+def setup_get_version_url(url, options, _):
+    client = stac.api.new_maven_client(url, REPO)
+    artifacts = url_artifacts(options)
+    return lambda: [client.get_version_url(*artifact) for artifact in artifacts]
+
+
+@benchmark('get_version_urls')
+def setup_get_version_urls(url, options, _):
+    client = stac.api.new_maven_client(url, REPO)
+    artifacts = url_artifacts(options)
+    return lambda: list(client.get_version_urls(artifacts))
+
+
+def percentile(values, percent):
+    """Get the given percentile of a sorted list of values using the nearest rank."""
+    index = max(0, int(round(len(values) * percent / 100.0)) - 1)
+    return values[index]
+
+
+def measure(operation, iterations, warmup):
+    """Run an operation repeatedly, returning the throughput, latency, and peak
+    memory use of it.
+    """
+    for _ in range(warmup):
+        operation()
+
+    latencies = []
+    start = timeit.default_timer()
+    for _ in range(iterations):
+        before = timeit.default_timer()
+        operation()
+        latencies.append(timeit.default_timer() - before)
+    elapsed = timeit.default_timer() - start
+
+    # Measured separately since tracing allocations slows everything down
+    tracemalloc.start()
+    for _ in range(min(iterations, MEMORY_ITERATIONS)):
+        operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    return collections.OrderedDict([
+        ('iterations', iterations),
+        ('ops_per_sec', iterations / elapsed),
+        ('p50_ms', percentile(latencies, 50) * 1000),
+        ('p99_ms', percentile(latencies, 99) * 1000),
+        ('peak_memory_kib', peak / 1024.0),
+    ])
+
+
+def parse_options(args):
+    parser = argparse.ArgumentParser(description="Benchmark Stac against a fake Artifactory server")
+    parser.add_argument('names', nargs='*', metavar='NAME',
+                        help="Benchmarks to run: " + ', '.join(BENCHMARKS) + ". Default is all.")
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help="Milliseconds the server waits before each response (default 0)")
+    parser.add_argument('--versions', type=int, default=1000,
+                        help="Number of versions of each artifact (default 1000)")
+    parser.add_argument('--payload-size', type=int, default=4 * 1024 * 1024,
+                        help="Size of each artifact in bytes (default 4 MiB)")
+    parser.add_argument('--limit', type=int, default=5,
+                        help="Number of versions to get in version lookups (default 5)")
+    parser.add_argument('--batch-size', type=int, default=100,
+                        help="Number of artifacts to resolve in batch lookups (default 100)")
+    parser.add_argument('--concurrency', type=int, default=10,
+                        help="Concurrent requests for batch lookups and segmented downloads "
+                             "(default 10)")
+    parser.add_argument('--iterations', type=int, default=100,
+                        help="Number of times to run each operation (default 100)")
+    parser.add_argument('--warmup', type=int, default=5,
+                        help="Number of times to run each operation before measuring (default 5)")
+    parser.add_argument('--json', action='store_true',
+                        help="Output results as JSON lines instead of a table")
+
+    options = parser.parse_args(args)
+    unknown = [name for name in options.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error("Unknown benchmarks: " + ', '.join(unknown))
+    return options
+
+
+def main(args=None):
+    options = parse_options(args)
+    names = options.names or list(BENCHMARKS)
+    settings = Settings(
+        latency=options.latency / 1000.0, versions=options.versions,
+        payload_size=options.payload_size)
+
+    if not options.json:
+        print('{0:<32} {1:>10} {2:>10} {3:>10} {4:>14}'.format(
+            'benchmark', 'ops/sec', 'p50 ms', 'p99 ms', 'peak mem KiB'))
+
+    tmpdir = tempfile.mkdtemp()
+    try:
+        with FakeArtifactory(settings) as server:
+            for name in names:
+                operation = BENCHMARKS[name](server.url, options, tmpdir)
+                result = measure(operation, options.iterations, options.warmup)
+
+                if options.json:
+                    row = collections.OrderedDict([('benchmark', name)] + list(result.items()))
+                    print(json.dumps(row))
+                else:
+                    print('{0:<32} {ops_per_sec:>10.1f} {p50_ms:>10.2f} {p99_ms:>10.2f} '
+                          '{peak_memory_kib:>14.1f}'.format(name, **result))
+                sys.stdout.flush()
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+import sys
+
+import pytest
+
+collect_ignore = []
+
+if sys.version_info < (3, 5):
+    # The asyncio based client uses syntax that requires Python 3.5 or newer
+    collect_ignore.append('test_aio.py')
+
+
+class FakeClock(object):
+    """Clock that only moves when ``now`` is changed."""
+
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
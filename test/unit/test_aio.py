@@ -0,0 +1,221 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import asyncio
+
+import mock
+import pytest
+
+aiohttp = pytest.importorskip('aiohttp')
+
+
+class FakeVersionDao(object):
+    def __init__(self, release=None, versions=None, error=None):
+        self.release = release
+        self.versions = versions
+        self.error = error
+
+    async def get_most_recent_release(self, group, artifact, remote=False):
+        if self.error is not None:
+            raise self.error
+        return self.release
+
+    async def get_most_recent_versions(self, group, artifact, limit, remote=False,
+                                       integration=False):
+        if self.error is not None:
+            raise self.error
+        return self.versions[:limit]
+
+
+class FakeResponse(object):
+    def __init__(self, status=200, text='', json=None):
+        self.status = status
+        self._text = text
+        self._json = json
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        return False
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(mock.Mock(), (), status=self.status)
+
+    async def text(self):
+        return self._text
+
+    async def json(self, content_type='application/json'):
+        return self._json
+
+
+def new_client(dao, is_integration=False):
+    from stac.aio import AsyncGenericArtifactoryClient
+    from stac.client import GenericArtifactoryClientConfig, MavenArtifactUrlGenerator
+
+    config = GenericArtifactoryClientConfig()
+    config.is_integration = is_integration
+    config.http_dao = dao
+    config.url_generator = MavenArtifactUrlGenerator(
+        'https://www.example.com/artifactory', 'libs-release')
+    return AsyncGenericArtifactoryClient(config)
+
+
+def not_found():
+    return aiohttp.ClientResponseError(mock.Mock(), (), status=404)
+
+
+class TestAsyncGenericArtifactoryClient(object):
+    def test_get_version_url(self):
+        client = new_client(FakeVersionDao())
+        url = client.get_version_url('com.example.services.login', 'jar', '3.9.1')
+
+        assert ('https://www.example.com/artifactory/libs-release/'
+                'com/example/services/login/3.9.1/login-3.9.1.jar') == url
+
+    def test_get_latest_version_release(self):
+        client = new_client(FakeVersionDao(release='4.13.4'))
+        assert '4.13.4' == asyncio.run(client.get_latest_version('com.example.users.service'))
+
+    def test_get_latest_version_release_no_results(self):
+        from stac.exceptions import NoMatchingVersionsError
+        client = new_client(FakeVersionDao(error=not_found()))
+
+        with pytest.raises(NoMatchingVersionsError):
+            asyncio.run(client.get_latest_version('com.example.users.service'))
+
+    def test_get_latest_version_snapshot(self):
+        client = new_client(FakeVersionDao(versions=['1.3.0-SNAPSHOT']), is_integration=True)
+        assert '1.3.0-SNAPSHOT' == asyncio.run(
+            client.get_latest_version('com.example.users.service'))
+
+    def test_get_latest_version_snapshot_only_release_results(self):
+        from stac.exceptions import NoMatchingVersionsError
+        client = new_client(FakeVersionDao(versions=[]), is_integration=True)
+
+        with pytest.raises(NoMatchingVersionsError):
+            asyncio.run(client.get_latest_version('com.example.users.service'))
+
+    def test_get_latest_version_other_error(self):
+        error = aiohttp.ClientResponseError(mock.Mock(), (), status=500)
+        client = new_client(FakeVersionDao(error=error))
+
+        with pytest.raises(aiohttp.ClientResponseError):
+            asyncio.run(client.get_latest_version('com.example.users.service'))
+
+    def test_get_latest_versions_bad_limit(self):
+        client = new_client(FakeVersionDao())
+
+        with pytest.raises(ValueError):
+            asyncio.run(client.get_latest_versions('com.example.users.service', limit=0))
+
+    def test_get_latest_versions_release(self):
+        client = new_client(FakeVersionDao(versions=['1.2.1', '1.2.0', '1.1.1']))
+        versions = asyncio.run(client.get_latest_versions('com.example.users.service', limit=2))
+
+        assert ['1.2.1', '1.2.0'] == versions
+
+    def test_get_latest_versions_no_results(self):
+        from stac.exceptions import NoMatchingVersionsError
+        client = new_client(FakeVersionDao(error=not_found()))
+
+        with pytest.raises(NoMatchingVersionsError):
+            asyncio.run(client.get_latest_versions('com.example.users.service'))
+
+    def test_resolve_versions(self):
+        from stac.exceptions import NoMatchingVersionsError
+        client = new_client(FakeVersionDao(versions=['2.1.0', '2.0.0', '1.4.7', '1.4.0']))
+        results = asyncio.run(client.resolve_versions(
+            'com.example.users.service', ['[1.4,1.5)', '[3.0,)']))
+
+        assert '1.4.7' == results['[1.4,1.5)']
+        assert isinstance(results['[3.0,)'], NoMatchingVersionsError)
+
+    def test_resolve_version_no_results(self):
+        from stac.exceptions import NoMatchingVersionsError
+        client = new_client(FakeVersionDao(error=not_found()))
+
+        with pytest.raises(NoMatchingVersionsError):
+            asyncio.run(client.resolve_version('com.example.users.service', '[1.0,)'))
+
+    def test_get_latest_versions_many(self):
+        from stac.exceptions import NoMatchingVersionsError
+
+        class Dao(FakeVersionDao):
+            async def get_most_recent_release(self, group, artifact, remote=False):
+                if artifact == 'mail':
+                    raise not_found()
+                return '1.5.0'
+
+        client = new_client(Dao())
+        results = asyncio.run(client.get_latest_versions_many(
+            ['com.example.services.users', 'com.example.services.mail']))
+
+        assert '1.5.0' == results['com.example.services.users']
+        assert isinstance(results['com.example.services.mail'], NoMatchingVersionsError)
+
+    def test_get_latest_versions_many_other_error(self):
+        error = aiohttp.ClientResponseError(mock.Mock(), (), status=503)
+        client = new_client(FakeVersionDao(error=error))
+        results = asyncio.run(client.get_latest_versions_many(['com.example.services.users']))
+
+        assert error is results['com.example.services.users']
+
+    def test_get_latest_versions_many_order(self):
+        import collections
+
+        client = new_client(FakeVersionDao(release='1.0.0'))
+        names = ['com.example.services.service{0}'.format(i) for i in reversed(range(50))]
+        results = asyncio.run(client.get_latest_versions_many(names))
+
+        assert isinstance(results, collections.OrderedDict)
+        assert names == list(results)
+
+
+class TestAsyncVersionApiDao(object):
+    def test_get_most_recent_release(self):
+        from stac.aio import AsyncVersionApiDao
+
+        session = mock.Mock()
+        session.get.return_value = FakeResponse(text='4.34.1\n')
+        dao = AsyncVersionApiDao(session, 'https://www.example.com/artifactory', 'libs-release')
+
+        assert '4.34.1' == asyncio.run(dao.get_most_recent_release('com.example.services', 'mail'))
+
+    def test_get_most_recent_release_no_results(self):
+        from stac.aio import AsyncVersionApiDao
+
+        session = mock.Mock()
+        session.get.return_value = FakeResponse(status=404)
+        dao = AsyncVersionApiDao(session, 'https://www.example.com/artifactory', 'libs-release')
+
+        with pytest.raises(aiohttp.ClientResponseError):
+            asyncio.run(dao.get_most_recent_release('com.example.services', 'mail'))
+
+    def test_get_most_recent_versions(self):
+        from stac.aio import AsyncVersionApiDao
+
+        session = mock.Mock()
+        session.get.return_value = FakeResponse(json={
+            'results': [
+                {'version': '4.439-SNAPSHOT', 'integration': True},
+                {'version': '4.441-SNAPSHOT', 'integration': True},
+                {'version': '4.440', 'integration': False},
+                {'version': '4.440-SNAPSHOT', 'integration': True}
+            ]
+        })
+        dao = AsyncVersionApiDao(session, 'https://www.example.com/artifactory', 'libs-snapshot')
+        versions = asyncio.run(dao.get_most_recent_versions(
+            'com.example.services', 'mail', limit=2, integration=True))
+
+        assert ['4.441-SNAPSHOT', '4.440-SNAPSHOT'] == versions
+
+    def test_get_most_recent_versions_invalid_limit(self):
+        from stac.aio import AsyncVersionApiDao
+        dao = AsyncVersionApiDao(mock.Mock(), 'https://www.example.com/artifactory', 'libs-release')
+
+        with pytest.raises(ValueError):
+            asyncio.run(dao.get_most_recent_versions('com.example.services', 'mail', limit=0))
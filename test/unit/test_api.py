@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 
+import sys
+
+import pytest
+
 
 def test_api_exports_match_all():
     """Make sure publicly exposed classes / functions / etc. match what we export."""
@@ -7,3 +11,34 @@ def test_api_exports_match_all():
     members = set([item for item in dir(stac.api) if not item.startswith("_")])
     exported = set(stac.api.__all__)
     assert members == exported
+
+
+def test_api_exports_resolve():
+    """Make sure every exported name can be lazily imported from its module."""
+    import stac.api
+    for name in stac.api.__all__:
+        assert getattr(stac.api, name) is not None
+
+
+def test_api_unknown_attribute():
+    import stac.api
+
+    with pytest.raises(AttributeError):
+        stac.api.NotARealThing  # pylint: disable=pointless-statement
+
+
+@pytest.mark.skipif(
+    sys.version_info < (3, 5), reason="Members are imported up front before Python 3.5")
+def test_api_url_generation_does_not_import_requests():
+    """Make sure only generating URLs doesn't load heavy dependencies."""
+    import subprocess
+
+    code = (
+        "import sys\n"
+        "import stac.api\n"
+        "stac.api.MavenArtifactUrlGenerator(\n"
+        "    'https://www.example.com/artifactory', 'libs-release')\n"
+        "heavy = ('requests', 'aiohttp', 'concurrent.futures', 'stac.cache', 'stac.store')\n"
+        "print(sorted(name for name in heavy if name in sys.modules))\n")
+    output = subprocess.check_output([sys.executable, '-c', code])
+    assert b'[]' == output.strip()
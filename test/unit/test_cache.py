@@ -0,0 +1,412 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import threading
+
+import mock
+import pytest
+
+
+@pytest.fixture
+def version_dao():
+    from stac.http import VersionApiDao
+    return mock.Mock(spec=VersionApiDao)
+
+
+class TestLruTtlCache(object):
+    def test_invalid_ttl(self):
+        from stac.cache import LruTtlCache
+
+        with pytest.raises(ValueError):
+            LruTtlCache(-1)
+
+    def test_invalid_size(self):
+        from stac.cache import LruTtlCache
+
+        with pytest.raises(ValueError):
+            LruTtlCache(10, max_size=0)
+
+    def test_get_miss(self, clock):
+        from stac.cache import LruTtlCache
+        cache = LruTtlCache(10, clock=clock)
+
+        assert cache.get('foo') is None
+        assert 0 == cache.hits
+        assert 1 == cache.misses
+
+    def test_get_hit(self, clock):
+        from stac.cache import LruTtlCache
+        cache = LruTtlCache(10, clock=clock)
+        cache.set('foo', '1.2.3')
+
+        assert '1.2.3' == cache.get('foo')
+        assert 1 == cache.hits
+        assert 0 == cache.misses
+
+    def test_get_expired(self, clock):
+        from stac.cache import LruTtlCache
+        cache = LruTtlCache(10, clock=clock)
+        cache.set('foo', '1.2.3')
+        clock.now += 10
+
+        assert cache.get('foo') is None
+        assert 1 == cache.misses
+        assert 1 == cache.evictions
+        assert 0 == len(cache)
+
+    def test_set_evicts_least_recently_used(self, clock):
+        from stac.cache import LruTtlCache
+        cache = LruTtlCache(10, max_size=2, clock=clock)
+        cache.set('foo', '1.0.0')
+        cache.set('bar', '2.0.0')
+        cache.get('foo')
+        cache.set('baz', '3.0.0')
+
+        assert '1.0.0' == cache.get('foo')
+        assert cache.get('bar') is None
+        assert '3.0.0' == cache.get('baz')
+        assert 1 == cache.evictions
+
+
+class TestCachingVersionDao(object):
+    def test_get_most_recent_release_cached(self, version_dao, clock):
+        from stac.cache import CachingVersionDao, LruTtlCache
+
+        version_dao.get_most_recent_release.return_value = '4.13.4'
+        dao = CachingVersionDao(version_dao, LruTtlCache(10, clock=clock))
+
+        assert '4.13.4' == dao.get_most_recent_release('com.example.services', 'mail')
+        assert '4.13.4' == dao.get_most_recent_release('com.example.services', 'mail')
+        assert 1 == version_dao.get_most_recent_release.call_count
+
+    def test_get_most_recent_release_different_keys(self, version_dao, clock):
+        from stac.cache import CachingVersionDao, LruTtlCache
+
+        version_dao.get_most_recent_release.return_value = '4.13.4'
+        dao = CachingVersionDao(version_dao, LruTtlCache(10, clock=clock))
+
+        dao.get_most_recent_release('com.example.services', 'mail')
+        dao.get_most_recent_release('com.example.services', 'mail', remote=True)
+        assert 2 == version_dao.get_most_recent_release.call_count
+
+    def test_get_most_recent_release_error_not_cached(self, version_dao, clock):
+        from stac.cache import CachingVersionDao, LruTtlCache
+
+        version_dao.get_most_recent_release.side_effect = [RuntimeError("Something bad"), '4.13.4']
+        dao = CachingVersionDao(version_dao, LruTtlCache(10, clock=clock))
+
+        with pytest.raises(RuntimeError):
+            dao.get_most_recent_release('com.example.services', 'mail')
+        assert '4.13.4' == dao.get_most_recent_release('com.example.services', 'mail')
+
+    def test_get_most_recent_versions_cached(self, version_dao, clock):
+        from stac.cache import CachingVersionDao, LruTtlCache
+
+        version_dao.get_most_recent_versions.return_value = ['1.2.1', '1.2.0']
+        dao = CachingVersionDao(version_dao, LruTtlCache(10, clock=clock))
+
+        first = dao.get_most_recent_versions('com.example.services', 'mail', 2)
+        first.append('1.0.0')
+        second = dao.get_most_recent_versions('com.example.services', 'mail', 2)
+
+        assert ['1.2.1', '1.2.0'] == second
+        assert 1 == version_dao.get_most_recent_versions.call_count
+
+    def test_get_most_recent_versions_expired(self, version_dao, clock):
+        from stac.cache import CachingVersionDao, LruTtlCache
+
+        version_dao.get_most_recent_versions.return_value = ['1.2.1', '1.2.0']
+        dao = CachingVersionDao(version_dao, LruTtlCache(10, clock=clock))
+
+        dao.get_most_recent_versions('com.example.services', 'mail', 2, integration=True)
+        clock.now += 11
+        dao.get_most_recent_versions('com.example.services', 'mail', 2, integration=True)
+        assert 2 == version_dao.get_most_recent_versions.call_count
+
+    def test_get_most_recent_versions_invalid_limit(self, version_dao, clock):
+        from stac.cache import CachingVersionDao, LruTtlCache
+        dao = CachingVersionDao(version_dao, LruTtlCache(10, clock=clock))
+
+        with pytest.raises(ValueError):
+            dao.get_most_recent_versions('com.example.services', 'mail', 0)
+
+    def test_get_version_index_passed_through(self, clock):
+        from stac.cache import CachingVersionDao, LruTtlCache
+        from stac.index import IndexedVersionDao
+
+        indexed_dao = mock.Mock(spec=IndexedVersionDao)
+        dao = CachingVersionDao(indexed_dao, LruTtlCache(10, clock=clock))
+
+        dao.get_version_index('com.example.services', 'mail')
+        dao.get_version_index('com.example.services', 'mail')
+        assert 2 == indexed_dao.get_version_index.call_count
+
+    def test_get_version_index_missing(self, version_dao, clock):
+        from stac.cache import CachingVersionDao, LruTtlCache
+        dao = CachingVersionDao(version_dao, LruTtlCache(10, clock=clock))
+
+        assert not hasattr(dao, 'get_version_index')
+        assert hasattr(dao, 'get_versions_since')
+
+
+class TestCoalescingVersionDao(object):
+    def _run_concurrently(self, func, count):
+        results = [None] * count
+        errors = [None] * count
+
+        def run(i):
+            try:
+                results[i] = func()
+            except Exception as e:  # pylint: disable=broad-except
+                errors[i] = e
+
+        threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+        for thread in threads:
+            thread.start()
+        return threads, results, errors
+
+    def test_get_most_recent_release_coalesced(self, version_dao):
+        from stac.cache import CoalescingVersionDao
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_release(group, artifact, remote=False):
+            started.set()
+            release.wait(5)
+            return '4.13.4'
+
+        version_dao.get_most_recent_release.side_effect = slow_release
+        dao = CoalescingVersionDao(version_dao)
+
+        leader, results, _ = self._run_concurrently(
+            lambda: dao.get_most_recent_release('com.example.services', 'mail'), 1)
+        started.wait(5)
+        followers, follower_results, _ = self._run_concurrently(
+            lambda: dao.get_most_recent_release('com.example.services', 'mail'), 4)
+        while dao.coalesced < 4:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in leader + followers:
+            thread.join(5)
+
+        assert ['4.13.4'] == results
+        assert ['4.13.4'] * 4 == follower_results
+        assert 1 == version_dao.get_most_recent_release.call_count
+
+    def test_get_most_recent_versions_error_shared(self, version_dao):
+        from stac.cache import CoalescingVersionDao
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_versions(group, artifact, limit, remote=False, integration=False):
+            started.set()
+            release.wait(5)
+            raise RuntimeError("Something bad")
+
+        version_dao.get_most_recent_versions.side_effect = slow_versions
+        dao = CoalescingVersionDao(version_dao)
+
+        leader, _, leader_errors = self._run_concurrently(
+            lambda: dao.get_most_recent_versions('com.example.services', 'mail', 2), 1)
+        started.wait(5)
+        followers, _, follower_errors = self._run_concurrently(
+            lambda: dao.get_most_recent_versions('com.example.services', 'mail', 2), 2)
+        while dao.coalesced < 2:
+            threading.Event().wait(0.001)
+        release.set()
+        for thread in leader + followers:
+            thread.join(5)
+
+        assert all(isinstance(e, RuntimeError) for e in leader_errors + follower_errors)
+        assert 1 == version_dao.get_most_recent_versions.call_count
+
+    def test_get_most_recent_versions_not_coalesced_after_completion(self, version_dao):
+        from stac.cache import CoalescingVersionDao
+
+        version_dao.get_most_recent_versions.return_value = ['1.2.1', '1.2.0']
+        dao = CoalescingVersionDao(version_dao)
+
+        first = dao.get_most_recent_versions('com.example.services', 'mail', 2)
+        first.append('1.0.0')
+        second = dao.get_most_recent_versions('com.example.services', 'mail', 2)
+
+        assert ['1.2.1', '1.2.0'] == second
+        assert 2 == version_dao.get_most_recent_versions.call_count
+        assert 0 == dao.coalesced
+
+    def test_get_most_recent_versions_different_limits(self, version_dao):
+        from stac.cache import CoalescingVersionDao
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_versions(group, artifact, limit, remote=False, integration=False):
+            started.set()
+            release.wait(5)
+            return ['1.2.1', '1.2.0', '1.1.0'][:limit]
+
+        version_dao.get_most_recent_versions.side_effect = slow_versions
+        dao = CoalescingVersionDao(version_dao)
+
+        first, first_results, _ = self._run_concurrently(
+            lambda: dao.get_most_recent_versions('com.example.services', 'mail', 3), 1)
+        started.wait(5)
+        second, second_results, _ = self._run_concurrently(
+            lambda: dao.get_most_recent_versions('com.example.services', 'mail', 1), 1)
+        release.set()
+        for thread in first + second:
+            thread.join(5)
+
+        assert [['1.2.1', '1.2.0', '1.1.0']] == first_results
+        assert [['1.2.1']] == second_results
+        assert 0 == dao.coalesced
+
+    def test_get_version_index_passed_through(self):
+        from stac.cache import CoalescingVersionDao
+        from stac.index import IndexedVersionDao
+
+        indexed_dao = mock.Mock(spec=IndexedVersionDao)
+        dao = CoalescingVersionDao(indexed_dao)
+
+        assert indexed_dao.get_version_index.return_value == \
+            dao.get_version_index('com.example.services', 'mail')
+        assert not hasattr(CoalescingVersionDao(mock.Mock(spec=[])), 'get_version_index')
+
+    def test_get_most_recent_versions_invalid_limit(self, version_dao):
+        from stac.cache import CoalescingVersionDao
+        dao = CoalescingVersionDao(version_dao)
+
+        with pytest.raises(ValueError):
+            dao.get_most_recent_versions('com.example.services', 'mail', 0)
+
+
+class TestRefreshingVersionDao(object):
+    def test_invalid_stale_ttl(self, version_dao, clock):
+        from stac.cache import LruTtlCache, RefreshingVersionDao
+
+        with pytest.raises(ValueError):
+            RefreshingVersionDao(version_dao, LruTtlCache(20, clock=clock), 10, -1)
+
+    def test_fresh_result_not_refreshed(self, version_dao, clock):
+        from stac.cache import LruTtlCache, RefreshingVersionDao
+
+        version_dao.get_most_recent_release.return_value = '4.13.4'
+        dao = RefreshingVersionDao(version_dao, LruTtlCache(20, clock=clock), 10, 10, clock=clock)
+
+        assert '4.13.4' == dao.get_most_recent_release('com.example.services', 'mail')
+        clock.now += 5
+        assert '4.13.4' == dao.get_most_recent_release('com.example.services', 'mail')
+        dao.close()
+
+        assert 1 == version_dao.get_most_recent_release.call_count
+        assert 0 == dao.refreshes
+
+    def test_stale_result_served_and_refreshed(self, version_dao, clock):
+        from stac.cache import LruTtlCache, RefreshingVersionDao
+
+        version_dao.get_most_recent_release.side_effect = ['4.13.4', '4.13.5']
+        dao = RefreshingVersionDao(version_dao, LruTtlCache(20, clock=clock), 10, 10, clock=clock)
+
+        dao.get_most_recent_release('com.example.services', 'mail')
+        clock.now += 15
+        assert '4.13.4' == dao.get_most_recent_release('com.example.services', 'mail')
+        dao.close()
+
+        assert '4.13.5' == dao.get_most_recent_release('com.example.services', 'mail')
+        assert 2 == version_dao.get_most_recent_release.call_count
+        assert 1 == dao.refreshes
+
+    def test_result_past_stale_window_looked_up(self, version_dao, clock):
+        from stac.cache import LruTtlCache, RefreshingVersionDao
+
+        version_dao.get_most_recent_versions.side_effect = [['1.2.1'], ['1.2.2']]
+        dao = RefreshingVersionDao(version_dao, LruTtlCache(20, clock=clock), 10, 10, clock=clock)
+
+        dao.get_most_recent_versions('com.example.services', 'mail', 1)
+        clock.now += 20
+        assert ['1.2.2'] == dao.get_most_recent_versions('com.example.services', 'mail', 1)
+        dao.close()
+
+        assert 0 == dao.refreshes
+
+    def test_hot_result_refreshed_before_expiry(self, version_dao, clock):
+        from stac.cache import LruTtlCache, RefreshingVersionDao
+
+        version_dao.get_most_recent_release.return_value = '4.13.4'
+        dao = RefreshingVersionDao(
+            version_dao, LruTtlCache(20, clock=clock), 10, 10, refresh_ahead=2, hot_requests=3,
+            clock=clock)
+
+        dao.get_most_recent_release('com.example.services', 'mail')
+        dao.get_most_recent_release('com.example.services', 'auth')
+        for _ in range(2):
+            dao.get_most_recent_release('com.example.services', 'mail')
+        clock.now += 9
+        dao.get_most_recent_release('com.example.services', 'mail')
+        dao.get_most_recent_release('com.example.services', 'auth')
+        dao.close()
+
+        version_dao.get_most_recent_release.assert_has_calls([
+            mock.call('com.example.services', 'mail', remote=False),
+            mock.call('com.example.services', 'auth', remote=False),
+            mock.call('com.example.services', 'mail', remote=False),
+        ])
+        assert 3 == version_dao.get_most_recent_release.call_count
+        assert 1 == dao.refreshes
+
+    def test_refresh_error_keeps_stale_result(self, version_dao, clock):
+        from stac.cache import LruTtlCache, RefreshingVersionDao
+        from stac.metrics import MetricsRegistry
+
+        version_dao.get_most_recent_release.side_effect = ['4.13.4', RuntimeError("Something bad")]
+        registry = MetricsRegistry()
+        dao = RefreshingVersionDao(
+            version_dao, LruTtlCache(20, clock=clock), 10, 10, metrics=registry, clock=clock)
+
+        dao.get_most_recent_release('com.example.services', 'mail')
+        clock.now += 15
+        dao.get_most_recent_release('com.example.services', 'mail')
+        dao.close()
+
+        assert '4.13.4' == dao.get_most_recent_release('com.example.services', 'mail')
+        assert 2 == registry.get_count('stac_cache_requests_total', {'result': 'stale'})
+        assert 1 == registry.get_count('stac_cache_refreshes_total', {'result': 'error'})
+
+    def test_one_refresh_at_a_time(self, version_dao, clock):
+        from stac.cache import LruTtlCache, RefreshingVersionDao
+
+        release = threading.Event()
+
+        def slow_release(*args, **kwargs):
+            release.wait(5)
+            return '4.13.5'
+
+        version_dao.get_most_recent_release.return_value = '4.13.4'
+        dao = RefreshingVersionDao(version_dao, LruTtlCache(20, clock=clock), 10, 10, clock=clock)
+
+        dao.get_most_recent_release('com.example.services', 'mail')
+        version_dao.get_most_recent_release.side_effect = slow_release
+        clock.now += 15
+        for _ in range(3):
+            assert '4.13.4' == dao.get_most_recent_release('com.example.services', 'mail')
+        release.set()
+        dao.close()
+
+        assert 1 == dao.refreshes
+        assert 2 == version_dao.get_most_recent_release.call_count
+
+
+def test_caching_version_dao_metrics(version_dao, clock):
+    from stac.cache import CachingVersionDao, LruTtlCache
+    from stac.metrics import MetricsRegistry
+
+    version_dao.get_most_recent_release.return_value = '4.13.4'
+    registry = MetricsRegistry()
+    dao = CachingVersionDao(version_dao, LruTtlCache(10, clock=clock), metrics=registry)
+
+    dao.get_most_recent_release('com.example.services', 'mail')
+    dao.get_most_recent_release('com.example.services', 'mail')
+
+    assert 1 == registry.get_count('stac_cache_requests_total', {'result': 'miss'})
+    assert 1 == registry.get_count('stac_cache_requests_total', {'result': 'hit'})
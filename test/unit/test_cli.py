@@ -0,0 +1,200 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import json
+import os
+import threading
+
+import mock
+import pytest
+import requests
+
+
+@pytest.fixture
+def client():
+    from stac.client import GenericArtifactoryClient
+    client = mock.Mock(spec=GenericArtifactoryClient)
+    client.get_version_url.side_effect = lambda name, packaging, version, descriptor=None: (
+        'https://www.example.com/artifactory/libs-release/{0}/{1}/{0}-{1}{2}.{3}'.format(
+            name, version, '-' + descriptor if descriptor else '', packaging))
+    return client
+
+
+def test_parse_manifest():
+    from stac.cli import parse_manifest
+
+    entries = list(parse_manifest([
+        '# Services to deploy\n',
+        'com.example.services.mail war\n',
+        '\n',
+        '  com.example.services.mail jar latest sources  \n',
+        'com.example.services.auth jar 1.4.5\n',
+        '{"name": "com.example.services.users", "packaging": "war", "descriptor": "config"}\n',
+    ]))
+
+    assert [2, 4, 5, 6] == [entry.line for entry in entries]
+    assert ['com.example.services.mail', 'com.example.services.mail', 'com.example.services.auth',
+            'com.example.services.users'] == [entry.name for entry in entries]
+    assert [None, None, '1.4.5', None] == [entry.version for entry in entries]
+    assert [None, 'sources', None, 'config'] == [entry.descriptor for entry in entries]
+
+
+def test_parse_manifest_invalid_lines():
+    from stac.cli import parse_manifest
+
+    entries = list(parse_manifest([
+        'com.example.services.mail\n',
+        'com.example.services.mail jar 1.2.3 sources extra\n',
+        '{"name": "com.example.services.users"}\n',
+        '{"name": \n',
+    ]))
+
+    assert 4 == len(entries)
+    assert all(isinstance(entry, ValueError) for entry in entries)
+    assert str(entries[0]).startswith('Line 1:')
+
+
+def test_parse_manifest_invalid_json_types():
+    from stac.cli import parse_manifest
+
+    entries = list(parse_manifest([
+        '{"name": ["com.example.services.users"], "packaging": "war"}\n',
+        '{"name": "com.example.services.users", "packaging": 1}\n',
+        '{"name": "", "packaging": "war"}\n',
+        '{"name": "com.example.services.users", "packaging": "war", "version": 1.2}\n',
+        '{"name": "com.example.services.users", "packaging": "war", "descriptor": {}}\n',
+    ]))
+
+    assert 5 == len(entries)
+    assert all(isinstance(entry, ValueError) for entry in entries)
+    assert 'version' in str(entries[3])
+
+
+def test_resolve_latest(client):
+    from stac.cli import ManifestEntry, resolve
+
+    client.get_latest_version.return_value = '1.2.3'
+    result = resolve(client, ManifestEntry(1, 'com.example.mail', 'jar', descriptor='sources'))
+
+    assert '1.2.3' == result['version']
+    assert result['url'].endswith('/com.example.mail-1.2.3-sources.jar')
+    assert 'path' not in result
+    client.get_latest_version.assert_called_once_with('com.example.mail', remote=False)
+
+
+def test_resolve_download(client, tmpdir):
+    from stac.cli import ManifestEntry, resolve
+
+    client.download_version.return_value = str(tmpdir.join('mail-1.2.3.jar'))
+    result = resolve(
+        client, ManifestEntry(1, 'com.example.mail', 'jar', '1.2.3'), directory=str(tmpdir))
+
+    assert str(tmpdir.join('mail-1.2.3.jar')) == result['path']
+    assert not client.get_latest_version.called
+
+
+def test_resolve_error(client):
+    from stac.cli import ManifestEntry, resolve
+    from stac.exceptions import NoMatchingVersionsError
+
+    client.get_latest_version.side_effect = NoMatchingVersionsError(
+        "No versions of com.example.mail")
+    result = resolve(client, ManifestEntry(1, 'com.example.mail', 'jar'))
+
+    assert "No versions of com.example.mail" == result['error']
+    assert 'url' not in result
+
+
+def test_resolve_unexpected_error(client):
+    from stac.cli import ManifestEntry, resolve
+
+    client.get_version_url.side_effect = ValueError("Invalid version")
+    result = resolve(client, ManifestEntry(1, 'com.example.mail', 'jar', '1.2.3'))
+
+    assert "ValueError: Invalid version" == result['error']
+
+
+def test_main(client, tmpdir, capsys):
+    from stac.cli import main
+
+    manifest = tmpdir.join('manifest.txt')
+    manifest.write('com.example.services.mail war\n'
+                   'com.example.services.auth jar 1.4.5\n'
+                   'com.example.services.users war\n'
+                   'bad\n')
+    client.get_latest_version.side_effect = lambda name, remote=False: {
+        'com.example.services.mail': '2.0.1'}.get(name) or _raise_not_found()
+
+    with mock.patch('stac.client.new_maven_client', return_value=client) as factory:
+        status = main(['--url', 'https://www.example.com/artifactory', '--repo', 'libs-release',
+                       '--manifest', str(manifest), '--workers', '2'])
+
+    assert 1 == status
+    assert 2 == factory.call_args[1]['pool_maxsize']
+    assert not factory.call_args[1]['resolve_snapshots']
+
+    results = [json.loads(line) for line in capsys.readouterr()[0].splitlines()]
+    by_line = dict((result.get('line'), result) for result in results)
+    assert 4 == len(results)
+    assert '2.0.1' == by_line[1]['version']
+    assert '1.4.5' == by_line[2]['version']
+    assert 'error' in by_line[3]
+    assert by_line[None]['error'].startswith('Line 4:')
+
+
+def test_main_invalid_workers(capsys):
+    from stac.cli import main
+
+    with pytest.raises(SystemExit):
+        main([
+            '--url', 'https://www.example.com/artifactory', '--repo', 'libs-release',
+            '--workers', '0'])
+
+
+def test_main_missing_manifest(tmpdir, capsys):
+    from stac.cli import main
+
+    with pytest.raises(SystemExit) as info:
+        main([
+            '--url', 'https://www.example.com/artifactory', '--repo', 'libs-release',
+            '--manifest', str(tmpdir.join('missing.txt'))])
+
+    assert 2 == info.value.code
+    assert 'Could not open manifest' in capsys.readouterr()[1]
+
+
+def test_main_streams_standard_input(client):
+    from stac.cli import main
+
+    client.get_latest_version.return_value = '2.0.1'
+    output = mock.Mock()
+    written = threading.Event()
+    output.write.side_effect = lambda data: written.set()
+    statuses = []
+
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd, 'r') as stdin, os.fdopen(write_fd, 'w') as pipe, \
+            mock.patch('sys.stdin', stdin), mock.patch('sys.stdout', output), \
+            mock.patch('stac.client.new_maven_client', return_value=client):
+        thread = threading.Thread(target=lambda: statuses.append(main([
+            '--url', 'https://www.example.com/artifactory', '--repo', 'libs-release'])))
+        thread.daemon = True
+        thread.start()
+        try:
+            pipe.write('com.example.services.mail war\n')
+            pipe.flush()
+            # The result is output before the end of the manifest
+            assert written.wait(5)
+        finally:
+            pipe.close()
+        thread.join(5)
+
+    assert [0] == statuses
+
+
+def _raise_not_found():
+    response = mock.Mock(spec=requests.Response)
+    response.status_code = 404
+    raise requests.HTTPError("Not found", response=response)
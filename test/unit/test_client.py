@@ -3,6 +3,8 @@
 """
 """
 
+import collections
+
 import mock
 import pytest
 import requests
@@ -20,6 +22,37 @@ def url_generator():
     return mock.Mock(spec=MavenArtifactUrlGenerator)
 
 
+def test_default_sizes_match_cache_and_store():
+    import stac.cache
+    import stac.client
+    import stac.store
+
+    assert stac.cache.DEFAULT_CACHE_SIZE == stac.client.DEFAULT_CACHE_SIZE
+    assert stac.store.DEFAULT_STORE_SIZE == stac.client.DEFAULT_STORE_SIZE
+
+
+def test_artifactory_client_only_original_methods_abstract():
+    from stac.client import ArtifactoryClient
+
+    class Client(ArtifactoryClient):
+        def get_version_url(self, full_name, packaging, version, descriptor=None):
+            return 'https://www.example.com/artifactory/libs-release/example.jar'
+
+        def get_latest_version(self, full_name, remote=False):
+            return '1.0.0'
+
+        def get_latest_versions(self, full_name, remote=False, limit=10):
+            return ['1.0.0']
+
+    client = Client()
+
+    with pytest.raises(NotImplementedError):
+        client.get_latest_versions_many(['com.example.users.service'])
+
+    with pytest.raises(NotImplementedError):
+        client.resolve_version('com.example.users.service', '[1.0,)')
+
+
 class TestMavenArtifactoryClient(object):
     def test_get_version_url(self, version_dao, url_generator):
         from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
@@ -37,6 +70,27 @@ class TestMavenArtifactoryClient(object):
         assert ('https://www.example.com/artifactory/libs-release/'
                 'com/example/services/login/3.9.1/login-3.9.1.jar') == url
 
+    def test_get_version_urls(self, version_dao):
+        from stac.client import (
+            GenericArtifactoryClient, GenericArtifactoryClientConfig, MavenArtifactUrlGenerator)
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = version_dao
+        config.url_generator = MavenArtifactUrlGenerator(
+            'https://www.example.com/artifactory', 'libs-release')
+
+        client = GenericArtifactoryClient(config)
+        artifacts = [
+            ('com.example.services.login', 'jar', '3.9.1', None),
+            ('com.example.services.login', 'jar', '3.9.1', 'sources'),
+            ('login', 'pom', '3.9.0', None),
+        ]
+        urls = list(client.get_version_urls(artifacts))
+
+        assert [client.get_version_url(*artifact) for artifact in artifacts] == urls
+        assert ('https://www.example.com/artifactory/libs-release/'
+                'com/example/services/login/3.9.1/login-3.9.1-sources.jar') == urls[1]
+
     def test_get_latest_version_snapshot(self, version_dao, url_generator):
         from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
 
@@ -121,6 +175,22 @@ class TestMavenArtifactoryClient(object):
         with pytest.raises(NoMatchingVersionsError):
             maven_client.get_latest_version('com.example.users.service')
 
+    def test_get_latest_version_release_empty_result(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+        from stac.exceptions import NoMatchingVersionsError
+
+        version_dao.get_most_recent_release.return_value = None
+
+        config = GenericArtifactoryClientConfig()
+        config.is_integration = False
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        maven_client = GenericArtifactoryClient(config)
+
+        with pytest.raises(NoMatchingVersionsError):
+            maven_client.get_latest_version('com.example.users.service')
+
     def test_get_latest_versions_bad_limit(self):
         from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
 
@@ -243,11 +313,313 @@ class TestMavenArtifactoryClient(object):
         with pytest.raises(NoMatchingVersionsError):
             maven_client.get_latest_versions('com.example.users.service')
 
+    def test_get_latest_versions_many(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+
+        versions = {'mail': '4.13.4', 'users': '1.5.0'}
+        version_dao.get_most_recent_release.side_effect = \
+            lambda group, artifact, remote: versions[artifact]
+
+        config = GenericArtifactoryClientConfig()
+        config.is_integration = False
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        maven_client = GenericArtifactoryClient(config)
+        results = maven_client.get_latest_versions_many([
+            'com.example.services.users', 'com.example.services.mail',
+            'com.example.services.users'])
+
+        assert {
+            'com.example.services.users': '1.5.0',
+            'com.example.services.mail': '4.13.4'
+        } == results
+        assert 2 == version_dao.get_most_recent_release.call_count
+
+    def test_get_latest_versions_many_order(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+
+        version_dao.get_most_recent_release.return_value = '1.0.0'
+
+        config = GenericArtifactoryClientConfig()
+        config.is_integration = False
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        maven_client = GenericArtifactoryClient(config)
+        names = ['com.example.services.service{0}'.format(i) for i in reversed(range(50))]
+        results = maven_client.get_latest_versions_many(names)
+
+        assert isinstance(results, collections.OrderedDict)
+        assert names == list(results)
+
+    def test_get_latest_versions_many_partial_failure(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+        from stac.exceptions import NoMatchingVersionsError
+
+        def get_versions(group, artifact, remote, limit, integration):
+            if artifact == 'mail':
+                return []
+            return ['1.3.0-SNAPSHOT']
+
+        version_dao.get_most_recent_versions.side_effect = get_versions
+
+        config = GenericArtifactoryClientConfig()
+        config.is_integration = True
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        maven_client = GenericArtifactoryClient(config)
+        results = maven_client.get_latest_versions_many(
+            ['com.example.services.users', 'com.example.services.mail'])
+
+        assert '1.3.0-SNAPSHOT' == results['com.example.services.users']
+        assert isinstance(results['com.example.services.mail'], NoMatchingVersionsError)
+
+    def test_get_latest_versions_many_other_error(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+
+        request = mock.Mock(spec=requests.Request)
+        response = mock.Mock(spec=requests.Response)
+        response.status_code = 500
+        error = requests.HTTPError("Something bad", request=request, response=response)
+        version_dao.get_most_recent_release.side_effect = error
+
+        config = GenericArtifactoryClientConfig()
+        config.is_integration = False
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        maven_client = GenericArtifactoryClient(config)
+        results = maven_client.get_latest_versions_many(['com.example.services.users'])
+
+        assert error is results['com.example.services.users']
+
+    def test_get_latest_versions_many_other_error_partial(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+
+        def get_release(group, artifact, remote):
+            if artifact == 'mail':
+                raise requests.Timeout("Timed out")
+            return '1.5.0'
+
+        version_dao.get_most_recent_release.side_effect = get_release
+
+        config = GenericArtifactoryClientConfig()
+        config.is_integration = False
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        maven_client = GenericArtifactoryClient(config)
+        results = maven_client.get_latest_versions_many(
+            ['com.example.services.users', 'com.example.services.mail'])
+
+        assert '1.5.0' == results['com.example.services.users']
+        assert isinstance(results['com.example.services.mail'], requests.Timeout)
+
+    def test_get_latest_versions_many_empty(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        maven_client = GenericArtifactoryClient(config)
+        assert collections.OrderedDict() == maven_client.get_latest_versions_many([])
+
+    def test_download_version_to_directory(self, version_dao, url_generator, tmpdir):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+        from stac.download import ArtifactDownloader, DownloadResult
+
+        url_generator.get_url.return_value = ('https://www.example.com/artifactory/libs-release/'
+                                              'com/example/services/login/3.9.1/login-3.9.1.jar')
+        downloader = mock.Mock(spec=ArtifactDownloader)
+        downloader.download.side_effect = lambda url, path: DownloadResult(path, 0, {})
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+        config.downloader = downloader
+
+        client = GenericArtifactoryClient(config)
+        path = client.download_version('com.example.services.login', 'jar', '3.9.1', str(tmpdir))
+
+        assert str(tmpdir.join('login-3.9.1.jar')) == path
+
+    def test_download_version_to_file(self, version_dao, url_generator, tmpdir):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+        from stac.download import ArtifactDownloader, DownloadResult
+
+        url_generator.get_url.return_value = ('https://www.example.com/artifactory/libs-release/'
+                                              'com/example/services/login/3.9.1/login-3.9.1.jar')
+        downloader = mock.Mock(spec=ArtifactDownloader)
+        downloader.download.side_effect = lambda url, path: DownloadResult(path, 0, {})
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+        config.downloader = downloader
+
+        client = GenericArtifactoryClient(config)
+        path = client.download_version(
+            'com.example.services.login', 'jar', '3.9.1', str(tmpdir.join('app.jar')))
+
+        assert str(tmpdir.join('app.jar')) == path
+
+    def test_get_latest_versions_many_metrics(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+        from stac.metrics import MetricsRegistry
+
+        version_dao.get_most_recent_release.side_effect = lambda group, artifact, remote=False: (
+            '1.2.3' if artifact == 'login' else None)
+        registry = MetricsRegistry()
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+        config.metrics = registry
+
+        client = GenericArtifactoryClient(config)
+        client.get_latest_versions_many(['com.example.services.login', 'com.example.services.mail'])
+
+        assert 1 == registry.get_count('stac_operations_total', {
+            'operation': 'get_latest_version',
+            'artifact': 'com.example.services.login',
+            'result': 'ok'
+        })
+        assert 1 == registry.get_count('stac_operations_total', {
+            'operation': 'get_latest_version', 'artifact': 'com.example.services.mail',
+            'result': 'not_found'})
+
+    def test_resolve_versions(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+        from stac.exceptions import NoMatchingVersionsError
+
+        version_dao.get_most_recent_versions.return_value = ['2.1.0', '2.0.0', '1.4.7', '1.4.0']
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        client = GenericArtifactoryClient(config)
+        results = client.resolve_versions(
+            'com.example.users.service', ['[1.4,1.5)', '[2.0,)', '[3.0,)'])
+
+        assert ['[1.4,1.5)', '[2.0,)', '[3.0,)'] == list(results)
+        assert '1.4.7' == results['[1.4,1.5)']
+        assert '2.1.0' == results['[2.0,)']
+        assert isinstance(results['[3.0,)'], NoMatchingVersionsError)
+        version_dao.get_most_recent_versions.assert_called_once_with(
+            'com.example.users', 'service', mock.ANY, remote=False, integration=False)
+
+    def test_resolve_version(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+        from stac.exceptions import NoMatchingVersionsError
+
+        version_dao.get_most_recent_versions.return_value = ['1.5.0-SNAPSHOT', '1.4.1-SNAPSHOT']
+
+        config = GenericArtifactoryClientConfig()
+        config.is_integration = True
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        client = GenericArtifactoryClient(config)
+
+        assert '1.4.1-SNAPSHOT' == client.resolve_version(
+            'com.example.users.service', '(,1.5.0-SNAPSHOT)')
+        with pytest.raises(NoMatchingVersionsError):
+            client.resolve_version('com.example.users.service', '[1.6,)')
+        assert version_dao.get_most_recent_versions.call_args[1]['integration']
+
+    def test_resolve_versions_invalid_range(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        client = GenericArtifactoryClient(config)
+        with pytest.raises(ValueError):
+            client.resolve_versions('com.example.users.service', ['[1.0,2.0)', '[1.0'])
+        assert not version_dao.get_most_recent_versions.called
+
+    def test_get_version_index_not_found(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+        from stac.exceptions import NoMatchingVersionsError
+
+        response = mock.Mock(spec=requests.Response)
+        response.status_code = 404
+        version_dao.get_most_recent_versions.side_effect = requests.HTTPError(
+            "Not found", request=mock.Mock(spec=requests.Request), response=response)
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        client = GenericArtifactoryClient(config)
+        with pytest.raises(NoMatchingVersionsError):
+            client.get_version_index('com.example.users.service')
+
+    def test_get_version_index(self, version_dao, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+
+        version_dao.get_most_recent_versions.return_value = ['1.10.0', '1.9.0', '1.2.0']
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = version_dao
+        config.url_generator = url_generator
+
+        index = GenericArtifactoryClient(config).get_version_index('com.example.users.service')
+
+        assert ['1.2.0', '1.9.0', '1.10.0'] == list(index)
+        assert '1.9.0' == index.latest('[1.0,1.10)')
+
+    def test_resolve_versions_indexed_dao(self, url_generator):
+        from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+        from stac.index import IndexedVersionDao
+        from stac.version import VersionIndex
+
+        dao = mock.Mock(spec=IndexedVersionDao)
+        dao.get_version_index.return_value = VersionIndex(['1.4.7', '2.1.0'])
+
+        config = GenericArtifactoryClientConfig()
+        config.http_dao = dao
+        config.url_generator = url_generator
+
+        client = GenericArtifactoryClient(config)
+
+        assert '1.4.7' == client.resolve_version('com.example.users.service', '[1.4,1.5)')
+        dao.get_version_index.assert_called_once_with(
+            'com.example.users', 'service', remote=False, integration=False)
+        assert not dao.get_most_recent_versions.called
+
+    @pytest.mark.parametrize('options', [
+        {'cache_ttl': 60},
+        {'cache_ttl': 60, 'cache_stale_ttl': 60},
+        {'coalesce': True},
+    ])
+    def test_resolve_version_indexed_behind_wrappers(self, options):
+        from stac.client import new_maven_client
+        from stac.http import VersionApiDao
+        from stac.index import IndexedVersionDao
+
+        with mock.patch.object(VersionApiDao, 'get_versions_since') as get_versions_since, \
+                mock.patch.object(IndexedVersionDao, 'get_most_recent_versions') as get_versions:
+            get_versions_since.return_value = (['1.4.7', '2.1.0'], None)
+            client = new_maven_client(
+                'https://www.example.com/artifactory', 'libs-release', index_interval=60,
+                **options)
+
+            assert '1.4.7' == client.resolve_version('com.example.users.service', '[1.4,1.5)')
+            assert 1 == get_versions_since.call_count
+            assert not get_versions.called
+
 
 class TestMavenArtifactUrlGenerator(object):
     def test_get_version_url_with_descriptor(self):
         from stac.client import MavenArtifactUrlGenerator
-        gen = MavenArtifactUrlGenerator('https://corp.example.com/artifactory', 'libs-release-local')
+        gen = MavenArtifactUrlGenerator(
+            'https://corp.example.com/artifactory', 'libs-release-local')
         url = gen.get_url('com.example.services', 'locations', 'jar', '4.5.1', 'sources')
 
         assert ('https://corp.example.com/artifactory/libs-release-local/' +
@@ -255,12 +627,95 @@ class TestMavenArtifactUrlGenerator(object):
 
     def test_get_version_url_without_descriptor(self):
         from stac.client import MavenArtifactUrlGenerator
-        gen = MavenArtifactUrlGenerator('https://corp.example.com/artifactory', 'libs-release-local')
+        gen = MavenArtifactUrlGenerator(
+            'https://corp.example.com/artifactory', 'libs-release-local')
         url = gen.get_url('com.example.services', 'locations', 'war', '4.5.1', None)
 
         assert ('https://corp.example.com/artifactory/libs-release-local/' +
                 'com/example/services/locations/4.5.1/locations-4.5.1.war') == url
 
+    def test_get_urls(self):
+        from stac.client import MavenArtifactUrlGenerator
+        gen = MavenArtifactUrlGenerator(
+            'https://corp.example.com/artifactory', 'libs-release-local')
+        urls = gen.get_urls(iter([
+            ('com.example.services', 'locations', 'war', '4.5.1', None),
+            ('com.example.services', 'locations', 'jar', '4.5.1', 'sources'),
+            ('com.example.services', 'mail', 'jar', '1.0.0', None),
+        ]))
+
+        assert [
+            'https://corp.example.com/artifactory/libs-release-local/'
+            'com/example/services/locations/4.5.1/locations-4.5.1.war',
+            'https://corp.example.com/artifactory/libs-release-local/'
+            'com/example/services/locations/4.5.1/locations-4.5.1-sources.jar',
+            'https://corp.example.com/artifactory/libs-release-local/'
+            'com/example/services/mail/1.0.0/mail-1.0.0.jar',
+        ] == list(urls)
+
+    def test_get_urls_cache_bounded(self):
+        from stac.client import MavenArtifactUrlGenerator
+        gen = MavenArtifactUrlGenerator(
+            'https://corp.example.com/artifactory', 'libs-release-local')
+
+        with mock.patch('stac.client._MAX_CACHED_URL_PARTS', 2):
+            urls = list(gen.get_urls(
+                ('com.example', 'service{0}'.format(i), 'jar', '1.0.0', None) for i in range(5)))
+
+        assert 5 == len(urls)
+        assert urls[4].endswith('/com/example/service4/1.0.0/service4-1.0.0.jar')
+        assert len(gen._parts) <= 2
+
+    def test_get_url_snapshot_resolved(self):
+        from stac.client import MavenArtifactUrlGenerator
+        from stac.snapshot import SnapshotResolver
+
+        resolver = mock.Mock(spec=SnapshotResolver)
+        resolver.resolve.return_value = '1.2.0-20160404.120000-3'
+        generator = MavenArtifactUrlGenerator(
+            'https://www.example.com/artifactory', 'libs-snapshot', snapshot_resolver=resolver)
+
+        url = generator.get_url('com.example.services', 'mail', 'jar', '1.2.0-SNAPSHOT', 'sources')
+
+        assert ('https://www.example.com/artifactory/libs-snapshot/com/example/services/mail/'
+                '1.2.0-SNAPSHOT/mail-1.2.0-20160404.120000-3-sources.jar') == url
+        resolver.resolve.assert_called_once_with(
+            'com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar', 'sources')
+
+    def test_get_urls_snapshot_resolved(self):
+        from stac.client import MavenArtifactUrlGenerator
+        from stac.snapshot import SnapshotResolver
+
+        resolver = mock.Mock(spec=SnapshotResolver)
+        resolver.resolve.side_effect = lambda group, artifact, version, packaging, descriptor: (
+            version.replace('SNAPSHOT', '20160404.120000-3'))
+        generator = MavenArtifactUrlGenerator(
+            'https://www.example.com/artifactory', 'libs-snapshot', snapshot_resolver=resolver)
+
+        urls = list(generator.get_urls([
+            ('com.example.services', 'mail', 'jar', '1.2.0-SNAPSHOT', None),
+            ('com.example.services', 'mail', 'jar', '1.1.0', None),
+        ]))
+
+        assert [
+            'https://www.example.com/artifactory/libs-snapshot/com/example/services/mail/'
+            '1.2.0-SNAPSHOT/mail-1.2.0-20160404.120000-3.jar',
+            'https://www.example.com/artifactory/libs-snapshot/com/example/services/mail/'
+            '1.1.0/mail-1.1.0.jar',
+        ] == urls
+
+
+def test_artifact_url_generator_get_urls():
+    from stac.client import ArtifactUrlGenerator
+
+    class PathUrlGenerator(ArtifactUrlGenerator):
+        def get_url(self, group, artifact, packaging, version, descriptor):
+            return '/'.join([group, artifact, version, packaging])
+
+    urls = PathUrlGenerator().get_urls([('com.example', 'mail', 'jar', '1.0.0', None)])
+
+    assert ['com.example/mail/1.0.0/jar'] == list(urls)
+
 
 def test_parse_full_name_group_and_artifact():
     from stac.client import _parse_full_name
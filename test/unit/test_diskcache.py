@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import multiprocessing
+import sqlite3
+import threading
+
+import mock
+import pytest
+
+
+@pytest.fixture
+def path(tmpdir):
+    return str(tmpdir.join('cache.db'))
+
+
+def _fill(path, worker):
+    from stac.diskcache import SqliteCache
+    cache = SqliteCache(path, 60)
+    for i in range(20):
+        key = ('release', 'com.example', 'service{0}'.format(i), False)
+        cache.set(key, '1.{0}.{1}'.format(worker, i))
+
+
+class TestSqliteCache(object):
+    def test_invalid_ttl(self, path):
+        from stac.diskcache import SqliteCache
+
+        with pytest.raises(ValueError):
+            SqliteCache(path, -1)
+
+    def test_invalid_size(self, path):
+        from stac.diskcache import SqliteCache
+
+        with pytest.raises(ValueError):
+            SqliteCache(path, 60, max_size=0)
+
+    def test_uses_wal(self, path):
+        from stac.diskcache import SqliteCache
+        import sqlite3
+
+        SqliteCache(path, 60)
+        assert 'wal' == sqlite3.connect(path).execute('PRAGMA journal_mode').fetchone()[0]
+
+    def test_get_and_set(self, path, clock):
+        from stac.diskcache import SqliteCache
+        cache = SqliteCache(path, 60, clock=clock)
+
+        assert cache.get(('release', 'com.example', 'service', False)) is None
+        cache.set(('release', 'com.example', 'service', False), '1.2.3')
+        cache.set(('versions', 'com.example', 'service', False, False, 2), ('1.2.3', '1.2.2'))
+
+        assert '1.2.3' == cache.get(('release', 'com.example', 'service', False))
+        versions = cache.get(('versions', 'com.example', 'service', False, False, 2))
+        assert ['1.2.3', '1.2.2'] == versions
+        assert 'default' == cache.get(('release', 'com.example', 'service', True), 'default')
+        assert 2 == cache.hits
+        assert 2 == cache.misses
+        assert 2 == len(cache)
+
+    def test_expired(self, path, clock):
+        from stac.diskcache import SqliteCache
+        cache = SqliteCache(path, 60, clock=clock)
+
+        cache.set(('key',), 'value')
+        clock.now += 59
+        assert 'value' == cache.get(('key',))
+
+        clock.now += 1
+        assert cache.get(('key',)) is None
+
+    def test_shared_between_instances(self, path):
+        from stac.diskcache import SqliteCache
+        writer = SqliteCache(path, 60)
+        reader = SqliteCache(path, 60)
+
+        writer.set(('key',), 'value')
+        assert 'value' == reader.get(('key',))
+
+    def test_namespaces_isolated(self, path):
+        from stac.diskcache import SqliteCache
+        base_url = 'https://example.com/artifactory'
+        release = SqliteCache(path, 60, namespace=(base_url, 'libs-release'))
+        snapshot = SqliteCache(path, 60, namespace=(base_url, 'libs-snapshot'))
+
+        release.set(('key',), '1.2.3')
+        snapshot.set(('key',), '1.2.4-SNAPSHOT')
+
+        assert '1.2.3' == release.get(('key',))
+        assert '1.2.4-SNAPSHOT' == snapshot.get(('key',))
+
+    def test_evicts_least_recently_used(self, path, clock):
+        from stac.diskcache import SqliteCache
+        cache = SqliteCache(path, 600, max_size=2, clock=clock)
+
+        cache.set(('a',), 1)
+        clock.now += 100
+        cache.set(('b',), 2)
+        clock.now += 100
+        cache.get(('a',))
+        clock.now += 100
+        cache.set(('c',), 3)
+
+        assert 1 == cache.get(('a',))
+        assert cache.get(('b',)) is None
+        assert 3 == cache.get(('c',))
+        assert 1 == cache.evictions
+        assert 2 == len(cache)
+
+    def test_evicts_after_replacing_entries(self, path, clock):
+        from stac.diskcache import SqliteCache
+        cache = SqliteCache(path, 600, max_size=2, clock=clock)
+
+        cache.set(('a',), 1)
+        clock.now += 100
+        cache.set(('b',), 2)
+        cache.set(('b',), 3)
+        clock.now += 100
+        cache.set(('c',), 4)
+
+        assert cache.get(('a',)) is None
+        assert 3 == cache.get(('b',))
+        assert 1 == cache.evictions
+        assert 2 == len(cache)
+
+    @pytest.mark.skipif(
+        not hasattr(sqlite3.Connection, 'set_trace_callback'), reason="Can't trace statements")
+    def test_entries_not_counted_every_write(self, path):
+        from stac.diskcache import SqliteCache
+        cache = SqliteCache(path, 600)
+        statements = []
+
+        def trace(statement):
+            statements.append(statement)
+
+        cache._get_connection().set_trace_callback(trace)
+
+        for i in range(10):
+            cache.set(('key', i), i)
+
+        assert 1 == len([statement for statement in statements if 'COUNT' in statement])
+
+    def test_purge(self, path, clock):
+        from stac.diskcache import SqliteCache
+        cache = SqliteCache(path, 60, clock=clock)
+
+        cache.set(('a',), 1)
+        clock.now += 30
+        cache.set(('b',), 2)
+        clock.now += 30
+
+        assert 1 == cache.purge()
+        assert 1 == len(cache)
+        assert 2 == cache.get(('b',))
+
+    def test_clear(self, path):
+        from stac.diskcache import SqliteCache
+        cache = SqliteCache(path, 60)
+
+        cache.set(('a',), 1)
+        cache.clear()
+
+        assert 0 == len(cache)
+        assert cache.get(('a',)) is None
+
+    def test_errors_are_misses(self, path):
+        from stac.diskcache import SqliteCache
+        import sqlite3
+        cache = SqliteCache(path, 60)
+        cache.set(('a',), 1)
+
+        error = sqlite3.OperationalError('database is locked')
+        with mock.patch.object(cache, '_get_connection', side_effect=error):
+            cache.set(('b',), 2)
+            assert cache.get(('a',)) is None
+
+        assert 1 == cache.misses
+        assert 1 == len(cache)
+
+    def test_concurrent_threads(self, path):
+        from stac.diskcache import SqliteCache
+        cache = SqliteCache(path, 60)
+
+        def fill(worker):
+            for i in range(20):
+                cache.set(('key', worker, i), i)
+                assert i == cache.get(('key', worker, i))
+
+        threads = [threading.Thread(target=fill, args=(worker,)) for worker in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert 80 == len(cache)
+        assert 80 == cache.hits
+
+    def test_concurrent_processes(self, path):
+        from stac.diskcache import SqliteCache
+        cache = SqliteCache(path, 60)
+
+        processes = [
+            multiprocessing.Process(target=_fill, args=(path, worker)) for worker in range(3)]
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join()
+
+        assert all(0 == process.exitcode for process in processes)
+        assert 20 == len(cache)
+        assert cache.get(('release', 'com.example', 'service0', False)).startswith('1.')
+
+
+class TestPersistentCaching(object):
+    def test_versions_shared_between_daos(self, path):
+        from stac.cache import CachingVersionDao
+        from stac.diskcache import SqliteCache
+        from stac.http import VersionApiDao
+
+        first = mock.Mock(spec=VersionApiDao)
+        first.get_most_recent_versions.return_value = ['1.2.3', '1.2.2']
+        second = mock.Mock(spec=VersionApiDao)
+
+        CachingVersionDao(first, SqliteCache(path, 60)).get_most_recent_versions(
+            'com.example', 'service', 2)
+        versions = CachingVersionDao(second, SqliteCache(path, 60)).get_most_recent_versions(
+            'com.example', 'service', 2)
+
+        assert ['1.2.3', '1.2.2'] == versions
+        assert not second.get_most_recent_versions.called
+
+    @pytest.mark.parametrize('options', [
+        {'use_aql': True},
+        {'username': 'deploy', 'password': 'secret'},
+    ])
+    def test_clients_with_different_options_not_shared(self, path, options):
+        from stac.client import new_maven_client
+        from stac.http import VersionApiDao
+
+        with mock.patch.object(VersionApiDao, 'get_most_recent_release') as get_release:
+            get_release.return_value = '1.2.3'
+            for client_options in ({}, {}, options):
+                client = new_maven_client(
+                    'https://www.example.com/artifactory', 'libs-release', cache_ttl=60,
+                    cache_path=path, **client_options)
+                client.get_latest_version('com.example.service')
+
+        assert 2 == get_release.call_count
+        with open(path, 'rb') as handle:
+            assert b'secret' not in handle.read()
+
+    def test_stale_versions_shared_between_daos(self, path, clock):
+        from stac.cache import RefreshingVersionDao
+        from stac.diskcache import SqliteCache
+        from stac.http import VersionApiDao
+
+        first = mock.Mock(spec=VersionApiDao)
+        first.get_most_recent_release.return_value = '1.2.3'
+        second = mock.Mock(spec=VersionApiDao)
+        second.get_most_recent_release.return_value = '1.2.4'
+
+        dao = RefreshingVersionDao(first, SqliteCache(path, 20, clock=clock), 10, 10, clock=clock)
+        dao.get_most_recent_release('com.example', 'service')
+        clock.now += 15
+        dao = RefreshingVersionDao(second, SqliteCache(path, 20, clock=clock), 10, 10, clock=clock)
+
+        assert '1.2.3' == dao.get_most_recent_release('com.example', 'service')
+        dao.close()
+        assert '1.2.4' == dao.get_most_recent_release('com.example', 'service')
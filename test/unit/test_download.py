@@ -0,0 +1,426 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import hashlib
+import os
+
+import mock
+import pytest
+import requests
+
+CONTENT = b'PK\x03\x04' + b'0123456789' * 1000
+
+ETAG = '"{0}"'.format(hashlib.sha1(CONTENT).hexdigest())
+
+
+@pytest.fixture
+def session():
+    return mock.Mock(spec=requests.Session)
+
+
+@pytest.fixture
+def response():
+    response = mock.Mock(spec=requests.Response)
+    response.status_code = 200
+    response.headers = {
+        'X-Checksum-Sha256': hashlib.sha256(CONTENT).hexdigest(),
+        'X-Checksum-Sha1': hashlib.sha1(CONTENT).hexdigest(),
+        'X-Checksum-Md5': hashlib.md5(CONTENT).hexdigest(),
+    }
+    response.iter_content.side_effect = lambda chunk_size: (
+        CONTENT[i:i + chunk_size] for i in range(0, len(CONTENT), chunk_size))
+    return response
+
+
+class TestArtifactDownloader(object):
+    def test_download(self, session, response, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        session.get.return_value = response
+        path = str(tmpdir.join('service-1.4.5.war'))
+
+        downloader = ArtifactDownloader(session, chunk_size=1024)
+        result = downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert path == result.path
+        assert len(CONTENT) == result.size
+        assert hashlib.sha1(CONTENT).hexdigest() == result.checksums['sha1']
+        assert not os.path.exists(path + '.part')
+        response.close.assert_called_once_with()
+
+    def test_download_without_checksums(self, session, response, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        response.headers = {}
+        session.get.return_value = response
+        path = str(tmpdir.join('service-1.4.5.war'))
+
+        downloader = ArtifactDownloader(session)
+        downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+
+    def test_download_checksum_mismatch(self, session, response, tmpdir):
+        from stac.download import ArtifactDownloader
+        from stac.exceptions import ChecksumMismatchError
+
+        response.headers['X-Checksum-Sha1'] = hashlib.sha1(b'something else').hexdigest()
+        session.get.return_value = response
+        path = str(tmpdir.join('service-1.4.5.war'))
+
+        downloader = ArtifactDownloader(session)
+
+        with pytest.raises(ChecksumMismatchError) as exc_info:
+            downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        assert 'sha1' == exc_info.value.algorithm
+        assert not os.path.exists(path)
+        assert not os.path.exists(path + '.part')
+
+    def test_download_not_found(self, session, response, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        response.status_code = 404
+        error = requests.HTTPError("Something bad", request=requests.Request(), response=response)
+        response.raise_for_status.side_effect = error
+        session.get.return_value = response
+        path = str(tmpdir.join('service-1.4.5.war'))
+
+        downloader = ArtifactDownloader(session)
+
+        with pytest.raises(requests.HTTPError):
+            downloader.download('https://www.example.com/service-1.4.5.war', path)
+        assert not os.path.exists(path)
+
+    def test_download_concurrent_same_path(self, session, tmpdir):
+        import concurrent.futures
+        import threading
+        from stac.download import ArtifactDownloader
+
+        def slow_content(chunk_size):
+            for i in range(0, len(CONTENT), chunk_size):
+                # Give the other download time to start writing too
+                threading.Event().wait(0.001)
+                yield CONTENT[i:i + chunk_size]
+
+        def get(url, stream=False, timeout=None):
+            response = mock.Mock(spec=requests.Response)
+            response.status_code = 200
+            response.headers = {'X-Checksum-Sha1': hashlib.sha1(CONTENT).hexdigest()}
+            response.iter_content.side_effect = slow_content
+            return response
+
+        session.get.side_effect = get
+        path = str(tmpdir.join('service-1.4.5.war'))
+        downloader = ArtifactDownloader(session, chunk_size=1024)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=4) as executor:
+            futures = [executor.submit(
+                downloader.download, 'https://www.example.com/service-1.4.5.war', path)
+                for _ in range(4)]
+            results = [future.result() for future in futures]
+
+        assert [len(CONTENT)] * 4 == [result.size for result in results]
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert not os.path.exists(path + '.part')
+
+
+def _write_partial(path, content, validator):
+    with open(path + '.part', 'wb') as handle:
+        handle.write(content)
+    if validator is not None:
+        with open(path + '.part.validator', 'w') as handle:
+            handle.write(validator)
+
+
+class FakeRangeSession(object):
+    """Session that serves CONTENT, honoring range requests if enabled."""
+
+    def __init__(self, ranges=True, fail_at=None, sha1=None, etag=ETAG):
+        self.ranges = ranges
+        self.fail_at = fail_at
+        self.sha1 = sha1 or hashlib.sha1(CONTENT).hexdigest()
+        self.etag = etag
+        self.requested = []
+
+    def _headers(self):
+        headers = {
+            'Content-Length': str(len(CONTENT)),
+            'X-Checksum-Sha1': self.sha1,
+        }
+        if self.etag is not None:
+            headers['ETag'] = self.etag
+        if self.ranges:
+            headers['Accept-Ranges'] = 'bytes'
+        return headers
+
+    def head(self, url, allow_redirects=False, timeout=None):
+        response = mock.Mock(spec=requests.Response)
+        response.status_code = 200
+        response.headers = self._headers()
+        return response
+
+    def get(self, url, stream=False, headers=None, timeout=None):
+        body = CONTENT
+        response = mock.Mock(spec=requests.Response)
+        response.status_code = 200
+        response.headers = self._headers()
+
+        header = (headers or {}).get('Range')
+        self.requested.append(header)
+        if_range = (headers or {}).get('If-Range')
+        if header is not None and self.ranges and if_range in (None, self.etag):
+            start, _, end = header[len('bytes='):].partition('-')
+            end = int(end) if end else len(CONTENT) - 1
+            body = CONTENT[int(start):end + 1]
+            response.status_code = 206
+        if self.fail_at is not None and header is not None and \
+                header.startswith('bytes={0}-'.format(self.fail_at)):
+            response.raise_for_status.side_effect = requests.HTTPError(
+                "Something bad", response=response)
+
+        response.iter_content.side_effect = lambda chunk_size: (
+            body[i:i + chunk_size] for i in range(0, len(body), chunk_size))
+        return response
+
+
+class TestArtifactDownloaderSegments(object):
+    def test_invalid_segments(self, session):
+        from stac.download import ArtifactDownloader
+
+        with pytest.raises(ValueError):
+            ArtifactDownloader(session, max_segments=0)
+
+    def test_download_segments(self, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        session = FakeRangeSession()
+        path = str(tmpdir.join('service-1.4.5.war'))
+
+        downloader = ArtifactDownloader(
+            session, chunk_size=100, max_segments=4, min_segment_size=1000)
+        result = downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert len(CONTENT) == result.size
+        assert 4 == len(session.requested)
+        assert not os.path.exists(path + '.part.segments')
+
+    def test_download_segments_not_supported(self, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        session = FakeRangeSession(ranges=False)
+        path = str(tmpdir.join('service-1.4.5.war'))
+
+        downloader = ArtifactDownloader(
+            session, chunk_size=100, max_segments=4, min_segment_size=1000)
+        downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert [None] == session.requested
+
+    def test_download_segments_resume(self, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        path = str(tmpdir.join('service-1.4.5.war'))
+        downloader = ArtifactDownloader(
+            FakeRangeSession(fail_at=5002), chunk_size=100, max_segments=2, min_segment_size=1000)
+
+        with pytest.raises(requests.HTTPError):
+            downloader.download('https://www.example.com/service-1.4.5.war', path)
+        assert os.path.exists(path + '.part.segments')
+
+        session = FakeRangeSession()
+        downloader = ArtifactDownloader(
+            session, chunk_size=100, max_segments=2, min_segment_size=1000)
+        downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert ['bytes=5002-10003'] == session.requested
+
+    def test_download_segments_resume_changed(self, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        path = str(tmpdir.join('service-1.4.5.war'))
+        downloader = ArtifactDownloader(
+            FakeRangeSession(fail_at=5002, etag='"previous-build"'), chunk_size=100,
+            max_segments=2, min_segment_size=1000)
+
+        with pytest.raises(requests.HTTPError):
+            downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        session = FakeRangeSession()
+        downloader = ArtifactDownloader(
+            session, chunk_size=100, max_segments=2, min_segment_size=1000)
+        downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert ['bytes=0-5001', 'bytes=5002-10003'] == sorted(session.requested)
+
+    def test_download_segments_changed_during_download(self, tmpdir):
+        from stac.download import ArtifactDownloader
+        from stac.exceptions import DownloadError
+
+        class ChangingSession(FakeRangeSession):
+            def head(self, url, allow_redirects=False, timeout=None):
+                response = super(ChangingSession, self).head(
+                    url, allow_redirects=allow_redirects, timeout=timeout)
+                # A new build is deployed after the first request
+                self.etag = '"new-build"'
+                return response
+
+        path = str(tmpdir.join('service-1.4.5.war'))
+        downloader = ArtifactDownloader(
+            ChangingSession(), chunk_size=100, max_segments=2, min_segment_size=1000)
+
+        with pytest.raises(DownloadError):
+            downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+    def test_download_stream_resume(self, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        path = str(tmpdir.join('service-1.4.5.war'))
+        _write_partial(path, CONTENT[:3000], ETAG)
+
+        session = FakeRangeSession()
+        downloader = ArtifactDownloader(session, chunk_size=100)
+        result = downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert hashlib.md5(CONTENT).hexdigest() == result.checksums['md5']
+        assert ['bytes=3000-'] == session.requested
+        assert not os.path.exists(path + '.part.validator')
+
+    def test_download_stream_resume_changed(self, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        path = str(tmpdir.join('service-1.4.5.war'))
+        _write_partial(path, b'x' * 3000, '"previous-build"')
+
+        session = FakeRangeSession()
+        downloader = ArtifactDownloader(session, chunk_size=100)
+        downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert ['bytes=3000-', None] == session.requested
+
+    def test_download_stream_resume_without_validator(self, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        path = str(tmpdir.join('service-1.4.5.war'))
+        _write_partial(path, b'x' * 3000, None)
+
+        session = FakeRangeSession()
+        downloader = ArtifactDownloader(session, chunk_size=100)
+        downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert [None] == session.requested
+
+    def test_download_stream_resume_not_supported(self, tmpdir):
+        from stac.download import ArtifactDownloader
+
+        path = str(tmpdir.join('service-1.4.5.war'))
+        _write_partial(path, b'garbage', ETAG)
+
+        session = FakeRangeSession(ranges=False)
+        downloader = ArtifactDownloader(session, chunk_size=100)
+        downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert ['bytes=7-', None] == session.requested
+
+    def test_download_stream_retry_resumes(self, tmpdir):
+        from stac.download import ArtifactDownloader
+        from stac.retry import RetryPolicy
+
+        class FlakySession(FakeRangeSession):
+            def get(self, url, stream=False, headers=None, timeout=None):
+                response = super(FlakySession, self).get(
+                    url, stream=stream, headers=headers, timeout=timeout)
+                if headers is None:
+                    def iter_content(chunk_size):
+                        yield CONTENT[:4000]
+                        raise requests.exceptions.ChunkedEncodingError("Connection reset")
+                    response.iter_content.side_effect = iter_content
+                return response
+
+        session = FlakySession()
+        path = str(tmpdir.join('service-1.4.5.war'))
+        policy = RetryPolicy(sleep=lambda seconds: None)
+
+        downloader = ArtifactDownloader(session, chunk_size=100, retry_policy=policy)
+        downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert [None, 'bytes=4000-'] == session.requested
+        assert 1 == policy.retries
+
+
+class TestArtifactDownloaderStore(object):
+    def test_download_adds_to_store(self, tmpdir):
+        from stac.download import ArtifactDownloader
+        from stac.store import ArtifactStore
+
+        store = ArtifactStore(str(tmpdir.join('store')))
+        session = FakeRangeSession()
+        path = str(tmpdir.join('service-1.4.5.war'))
+
+        downloader = ArtifactDownloader(session, store=store)
+        downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        assert store.contains(hashlib.sha1(CONTENT).hexdigest())
+        assert [None] == session.requested
+
+    def test_download_uses_store(self, tmpdir):
+        from stac.download import ArtifactDownloader
+        from stac.store import ArtifactStore
+
+        store = ArtifactStore(str(tmpdir.join('store')))
+        source = tmpdir.join('source.war')
+        source.write_binary(CONTENT)
+        store.put(hashlib.sha1(CONTENT).hexdigest(), str(source))
+
+        session = FakeRangeSession()
+        path = str(tmpdir.join('service-1.4.5.war'))
+
+        downloader = ArtifactDownloader(session, store=store)
+        result = downloader.download('https://www.example.com/service-1.4.5.war', path)
+
+        with open(path, 'rb') as handle:
+            assert CONTENT == handle.read()
+        assert len(CONTENT) == result.size
+        assert [] == session.requested
+
+    def test_download_invalid_checksum_not_used_as_path(self, tmpdir):
+        from stac.download import ArtifactDownloader
+        from stac.exceptions import ChecksumMismatchError
+        from stac.store import ArtifactStore
+
+        outside = tmpdir.join('outside.war')
+        outside.write_binary(b'not the artifact')
+        store = ArtifactStore(str(tmpdir.join('store')))
+        session = FakeRangeSession(sha1=str(outside))
+        path = str(tmpdir.join('service-1.4.5.war'))
+
+        downloader = ArtifactDownloader(session, store=store)
+
+        with pytest.raises(ChecksumMismatchError):
+            downloader.download('https://www.example.com/service-1.4.5.war', path)
+        assert [None] == session.requested
+        assert not os.path.exists(path)
@@ -0,0 +1,95 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import threading
+
+import mock
+import pytest
+
+
+class TestHedgingPolicy(object):
+    def test_invalid_arguments(self):
+        from stac.hedge import HedgingPolicy
+
+        with pytest.raises(ValueError):
+            HedgingPolicy(delay=-1)
+        with pytest.raises(ValueError):
+            HedgingPolicy(percentile=0)
+        with pytest.raises(ValueError):
+            HedgingPolicy(window=0)
+        with pytest.raises(ValueError):
+            HedgingPolicy(max_rate=1.5)
+
+    def test_call_fast_not_hedged(self):
+        from stac.hedge import HedgingPolicy
+        func = mock.Mock(return_value='1.2.3')
+        policy = HedgingPolicy(delay=5, max_rate=1)
+
+        assert '1.2.3' == policy.call(func, 'com.example.services', 'mail')
+        func.assert_called_once_with('com.example.services', 'mail')
+        assert 0 == policy.hedges
+
+    def test_call_slow_hedged(self):
+        from stac.hedge import HedgingPolicy
+        release = threading.Event()
+        calls = []
+
+        def func():
+            calls.append(None)
+            if len(calls) == 1:
+                release.wait(5)
+                return 'slow'
+            return 'fast'
+
+        policy = HedgingPolicy(delay=0.01, max_rate=1)
+        try:
+            assert 'fast' == policy.call(func)
+        finally:
+            release.set()
+        assert 1 == policy.hedges
+
+    def test_call_slow_rate_limited(self):
+        from stac.hedge import HedgingPolicy
+        func = mock.Mock(side_effect=lambda: threading.Event().wait(0.05) or 'slow')
+        policy = HedgingPolicy(delay=0, max_rate=0.5)
+
+        assert 'slow' == policy.call(func)
+        assert 0 == policy.hedges
+        assert 'slow' == policy.call(func)
+        assert 1 == policy.hedges
+
+    def test_call_hedge_fails_primary_succeeds(self):
+        from stac.hedge import HedgingPolicy
+        calls = []
+
+        def func():
+            calls.append(None)
+            if len(calls) == 1:
+                threading.Event().wait(0.05)
+                return 'slow'
+            raise ValueError("Bad JSON")
+
+        policy = HedgingPolicy(delay=0.01, max_rate=1)
+        assert 'slow' == policy.call(func)
+
+    def test_call_all_fail(self):
+        from stac.hedge import HedgingPolicy
+        func = mock.Mock(side_effect=lambda: threading.Event().wait(0.02) and None or 1 / 0)
+        policy = HedgingPolicy(delay=0, max_rate=1)
+
+        with pytest.raises(ZeroDivisionError):
+            policy.call(func)
+        assert 2 == func.call_count
+
+    def test_delay_percentile(self):
+        from stac.hedge import HedgingPolicy
+        times = iter(range(1000))
+        clock = mock.Mock(side_effect=lambda: next(times))
+        policy = HedgingPolicy(delay=7, percentile=50, window=20, clock=clock)
+
+        assert 7 == policy.delay
+        for _ in range(10):
+            policy.call(lambda: None)
+        assert 1 == policy.delay
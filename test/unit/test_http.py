@@ -3,6 +3,9 @@
 """
 """
 
+import json
+import re
+
 import mock
 import pytest
 import requests
@@ -50,7 +53,8 @@ class TestVersionApiClient(object):
         http_client = VersionApiDao(session, 'https://www.example.com/artifactory', 'libs-release')
 
         with pytest.raises(ValueError):
-            http_client.get_most_recent_versions('com.example.services', 'mail', remote=False, limit=0)
+            http_client.get_most_recent_versions(
+                'com.example.services', 'mail', remote=False, limit=0)
 
     def test_get_most_recent_versions_no_results(self, session, response):
         from stac.http import VersionApiDao
@@ -64,7 +68,8 @@ class TestVersionApiClient(object):
         http_client = VersionApiDao(session, 'https://www.example.com/artifactory', 'libs-release')
 
         with pytest.raises(requests.HTTPError):
-            http_client.get_most_recent_versions('com.example.services', 'mail', remote=False, limit=3)
+            http_client.get_most_recent_versions(
+                'com.example.services', 'mail', remote=False, limit=3)
 
     def test_get_most_recent_versions_no_integration_results(self, session, response):
         from stac.http import VersionApiDao
@@ -155,3 +160,403 @@ class TestVersionApiClient(object):
         assert 2 == len(versions)
         assert '4.441-SNAPSHOT' == versions[0]
         assert '4.440-SNAPSHOT' == versions[1]
+
+    def test_get_most_recent_versions_maven_ordering(self, session, response):
+        from stac.http import VersionApiDao
+
+        response.status_code = 200
+        response.url = 'https://www.example.com/artifactory/api/search/versions'
+        response.json.return_value = {
+            'results': [
+                {'version': '1.0-rc1', 'integration': False},
+                {'version': '1.10', 'integration': False},
+                {'version': '1.0', 'integration': False},
+                {'version': '1.9', 'integration': False},
+                {'version': '1.0-beta-2', 'integration': False}
+            ]
+        }
+
+        session.get.return_value = response
+
+        http_client = VersionApiDao(session, 'https://www.example.com/artifactory', 'libs-release')
+        versions = http_client.get_most_recent_versions(
+            'com.example.services', 'mail', remote=False, limit=4, integration=False)
+
+        assert ['1.10', '1.9', '1.0', '1.0-rc1'] == versions
+
+    def test_get_most_recent_versions_streaming(self, session, response):
+        from stac.http import VersionApiDao
+
+        body = json.dumps({
+            'errors': None,
+            'results': [
+                {
+                    'version': '4.439-SNAPSHOT',
+                    'integration': True,
+                    'repos': [u'libs-snapshot-\u00e9']
+                },
+                {'version': '4.441-SNAPSHOT', 'integration': True},
+                {'version': '4.440', 'integration': False, 'size': 123456},
+                {'version': '4.440-SNAPSHOT', 'integration': True}
+            ],
+            'total': 4
+        }, ensure_ascii=False).encode('utf-8')
+
+        response.status_code = 200
+        response.encoding = None
+        response.iter_content.side_effect = \
+            lambda chunk_size: (body[i:i + 7] for i in range(0, len(body), 7))
+        session.get.return_value = response
+
+        http_client = VersionApiDao(
+            session, 'https://www.example.com/artifactory', 'libs-snapshot', streaming=True)
+        versions = http_client.get_most_recent_versions(
+            'com.example.services', 'mail', remote=False, limit=2, integration=True)
+
+        assert ['4.441-SNAPSHOT', '4.440-SNAPSHOT'] == versions
+        assert session.get.call_args[1]['stream']
+        response.close.assert_called_once_with()
+
+    def test_get_most_recent_versions_streaming_no_results(self, session, response):
+        from stac.http import VersionApiDao
+
+        response.status_code = 200
+        response.encoding = 'utf-8'
+        response.iter_content.return_value = iter([b'{"results" : [ ] }'])
+        session.get.return_value = response
+
+        http_client = VersionApiDao(
+            session, 'https://www.example.com/artifactory', 'libs-release', streaming=True)
+        versions = http_client.get_most_recent_versions(
+            'com.example.services', 'mail', remote=False, limit=2)
+
+        assert [] == versions
+
+    def test_get_most_recent_versions_streaming_invalid(self, session, response):
+        from stac.http import VersionApiDao
+
+        response.status_code = 200
+        response.encoding = 'utf-8'
+        response.iter_content.return_value = iter([b'{"results": [{"version": "1.0", "integ'])
+        session.get.return_value = response
+
+        http_client = VersionApiDao(
+            session, 'https://www.example.com/artifactory', 'libs-release', streaming=True)
+
+        with pytest.raises(ValueError):
+            http_client.get_most_recent_versions(
+                'com.example.services', 'mail', remote=False, limit=2)
+
+
+def test_iter_json_array_numbers_across_chunks():
+    from stac.http import _iter_json_array
+    chunks = ['{"other": 12', '34, "results": [1', '23, 4', '5]}']
+
+    assert [123, 45] == list(_iter_json_array(chunks, 'results'))
+
+
+def test_get_versions_since_version_api(session, response):
+    from stac.http import VersionApiDao
+
+    response.status_code = 200
+    response.json.return_value = {
+        'results': [
+            {'version': '1.2.0', 'integration': False},
+            {'version': '1.3.0-SNAPSHOT', 'integration': True},
+            {'version': '1.10.0', 'integration': False},
+        ]
+    }
+    session.get.return_value = response
+
+    dao = VersionApiDao(session, 'https://www.example.com/artifactory', 'libs-release')
+
+    assert (['1.2.0', '1.10.0'], None) == dao.get_versions_since(
+        'com.example.services', 'mail', since='2016-04-01T00:00:00.000Z')
+
+
+class TestAqlVersionDao(object):
+    @pytest.mark.parametrize('remote', [False, True])
+    def test_get_most_recent_release(self, session, remote):
+        from stac.http import AqlVersionDao, VersionApiDao
+
+        fallback = mock.Mock(spec=VersionApiDao)
+        fallback.get_most_recent_release.return_value = '4.34.1'
+
+        dao = AqlVersionDao(
+            session, 'https://www.example.com/artifactory', 'libs-release', fallback=fallback)
+
+        assert '4.34.1' == dao.get_most_recent_release(
+            'com.example.services', 'mail', remote=remote)
+        fallback.get_most_recent_release.assert_called_once_with(
+            'com.example.services', 'mail', remote=remote)
+        assert not session.post.called
+
+    def test_get_most_recent_versions(self, session, response):
+        from stac.http import AqlVersionDao
+
+        response.status_code = 200
+        response.json.return_value = {
+            'results': [
+                {'name': '4.440-SNAPSHOT', 'created': '2016-04-02T12:00:00.000Z'},
+                {'name': '4.441-SNAPSHOT', 'created': '2016-04-01T12:00:00.000Z'},
+            ]
+        }
+        session.post.return_value = response
+
+        dao = AqlVersionDao(session, 'https://www.example.com/artifactory', 'libs-snapshot')
+        versions = dao.get_most_recent_versions('com.example.services', 'mail', 2, integration=True)
+
+        assert ['4.441-SNAPSHOT', '4.440-SNAPSHOT'] == versions
+        query = session.post.call_args[1]['data']
+        assert '"$match": "*-SNAPSHOT"' in query
+        assert '.limit(' not in query
+
+    def test_get_most_recent_versions_highest_snapshot(self, session, response):
+        from stac.http import AqlVersionDao
+
+        results = [
+            {'name': '4.439-SNAPSHOT', 'created': '2016-04-03T12:00:00.000Z'},
+            {'name': '4.441-SNAPSHOT', 'created': '2016-04-02T12:00:00.000Z'},
+            {'name': '4.440-SNAPSHOT', 'created': '2016-04-01T12:00:00.000Z'},
+        ]
+
+        def search(url, data, headers, timeout):
+            # Like Artifactory, apply any limit to the most recently deployed versions
+            match = re.search(r'\.limit\((\d+)\)', data)
+            limit = int(match.group(1)) if match else None
+            response.json.return_value = {'results': results[:limit]}
+            return response
+
+        response.status_code = 200
+        session.post.side_effect = search
+
+        dao = AqlVersionDao(session, 'https://www.example.com/artifactory', 'libs-snapshot')
+        versions = dao.get_most_recent_versions('com.example.services', 'mail', 1, integration=True)
+
+        assert ['4.441-SNAPSHOT'] == versions
+
+    def test_get_most_recent_versions_releases_limited(self, session, response):
+        from stac.http import AqlVersionDao
+
+        response.status_code = 200
+        response.json.return_value = {
+            'results': [
+                {'name': '4.440', 'created': '2016-04-02T12:00:00.000Z'},
+                {'name': '4.441', 'created': '2016-04-01T12:00:00.000Z'},
+            ]
+        }
+        session.post.return_value = response
+
+        dao = AqlVersionDao(session, 'https://www.example.com/artifactory', 'libs-release')
+        versions = dao.get_most_recent_versions('com.example.services', 'mail', 2)
+
+        assert ['4.441', '4.440'] == versions
+        query = session.post.call_args[1]['data']
+        assert '"$nmatch": "*-SNAPSHOT"' in query
+        assert query.endswith('.limit(2)')
+
+    def test_get_most_recent_versions_error(self, session, response):
+        from stac.http import AqlVersionDao
+
+        response.status_code = 400
+        error = requests.HTTPError("Something bad", request=requests.Request(), response=response)
+        response.raise_for_status.side_effect = error
+        session.post.return_value = response
+
+        dao = AqlVersionDao(session, 'https://www.example.com/artifactory', 'libs-release')
+
+        with pytest.raises(requests.HTTPError):
+            dao.get_most_recent_versions('com.example.services', 'mail', 2)
+
+    def test_get_versions_since(self, session, response):
+        from stac.http import AqlVersionDao
+
+        response.status_code = 200
+        response.json.return_value = {
+            'results': [
+                {'name': '4.441', 'created': '2016-04-02T12:00:00.000Z'},
+                {'name': '4.440', 'created': '2016-04-01T12:00:00.000Z'},
+            ]
+        }
+        session.post.return_value = response
+
+        dao = AqlVersionDao(session, 'https://www.example.com/artifactory', 'libs-release')
+        versions, watermark = dao.get_versions_since(
+            'com.example.services', 'mail', since='2016-04-01T00:00:00.000Z')
+
+        assert ['4.441', '4.440'] == versions
+        assert '2016-04-02T12:00:00.000Z' == watermark
+        query = session.post.call_args[1]['data']
+        assert '"created": {"$gte": "2016-04-01T00:00:00.000Z"}' in query
+        assert '.limit(' not in query
+
+    def test_get_versions_since_no_new_versions(self, session, response):
+        from stac.http import AqlVersionDao
+
+        response.status_code = 200
+        response.json.return_value = {'results': []}
+        session.post.return_value = response
+
+        dao = AqlVersionDao(session, 'https://www.example.com/artifactory', 'libs-release')
+
+        assert ([], '2016-04-01T00:00:00.000Z') == dao.get_versions_since(
+            'com.example.services', 'mail', since='2016-04-01T00:00:00.000Z')
+
+    def test_get_most_recent_versions_invalid_limit(self, session):
+        from stac.http import AqlVersionDao
+        dao = AqlVersionDao(session, 'https://www.example.com/artifactory', 'libs-release')
+
+        with pytest.raises(ValueError):
+            dao.get_most_recent_versions('com.example.services', 'mail', 0)
+
+
+def test_get_most_recent_release_timeout(session, response):
+    from stac.http import VersionApiDao
+
+    response.status_code = 200
+    response.text = '4.34.1\n'
+    session.get.return_value = response
+
+    http_client = VersionApiDao(
+        session, 'https://www.example.com/artifactory', 'libs-release', timeout=(3, 10))
+    http_client.get_most_recent_release('com.example.services', 'mail')
+
+    assert (3, 10) == session.get.call_args[1]['timeout']
+
+
+def test_new_session():
+    from stac.http import new_session
+    session = new_session(username='deploy', password='secret', pool_connections=4, pool_maxsize=32)
+    adapter = session.get_adapter('https://www.example.com/artifactory')
+
+    assert ('deploy', 'secret') == session.auth
+    assert 4 == adapter.poolmanager.pools._maxsize
+    assert 32 == adapter.poolmanager.connection_pool_kw['maxsize']
+    assert 'socket_options' not in adapter.poolmanager.connection_pool_kw
+
+
+def test_new_session_tcp_keepalive():
+    import socket
+    from stac.http import new_session
+    session = new_session(tcp_keepalive=True)
+    adapter = session.get_adapter('http://www.example.com/artifactory')
+
+    options = adapter.poolmanager.connection_pool_kw['socket_options']
+    assert (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1) in options
+
+
+def test_get_most_recent_release_retry(session, response):
+    from stac.http import VersionApiDao
+    from stac.retry import RetryPolicy
+
+    unavailable = mock.Mock(spec=requests.Response)
+    unavailable.status_code = 503
+    unavailable.headers = {}
+    unavailable.raise_for_status.side_effect = requests.HTTPError(
+        "Something bad", request=requests.Request(), response=unavailable)
+
+    response.status_code = 200
+    response.text = '4.34.1\n'
+    session.get.side_effect = [unavailable, response]
+
+    policy = RetryPolicy(sleep=lambda seconds: None)
+    http_client = VersionApiDao(
+        session, 'https://www.example.com/artifactory', 'libs-release', retry_policy=policy)
+
+    assert '4.34.1' == http_client.get_most_recent_release('com.example.services', 'mail')
+    assert 1 == policy.retries
+
+
+def test_get_most_recent_release_hedging(session, response):
+    from stac.http import VersionApiDao
+
+    response.status_code = 200
+    response.text = '4.34.1\n'
+    session.get.return_value = response
+    policy = mock.Mock()
+    policy.call.side_effect = lambda func, *args: func(*args)
+
+    http_client = VersionApiDao(
+        session, 'https://www.example.com/artifactory', 'libs-release', hedging_policy=policy)
+
+    assert '4.34.1' == http_client.get_most_recent_release('com.example.services', 'mail')
+    assert 1 == policy.call.call_count
+
+
+def test_get_most_recent_release_metrics(session, response):
+    from stac.http import VersionApiDao
+    from stac.metrics import MetricsRegistry
+
+    response.status_code = 404
+    response.content = b'Not found'
+    response.raise_for_status.side_effect = requests.HTTPError(
+        "Something bad", request=requests.Request(), response=response)
+    session.get.return_value = response
+    registry = MetricsRegistry()
+
+    http_client = VersionApiDao(
+        session, 'https://www.example.com/artifactory', 'libs-release', metrics=registry)
+
+    with pytest.raises(requests.HTTPError):
+        http_client.get_most_recent_release('com.example.services', 'mail')
+
+    assert 1 == registry.get_count(
+        'stac_requests_total', {'endpoint': 'latestVersion', 'status': '404'})
+    assert 1 == registry.get_histogram(
+        'stac_request_duration_seconds', {'endpoint': 'latestVersion'}).count
+
+
+def test_get_most_recent_version_if_changed(session, response):
+    from stac.http import VersionApiDao
+
+    response.status_code = 200
+    response.text = '4.34.1\n'
+    response.headers = {'ETag': '"abc123"', 'Last-Modified': 'Wed, 21 Oct 2015 07:28:00 GMT'}
+    session.get.return_value = response
+
+    http_client = VersionApiDao(session, 'https://www.example.com/artifactory', 'libs-release')
+    version, validators = http_client.get_most_recent_version_if_changed(
+        'com.example.services', 'mail')
+
+    assert '4.34.1' == version
+    assert {
+        'If-None-Match': '"abc123"',
+        'If-Modified-Since': 'Wed, 21 Oct 2015 07:28:00 GMT',
+    } == validators
+    assert {} == session.get.call_args[1]['headers']
+
+
+def test_get_most_recent_version_if_changed_not_modified(session, response):
+    from stac.http import VersionApiDao
+
+    response.status_code = 304
+    session.get.return_value = response
+
+    http_client = VersionApiDao(session, 'https://www.example.com/artifactory', 'libs-release')
+    result = http_client.get_most_recent_version_if_changed(
+        'com.example.services', 'mail', validators={'If-None-Match': '"abc123"'})
+
+    assert result is None
+    assert {'If-None-Match': '"abc123"'} == session.get.call_args[1]['headers']
+    assert not response.raise_for_status.called
+
+
+def test_get_most_recent_version_if_changed_integration(session, response):
+    from stac.http import VersionApiDao
+
+    response.status_code = 200
+    response.headers = {}
+    response.json.return_value = {'results': [
+        {'version': '1.3.0', 'integration': False},
+        {'version': '1.3.1-SNAPSHOT', 'integration': True},
+        {'version': '1.2.9-SNAPSHOT', 'integration': True},
+    ]}
+    session.get.return_value = response
+
+    http_client = VersionApiDao(session, 'https://www.example.com/artifactory', 'libs-snapshot')
+    version, validators = http_client.get_most_recent_version_if_changed(
+        'com.example.services', 'mail', integration=True)
+
+    assert '1.3.1-SNAPSHOT' == version
+    assert {} == validators
+    assert session.get.call_args[0][0].endswith('/api/search/versions')
@@ -0,0 +1,203 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import threading
+
+import mock
+import pytest
+
+
+@pytest.fixture
+def aql_dao():
+    from stac.http import AqlVersionDao
+    return mock.Mock(spec=AqlVersionDao)
+
+
+@pytest.fixture
+def version_dao():
+    from stac.http import VersionApiDao
+    return mock.Mock(spec=VersionApiDao)
+
+
+class TestIndexedVersionDao(object):
+    def test_invalid_arguments(self, aql_dao):
+        from stac.index import IndexedVersionDao
+
+        with pytest.raises(ValueError):
+            IndexedVersionDao(aql_dao, refresh_interval=-1)
+        with pytest.raises(ValueError):
+            IndexedVersionDao(aql_dao, max_size=0)
+
+    def test_get_most_recent_versions(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        aql_dao.get_versions_since.return_value = (['1.10.0', '1.9.0', '1.2.0'], '2016-04-02')
+        dao = IndexedVersionDao(aql_dao, clock=clock)
+
+        versions = dao.get_most_recent_versions('com.example.services', 'mail', 2)
+
+        assert ['1.10.0', '1.9.0'] == versions
+        aql_dao.get_versions_since.assert_called_once_with(
+            'com.example.services', 'mail', since=None, remote=False, integration=False)
+
+    def test_get_most_recent_versions_invalid_limit(self, aql_dao):
+        from stac.index import IndexedVersionDao
+
+        with pytest.raises(ValueError):
+            IndexedVersionDao(aql_dao).get_most_recent_versions('com.example.services', 'mail', 0)
+
+    def test_refresh_fetches_new_versions_only(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        aql_dao.get_versions_since.side_effect = [
+            (['1.1.0', '1.0.0'], '2016-04-02'),
+            (['1.1.0', '1.0.1'], '2016-04-03'),
+        ]
+        dao = IndexedVersionDao(aql_dao, clock=clock)
+        dao.get_most_recent_release('com.example.services', 'mail')
+
+        assert ['1.1.0', '1.0.1', '1.0.0'] == dao.get_most_recent_versions(
+            'com.example.services', 'mail', 5)
+        assert '2016-04-02' == aql_dao.get_versions_since.call_args[1]['since']
+
+    def test_refresh_interval(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        aql_dao.get_versions_since.return_value = (['1.0.0'], '2016-04-02')
+        dao = IndexedVersionDao(aql_dao, refresh_interval=10, clock=clock)
+
+        dao.get_most_recent_release('com.example.services', 'mail')
+        clock.now += 9
+        dao.get_most_recent_release('com.example.services', 'mail')
+        assert 1 == aql_dao.get_versions_since.call_count
+
+        clock.now += 1
+        dao.get_most_recent_release('com.example.services', 'mail')
+        assert 2 == aql_dao.get_versions_since.call_count
+
+    def test_rebuild_drops_deleted_versions(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        aql_dao.get_versions_since.side_effect = [
+            (['1.1.0', '1.0.0'], '2016-04-02'),
+            (['1.0.0'], '2016-04-01'),
+        ]
+        dao = IndexedVersionDao(aql_dao, rebuild_interval=60, clock=clock)
+        dao.get_most_recent_release('com.example.services', 'mail')
+        clock.now += 60
+
+        assert '1.0.0' == dao.get_most_recent_release('com.example.services', 'mail')
+        assert aql_dao.get_versions_since.call_args[1]['since'] is None
+
+    def test_complete_versions_merged(self, version_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        version_dao.get_versions_since.side_effect = [
+            (['1.0.0', '1.1.0'], None),
+            (['1.0.0', '1.2.0', '1.1.0'], None),
+            (['1.0.0', '1.2.0'], None),
+        ]
+        dao = IndexedVersionDao(version_dao, clock=clock)
+
+        assert ['1.1.0', '1.0.0'] == dao.get_most_recent_versions('com.example.services', 'mail', 5)
+        assert ['1.2.0', '1.1.0', '1.0.0'] == dao.get_most_recent_versions(
+            'com.example.services', 'mail', 5)
+        assert ['1.2.0', '1.0.0'] == dao.get_most_recent_versions('com.example.services', 'mail', 5)
+        assert version_dao.get_versions_since.call_args[1]['since'] is None
+
+    def test_integration_indexed_separately(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        def versions(group, artifact, since, remote, integration):
+            return (['1.1.0-SNAPSHOT'] if integration else ['1.0.0']), None
+
+        aql_dao.get_versions_since.side_effect = versions
+        dao = IndexedVersionDao(aql_dao, clock=clock)
+
+        assert ['1.1.0-SNAPSHOT'] == dao.get_most_recent_versions(
+            'com.example.services', 'mail', 1, integration=True)
+        assert '1.0.0' == dao.get_most_recent_release('com.example.services', 'mail')
+
+    def test_error_not_indexed(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        aql_dao.get_versions_since.side_effect = [RuntimeError("Something bad"), (['1.0.0'], None)]
+        dao = IndexedVersionDao(aql_dao, clock=clock)
+
+        with pytest.raises(RuntimeError):
+            dao.get_most_recent_release('com.example.services', 'mail')
+        assert '1.0.0' == dao.get_most_recent_release('com.example.services', 'mail')
+
+    def test_get_version_index_is_copy(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        aql_dao.get_versions_since.return_value = (['1.0.0'], '2016-04-02')
+        dao = IndexedVersionDao(aql_dao, refresh_interval=10, clock=clock)
+
+        index = dao.get_version_index('com.example.services', 'mail')
+        index.add('2.0.0')
+
+        assert '1.0.0' == dao.get_most_recent_release('com.example.services', 'mail')
+
+    def test_least_recently_used_evicted(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        aql_dao.get_versions_since.return_value = (['1.0.0'], '2016-04-02')
+        dao = IndexedVersionDao(aql_dao, refresh_interval=10, max_size=2, clock=clock)
+
+        dao.get_most_recent_release('com.example.services', 'mail')
+        dao.get_most_recent_release('com.example.services', 'login')
+        dao.get_most_recent_release('com.example.services', 'mail')
+        dao.get_most_recent_release('com.example.services', 'users')
+        assert 2 == len(dao)
+        assert 3 == aql_dao.get_versions_since.call_count
+
+        dao.get_most_recent_release('com.example.services', 'mail')
+        assert 3 == aql_dao.get_versions_since.call_count
+
+    def test_concurrent_lookups_share_refresh(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_versions(*args, **kwargs):
+            started.set()
+            release.wait(5)
+            return ['1.0.0'], '2016-04-02'
+
+        aql_dao.get_versions_since.side_effect = slow_versions
+        dao = IndexedVersionDao(aql_dao, refresh_interval=10, clock=clock)
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(
+            dao.get_most_recent_release('com.example.services', 'mail'))) for _ in range(2)]
+
+        threads[0].start()
+        assert started.wait(5)
+        threads[1].start()
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        assert ['1.0.0', '1.0.0'] == results
+        assert 1 == aql_dao.get_versions_since.call_count
+
+    def test_metrics(self, aql_dao, clock):
+        from stac.index import IndexedVersionDao
+        from stac.metrics import MetricsRegistry
+
+        aql_dao.get_versions_since.side_effect = [
+            (['1.0.0'], '2016-04-01'),
+            (['1.0.0'], '2016-04-01'),
+            (['1.1.0'], '2016-04-02'),
+        ]
+        registry = MetricsRegistry()
+        dao = IndexedVersionDao(aql_dao, metrics=registry, clock=clock)
+        for _ in range(3):
+            dao.get_most_recent_release('com.example.services', 'mail')
+
+        assert 1 == registry.get_count('stac_index_refreshes_total', {'result': 'full'})
+        assert 1 == registry.get_count('stac_index_refreshes_total', {'result': 'unchanged'})
+        assert 1 == registry.get_count('stac_index_refreshes_total', {'result': 'delta'})
@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import mock
+import pytest
+import requests
+
+
+class TestMetricsRegistry(object):
+    def test_invalid_buckets(self):
+        from stac.metrics import MetricsRegistry
+
+        with pytest.raises(ValueError):
+            MetricsRegistry(buckets=())
+        with pytest.raises(ValueError):
+            MetricsRegistry(buckets=(1.0, 0.5))
+
+    def test_increment(self):
+        from stac.metrics import MetricsRegistry
+        registry = MetricsRegistry()
+
+        registry.increment('stac_requests_total', labels={'endpoint': 'versions', 'status': 200})
+        registry.increment(
+            'stac_requests_total', 2, labels={'status': '200', 'endpoint': 'versions'})
+
+        assert 3 == registry.get_count(
+            'stac_requests_total', {'endpoint': 'versions', 'status': '200'})
+        assert 0 == registry.get_count('stac_requests_total', {'endpoint': 'aql', 'status': '200'})
+
+    def test_observe(self):
+        from stac.metrics import MetricsRegistry
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+
+        for value in (0.05, 0.1, 0.5, 3.0):
+            registry.observe('stac_request_duration_seconds', value)
+        histogram = registry.get_histogram('stac_request_duration_seconds')
+
+        assert [2, 1] == histogram.counts
+        assert 4 == histogram.count
+        assert 3.65 == pytest.approx(histogram.sum)
+        assert registry.get_histogram('stac_operation_duration_seconds') is None
+
+    def test_type_conflict(self):
+        from stac.metrics import MetricsRegistry
+        registry = MetricsRegistry()
+        registry.increment('stac_requests_total')
+
+        with pytest.raises(ValueError):
+            registry.observe('stac_requests_total', 1.0)
+
+    def test_render(self):
+        from stac.metrics import MetricsRegistry
+        registry = MetricsRegistry(buckets=(0.1, 1.0))
+
+        registry.increment('stac_requests_total', labels={'endpoint': 'versions', 'status': '200'})
+        registry.observe('stac_request_duration_seconds', 0.5, labels={'endpoint': 'versions'})
+        registry.increment('stac_cache_requests_total', labels={'result': 'say "hi"'})
+
+        assert '\n'.join([
+            '# TYPE stac_cache_requests_total counter',
+            'stac_cache_requests_total{result="say \\"hi\\""} 1',
+            '# TYPE stac_request_duration_seconds histogram',
+            'stac_request_duration_seconds_bucket{endpoint="versions",le="0.1"} 0',
+            'stac_request_duration_seconds_bucket{endpoint="versions",le="1.0"} 1',
+            'stac_request_duration_seconds_bucket{endpoint="versions",le="+Inf"} 1',
+            'stac_request_duration_seconds_sum{endpoint="versions"} 0.5',
+            'stac_request_duration_seconds_count{endpoint="versions"} 1',
+            '# TYPE stac_requests_total counter',
+            'stac_requests_total{endpoint="versions",status="200"} 1',
+        ]) + '\n' == registry.render()
+
+    def test_render_empty(self):
+        from stac.metrics import MetricsRegistry
+        assert '' == MetricsRegistry().render()
+
+
+class TestTrackRequest(object):
+    def test_response(self):
+        from stac.metrics import MetricsRegistry, track_request
+        registry = MetricsRegistry()
+        response = mock.Mock(spec=requests.Response)
+        response.status_code = 200
+
+        clock = mock.Mock(side_effect=[10.0, 10.25])
+        with track_request(registry, 'download', clock=clock) as request:
+            request.response = response
+            assert [b'abc', b'de'] == list(request.count([b'abc', b'de']))
+
+        assert 1 == registry.get_count(
+            'stac_requests_total', {'endpoint': 'download', 'status': '200'})
+        assert 5 == registry.get_count('stac_received_bytes_total', {'endpoint': 'download'})
+        assert 0.25 == registry.get_histogram(
+            'stac_request_duration_seconds', {'endpoint': 'download'}).sum
+
+    def test_no_response(self):
+        from stac.metrics import MetricsRegistry, track_request
+        registry = MetricsRegistry()
+
+        with pytest.raises(requests.ConnectionError):
+            with track_request(registry, 'versions'):
+                raise requests.ConnectionError("Connection refused")
+
+        assert 1 == registry.get_count(
+            'stac_requests_total', {'endpoint': 'versions', 'status': 'error'})
+        assert 0 == registry.get_count('stac_received_bytes_total', {'endpoint': 'versions'})
+
+
+class TestTrackOperation(object):
+    @pytest.mark.parametrize('error,result', [
+        (None, 'ok'),
+        (ValueError("Bad"), 'error'),
+    ])
+    def test_result(self, error, result):
+        from stac.metrics import MetricsRegistry, track_operation
+        registry = MetricsRegistry()
+
+        try:
+            with track_operation(registry, 'get_latest_version', 'com.example.mail'):
+                if error is not None:
+                    raise error
+        except ValueError:
+            pass
+
+        labels = {'operation': 'get_latest_version', 'artifact': 'com.example.mail'}
+        assert 1 == registry.get_count('stac_operations_total', dict(labels, result=result))
+        assert 1 == registry.get_histogram('stac_operation_duration_seconds', labels).count
+
+    def test_not_found(self):
+        from stac.exceptions import NoMatchingVersionsError
+        from stac.metrics import MetricsRegistry, track_operation
+        registry = MetricsRegistry()
+
+        with pytest.raises(NoMatchingVersionsError):
+            with track_operation(registry, 'get_latest_versions', 'com.example.mail'):
+                raise NoMatchingVersionsError("No versions")
+
+        assert 1 == registry.get_count('stac_operations_total', {
+            'operation': 'get_latest_versions',
+            'artifact': 'com.example.mail',
+            'result': 'not_found'
+        })
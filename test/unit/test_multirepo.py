@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import threading
+
+import mock
+import pytest
+import requests
+
+
+def _not_found():
+    response = mock.Mock(spec=requests.Response)
+    response.status_code = 404
+    return requests.HTTPError("Not found", request=requests.Request(), response=response)
+
+
+def _new_dao():
+    from stac.http import VersionApiDao
+    return mock.Mock(spec=VersionApiDao)
+
+
+@pytest.fixture
+def release_dao():
+    return _new_dao()
+
+
+@pytest.fixture
+def staging_dao():
+    return _new_dao()
+
+
+@pytest.fixture
+def multi_dao(release_dao, staging_dao):
+    from stac.multirepo import MultiRepoVersionDao
+    return MultiRepoVersionDao([('libs-release', release_dao), ('libs-staging', staging_dao)])
+
+
+class TestMultiRepoVersionDao(object):
+    def test_no_daos(self):
+        from stac.multirepo import MultiRepoVersionDao
+
+        with pytest.raises(ValueError):
+            MultiRepoVersionDao([])
+
+    def test_repos(self, multi_dao):
+        assert ['libs-release', 'libs-staging'] == multi_dao.repos
+
+    def test_get_most_recent_release(self, multi_dao, release_dao, staging_dao):
+        release_dao.get_most_recent_release.return_value = '1.9.0'
+        staging_dao.get_most_recent_release.return_value = '1.10.0'
+
+        assert '1.10.0' == multi_dao.get_most_recent_release('com.example.services', 'mail')
+        release_dao.get_most_recent_release.assert_called_once_with(
+            'com.example.services', 'mail', remote=False)
+
+    def test_get_most_recent_release_with_repos(self, multi_dao, release_dao, staging_dao):
+        release_dao.get_most_recent_release.return_value = '1.10.0'
+        staging_dao.get_most_recent_release.return_value = '1.10.0'
+
+        version, repos = multi_dao.get_most_recent_release_with_repos(
+            'com.example.services', 'mail')
+
+        assert '1.10.0' == version
+        assert ('libs-release', 'libs-staging') == repos
+
+    def test_get_most_recent_release_none(self, multi_dao, release_dao, staging_dao):
+        release_dao.get_most_recent_release.return_value = None
+        staging_dao.get_most_recent_release.side_effect = _not_found()
+
+        assert (None, ()) == multi_dao.get_most_recent_release_with_repos(
+            'com.example.services', 'mail')
+
+    def test_get_most_recent_versions_merged(self, multi_dao, release_dao, staging_dao):
+        release_dao.get_most_recent_versions.return_value = ['1.10.0', '1.9.1', '1.9.0']
+        staging_dao.get_most_recent_versions.return_value = ['1.11.0-rc1', '1.10.0', '1.9.0']
+
+        versions = multi_dao.get_most_recent_versions_with_repos(
+            'com.example.services', 'mail', 3, integration=False)
+
+        assert [
+            ('1.11.0-rc1', ('libs-staging',)),
+            ('1.10.0', ('libs-release', 'libs-staging')),
+            ('1.9.1', ('libs-release',)),
+        ] == versions
+        staging_dao.get_most_recent_versions.assert_called_once_with(
+            'com.example.services', 'mail', 3, remote=False, integration=False)
+
+    def test_get_most_recent_versions(self, multi_dao, release_dao, staging_dao):
+        release_dao.get_most_recent_versions.return_value = ['1.2.0-SNAPSHOT']
+        staging_dao.get_most_recent_versions.return_value = ['1.3.0-SNAPSHOT']
+
+        assert ['1.3.0-SNAPSHOT', '1.2.0-SNAPSHOT'] == multi_dao.get_most_recent_versions(
+            'com.example.services', 'mail', 2, integration=True)
+
+    def test_get_most_recent_versions_invalid_limit(self, multi_dao):
+        with pytest.raises(ValueError):
+            multi_dao.get_most_recent_versions('com.example.services', 'mail', 0)
+
+    def test_missing_from_some_repos(self, multi_dao, release_dao, staging_dao):
+        release_dao.get_most_recent_versions.side_effect = _not_found()
+        staging_dao.get_most_recent_versions.return_value = ['1.0.0']
+
+        assert ['1.0.0'] == multi_dao.get_most_recent_versions('com.example.services', 'mail', 2)
+
+    def test_missing_from_all_repos(self, multi_dao, release_dao, staging_dao):
+        first = _not_found()
+        release_dao.get_most_recent_versions.side_effect = first
+        staging_dao.get_most_recent_versions.side_effect = _not_found()
+
+        with pytest.raises(requests.HTTPError) as info:
+            multi_dao.get_most_recent_versions('com.example.services', 'mail', 2)
+        assert first is info.value
+
+    def test_error_raised_without_waiting(self, multi_dao, release_dao, staging_dao):
+        release = threading.Event()
+
+        def slow_versions(*args, **kwargs):
+            release.wait(5)
+            return ['1.0.0']
+
+        release_dao.get_most_recent_versions.side_effect = slow_versions
+        staging_dao.get_most_recent_versions.side_effect = requests.ConnectionError("Reset")
+
+        try:
+            with pytest.raises(requests.ConnectionError):
+                multi_dao.get_most_recent_versions('com.example.services', 'mail', 2)
+            assert not release.is_set()
+        finally:
+            release.set()
+
+    def test_concurrent(self, multi_dao, release_dao, staging_dao):
+        release_started = threading.Event()
+        staging_started = threading.Event()
+
+        def versions(started, other):
+            # Each lookup only finishes once the other one has started
+            def get(*args, **kwargs):
+                started.set()
+                assert other.wait(5)
+                return ['1.0.0']
+            return get
+
+        release_dao.get_most_recent_versions.side_effect = versions(
+            release_started, staging_started)
+        staging_dao.get_most_recent_versions.side_effect = versions(
+            staging_started, release_started)
+
+        assert [('1.0.0', ('libs-release', 'libs-staging'))] == \
+            multi_dao.get_most_recent_versions_with_repos('com.example.services', 'mail', 1)
+
+
+def test_client_not_found_in_any_repo(release_dao, staging_dao):
+    from stac.client import GenericArtifactoryClient, GenericArtifactoryClientConfig
+    from stac.exceptions import NoMatchingVersionsError
+    from stac.multirepo import MultiRepoVersionDao
+
+    release_dao.get_most_recent_release.side_effect = _not_found()
+    staging_dao.get_most_recent_release.side_effect = _not_found()
+
+    config = GenericArtifactoryClientConfig()
+    config.http_dao = MultiRepoVersionDao(
+        [('libs-release', release_dao), ('libs-staging', staging_dao)])
+    client = GenericArtifactoryClient(config)
+
+    with pytest.raises(NoMatchingVersionsError):
+        client.get_latest_version('com.example.services.mail')
+
+
+def _new_multi_repo_client(**kwargs):
+    from stac.client import new_maven_client
+    return new_maven_client(
+        'https://www.example.com/artifactory', ['libs-release', 'libs-staging'], **kwargs)
+
+
+def test_client_concurrent_lookups():
+    lock = threading.Lock()
+    searches = []
+    all_started = threading.Event()
+
+    def release(group, artifact, remote=False):
+        # Each search only finishes once every repository is being searched for both
+        with lock:
+            searches.append(artifact)
+            if len(searches) == 4:
+                all_started.set()
+        assert all_started.wait(5)
+        return '1.0.0'
+
+    client = _new_multi_repo_client(pool_maxsize=2)
+    with mock.patch('stac.http.VersionApiDao.get_most_recent_release', side_effect=release):
+        assert {'com.example.services.mail': '1.0.0', 'com.example.services.users': '1.0.0'} == \
+            client.get_latest_versions_many(
+                ['com.example.services.mail', 'com.example.services.users'])
+
+
+def test_client_urls_not_supported():
+    from stac.exceptions import StacError
+    client = _new_multi_repo_client()
+
+    with pytest.raises(StacError):
+        client.get_version_url('com.example.services.mail', 'jar', '1.0.0')
+    with pytest.raises(StacError):
+        client.get_version_urls([('com.example.services.mail', 'jar', '1.0.0', None)])
+
+
+def test_client_downloads_not_supported(tmpdir):
+    from stac.exceptions import StacError
+    client = _new_multi_repo_client()
+
+    with pytest.raises(StacError):
+        client.download_version('com.example.services.mail', 'jar', '1.0.0', str(tmpdir))
+
+
+@pytest.mark.parametrize('kwargs', [
+    {'download_segments': 4}, {'store_path': '/var/cache/stac'}, {'resolve_snapshots': True}])
+def test_client_download_options_not_supported(kwargs):
+    with pytest.raises(ValueError):
+        _new_multi_repo_client(**kwargs)
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import mock
+import pytest
+import requests
+
+
+def http_error(status, headers=None):
+    response = mock.Mock(spec=requests.Response)
+    response.status_code = status
+    response.headers = headers or {}
+    return requests.HTTPError("Something bad", request=requests.Request(), response=response)
+
+
+@pytest.fixture
+def sleep():
+    return mock.Mock()
+
+
+class TestRetryPolicy(object):
+    def test_invalid_attempts(self):
+        from stac.retry import RetryPolicy
+
+        with pytest.raises(ValueError):
+            RetryPolicy(max_attempts=0)
+
+    def test_call_success(self, sleep):
+        from stac.retry import RetryPolicy
+        policy = RetryPolicy(sleep=sleep)
+
+        assert '1.2.3' == policy.call(lambda version: version, '1.2.3')
+        assert 0 == policy.retries
+        assert not sleep.called
+
+    def test_call_retries_transient_status(self, sleep):
+        from stac.retry import RetryPolicy
+        func = mock.Mock(side_effect=[http_error(503), http_error(502), '1.2.3'])
+        policy = RetryPolicy(max_attempts=3, backoff=1, sleep=sleep)
+
+        assert '1.2.3' == policy.call(func)
+        assert 2 == policy.retries
+        assert 2 == sleep.call_count
+        assert 0 <= sleep.call_args_list[0][0][0] <= 1
+        assert 0 <= sleep.call_args_list[1][0][0] <= 2
+
+    def test_call_retries_connection_errors(self, sleep):
+        from stac.retry import RetryPolicy
+        func = mock.Mock(side_effect=[
+            requests.ConnectionError("reset"), requests.Timeout("slow"), '1.2.3'])
+        policy = RetryPolicy(sleep=sleep)
+
+        assert '1.2.3' == policy.call(func)
+        assert 2 == policy.retries
+
+    def test_call_does_not_retry_client_errors(self, sleep):
+        from stac.retry import RetryPolicy
+        func = mock.Mock(side_effect=http_error(404))
+        policy = RetryPolicy(sleep=sleep)
+
+        with pytest.raises(requests.HTTPError):
+            policy.call(func)
+        assert 1 == func.call_count
+        assert 0 == policy.retries
+
+    def test_call_does_not_retry_other_errors(self, sleep):
+        from stac.retry import RetryPolicy
+        func = mock.Mock(side_effect=ValueError("Bad JSON"))
+        policy = RetryPolicy(sleep=sleep)
+
+        with pytest.raises(ValueError):
+            policy.call(func)
+        assert 1 == func.call_count
+
+    def test_call_max_attempts(self, sleep):
+        from stac.retry import RetryPolicy
+        func = mock.Mock(side_effect=http_error(503))
+        policy = RetryPolicy(max_attempts=4, sleep=sleep)
+
+        with pytest.raises(requests.HTTPError):
+            policy.call(func)
+        assert 4 == func.call_count
+        assert 3 == policy.retries
+
+    def test_call_retry_after(self, sleep):
+        from stac.retry import RetryPolicy
+        func = mock.Mock(side_effect=[http_error(429, {'Retry-After': '7'}), '1.2.3'])
+        policy = RetryPolicy(sleep=sleep)
+
+        assert '1.2.3' == policy.call(func)
+        sleep.assert_called_once_with(7.0)
+
+    def test_call_retry_after_capped(self, sleep):
+        from stac.retry import RetryPolicy
+        func = mock.Mock(side_effect=[http_error(503, {'Retry-After': '86400'}), '1.2.3'])
+        policy = RetryPolicy(max_backoff=5, sleep=sleep)
+
+        assert '1.2.3' == policy.call(func)
+        sleep.assert_called_once_with(5)
+
+    def test_call_time_budget(self, sleep):
+        from stac.retry import RetryPolicy
+        func = mock.Mock(side_effect=[http_error(503, {'Retry-After': '30'}), '1.2.3'])
+        policy = RetryPolicy(max_backoff=60, time_budget=10, sleep=sleep)
+
+        with pytest.raises(requests.HTTPError):
+            policy.call(func)
+        assert not sleep.called
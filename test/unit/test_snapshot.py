@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import mock
+import pytest
+import requests
+
+METADATA = b"""<?xml version="1.0" encoding="UTF-8"?>
+<metadata modelVersion="1.1.0" xmlns="http://maven.apache.org/METADATA/1.1.0">
+  <groupId>com.example.services</groupId>
+  <artifactId>mail</artifactId>
+  <version>1.2.0-SNAPSHOT</version>
+  <versioning>
+    <snapshot>
+      <timestamp>20160404.120000</timestamp>
+      <buildNumber>3</buildNumber>
+    </snapshot>
+    <lastUpdated>20160404120000</lastUpdated>
+    <snapshotVersions>
+      <snapshotVersion>
+        <extension>jar</extension>
+        <value>1.2.0-20160404.120000-3</value>
+        <updated>20160404120000</updated>
+      </snapshotVersion>
+      <snapshotVersion>
+        <classifier>sources</classifier>
+        <extension>jar</extension>
+        <value>1.2.0-20160403.090000-2</value>
+        <updated>20160403090000</updated>
+      </snapshotVersion>
+    </snapshotVersions>
+  </versioning>
+</metadata>
+"""
+
+LEGACY_METADATA = b"""<?xml version="1.0" encoding="UTF-8"?>
+<metadata>
+  <versioning>
+    <snapshot>
+      <timestamp>20160401.080000</timestamp>
+      <buildNumber>7</buildNumber>
+    </snapshot>
+  </versioning>
+</metadata>
+"""
+
+
+@pytest.fixture
+def session():
+    return mock.Mock(spec=requests.Session)
+
+
+def _response(status_code=200, content=METADATA):
+    # Small chunks, so that elements are split across them
+    response = mock.Mock(spec=requests.Response)
+    response.status_code = status_code
+    response.iter_content.side_effect = lambda chunk_size=1: iter(
+        [content[i:i + 7] for i in range(0, len(content), 7)])
+    if status_code >= 400:
+        response.raise_for_status.side_effect = requests.HTTPError(
+            "Something bad", request=requests.Request(), response=response)
+    return response
+
+
+def _new_resolver(session, **kwargs):
+    from stac.snapshot import SnapshotResolver
+    return SnapshotResolver(
+        session, 'https://www.example.com/artifactory/', 'libs-snapshot', **kwargs)
+
+
+class TestSnapshotResolver(object):
+    def test_resolve(self, session):
+        session.get.return_value = _response()
+        resolver = _new_resolver(session)
+
+        assert '1.2.0-20160404.120000-3' == resolver.resolve(
+            'com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar')
+        session.get.assert_called_once_with(
+            'https://www.example.com/artifactory/libs-snapshot/com/example/services/mail/'
+            '1.2.0-SNAPSHOT/maven-metadata.xml', stream=True, timeout=None)
+        assert session.get.return_value.close.called
+
+    def test_resolve_descriptor(self, session):
+        session.get.return_value = _response()
+        resolver = _new_resolver(session)
+
+        assert '1.2.0-20160403.090000-2' == resolver.resolve(
+            'com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar', descriptor='sources')
+
+    def test_resolve_unlisted_file_uses_latest_build(self, session):
+        session.get.return_value = _response()
+        resolver = _new_resolver(session)
+
+        assert '1.2.0-20160404.120000-3' == resolver.resolve(
+            'com.example.services', 'mail', '1.2.0-SNAPSHOT', 'pom')
+
+    def test_resolve_legacy_metadata(self, session):
+        session.get.return_value = _response(content=LEGACY_METADATA)
+        resolver = _new_resolver(session)
+
+        assert '1.2.0-20160401.080000-7' == resolver.resolve(
+            'com.example.services', 'mail', '1.2.0-SNAPSHOT', 'war')
+
+    @pytest.mark.parametrize('content', [METADATA, LEGACY_METADATA])
+    def test_resolve_without_pull_parser(self, session, content):
+        import xml.etree.ElementTree as ElementTree
+        session.get.return_value = _response(content=content)
+        resolver = _new_resolver(session)
+        expected = resolver.resolve('com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar')
+
+        session.get.return_value = _response(content=content)
+        resolver = _new_resolver(session)
+        with mock.patch.object(ElementTree, 'XMLPullParser', None, create=True):
+            assert expected == resolver.resolve(
+                'com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar')
+
+    def test_resolve_release(self, session):
+        resolver = _new_resolver(session)
+
+        assert '1.2.0' == resolver.resolve('com.example.services', 'mail', '1.2.0', 'jar')
+        assert not session.get.called
+
+    def test_resolve_no_metadata(self, session):
+        session.get.return_value = _response(status_code=404)
+        resolver = _new_resolver(session)
+
+        assert '1.2.0-SNAPSHOT' == resolver.resolve(
+            'com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar')
+        assert '1.2.0-SNAPSHOT' == resolver.resolve(
+            'com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar')
+        assert 1 == session.get.call_count
+
+    def test_resolve_error(self, session):
+        session.get.return_value = _response(status_code=500)
+        resolver = _new_resolver(session)
+
+        with pytest.raises(requests.HTTPError):
+            resolver.resolve('com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar')
+
+    def test_resolve_cached_until_expired(self, session, clock):
+        session.get.side_effect = lambda *args, **kwargs: _response()
+        resolver = _new_resolver(session, ttl=60, clock=clock)
+
+        resolver.resolve('com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar')
+        resolver.resolve('com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar', 'sources')
+        assert 1 == session.get.call_count
+
+        clock.now += 60
+        resolver.resolve('com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar')
+        assert 2 == session.get.call_count
+
+    def test_metrics(self, session):
+        from stac.metrics import MetricsRegistry
+
+        session.get.return_value = _response()
+        registry = MetricsRegistry()
+        resolver = _new_resolver(session, metrics=registry)
+        resolver.resolve('com.example.services', 'mail', '1.2.0-SNAPSHOT', 'jar')
+
+        assert 1 == registry.get_count(
+            'stac_requests_total', {'endpoint': 'metadata', 'status': '200'})
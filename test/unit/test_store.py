@@ -0,0 +1,126 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import hashlib
+import os
+
+import mock
+import pytest
+
+CONTENT = b'0123456789' * 100
+SHA1 = hashlib.sha1(CONTENT).hexdigest()
+
+
+@pytest.fixture
+def artifact(tmpdir):
+    path = tmpdir.join('service-1.4.5.war')
+    path.write_binary(CONTENT)
+    return str(path)
+
+
+class TestArtifactStore(object):
+    def test_invalid_size(self, tmpdir):
+        from stac.store import ArtifactStore
+
+        with pytest.raises(ValueError):
+            ArtifactStore(str(tmpdir.join('store')), max_size=0)
+
+    def test_fetch_missing(self, tmpdir):
+        from stac.store import ArtifactStore
+        store = ArtifactStore(str(tmpdir.join('store')))
+
+        assert not store.contains(SHA1)
+        assert not store.fetch(SHA1, str(tmpdir.join('out.war')))
+        assert not os.path.exists(str(tmpdir.join('out.war')))
+
+    def test_put_and_fetch(self, tmpdir, artifact):
+        from stac.store import ArtifactStore
+        store = ArtifactStore(str(tmpdir.join('store')))
+        store.put(SHA1, artifact)
+        destination = str(tmpdir.join('out.war'))
+
+        assert store.contains(SHA1)
+        assert store.contains(SHA1.upper())
+        assert store.fetch(SHA1, destination)
+        with open(destination, 'rb') as handle:
+            assert CONTENT == handle.read()
+
+    def test_put_and_fetch_copies(self, tmpdir, artifact):
+        from stac.store import ArtifactStore
+        store = ArtifactStore(str(tmpdir.join('store')), hard_links=False)
+        store.put(SHA1, artifact)
+        destination = str(tmpdir.join('out.war'))
+
+        assert store.fetch(SHA1, destination)
+        assert os.stat(artifact).st_ino != os.stat(destination).st_ino
+
+    def test_fetch_replaces_existing(self, tmpdir, artifact):
+        from stac.store import ArtifactStore
+        store = ArtifactStore(str(tmpdir.join('store')))
+        store.put(SHA1, artifact)
+        destination = tmpdir.join('out.war')
+        destination.write_binary(b'old')
+
+        assert store.fetch(SHA1, str(destination))
+        assert CONTENT == destination.read_binary()
+
+    def test_evict_least_recently_used(self, tmpdir):
+        from stac.store import ArtifactStore
+        store = ArtifactStore(str(tmpdir.join('store')), max_size=2500)
+
+        checksums = []
+        for i in range(3):
+            content = CONTENT + str(i).encode('ascii')
+            path = tmpdir.join('artifact-{0}.jar'.format(i))
+            path.write_binary(content)
+            checksum = hashlib.sha1(content).hexdigest()
+            store.put(checksum, str(path))
+            os.utime(os.path.join(str(tmpdir.join('store')), checksum[:2], checksum), (i, i))
+            checksums.append(checksum)
+
+        content = CONTENT + b'3'
+        path = tmpdir.join('artifact-3.jar')
+        path.write_binary(content)
+        store.put(hashlib.sha1(content).hexdigest(), str(path))
+
+        assert not store.contains(checksums[0])
+        assert not store.contains(checksums[1])
+        assert store.contains(checksums[2])
+        assert store.contains(hashlib.sha1(content).hexdigest())
+
+    @pytest.mark.parametrize('sha1', ['/etc/hostname', '../' + SHA1[3:], SHA1 + '\n', SHA1[:-1]])
+    def test_invalid_checksum(self, tmpdir, artifact, sha1):
+        from stac.store import ArtifactStore
+        store = ArtifactStore(str(tmpdir.join('store')))
+        destination = str(tmpdir.join('out.war'))
+
+        assert not store.contains(sha1)
+        assert not store.fetch(sha1, destination)
+        assert not os.path.exists(destination)
+        with pytest.raises(ValueError):
+            store.put(sha1, artifact)
+
+    def test_put_mismatched_checksum(self, tmpdir, artifact):
+        from stac.store import ArtifactStore
+        store = ArtifactStore(str(tmpdir.join('store')))
+        other = hashlib.sha1(b'other').hexdigest()
+
+        with pytest.raises(ValueError):
+            store.put(other, artifact)
+        assert not store.contains(other)
+
+    def test_put_evicts_only_when_over_size(self, tmpdir):
+        from stac.store import ArtifactStore
+        store = ArtifactStore(str(tmpdir.join('store')), max_size=2500)
+
+        with mock.patch.object(store, 'evict', wraps=store.evict) as evict:
+            for i in range(3):
+                content = CONTENT + str(i).encode('ascii')
+                path = tmpdir.join('artifact-{0}.jar'.format(i))
+                path.write_binary(content)
+                store.put(hashlib.sha1(content).hexdigest(), str(path))
+
+        # Once to find the size of the store, and once when it became too large
+        assert 2 == evict.call_count
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import random
+
+import pytest
+
+# Taken from the tests for Maven's ComparableVersion, in ascending order
+QUALIFIER_VERSIONS = [
+    "1-alpha2snapshot", "1-alpha2", "1-alpha-123", "1-beta-2", "1-beta123", "1-m2", "1-m11", "1-rc",
+    "1-cr2", "1-rc123", "1-SNAPSHOT", "1", "1-sp", "1-sp2", "1-sp123", "1-abc", "1-def", "1-pom-1",
+    "1-1-snapshot", "1-1", "1-2", "1-123"
+]
+
+NUMBER_VERSIONS = [
+    "2.0", "2-1", "2.0.a", "2.0.0.a", "2.0.2", "2.0.123", "2.1.0", "2.1-a", "2.1b", "2.1-c",
+    "2.1-1", "2.1.0.1", "2.2", "2.123", "11.a2", "11.a11", "11.b2", "11.b11", "11.m2", "11.m11",
+    "11", "11.a", "11b", "11c", "11m"
+]
+
+
+@pytest.mark.parametrize('versions', [QUALIFIER_VERSIONS, NUMBER_VERSIONS])
+def test_version_key_ordering(versions):
+    from stac.version import version_key
+    shuffled = list(versions)
+    random.Random(42).shuffle(shuffled)
+
+    assert versions == sorted(shuffled, key=version_key)
+
+
+@pytest.mark.parametrize('version', [
+    "1.0", "1-0", "1.0.0", "1-ga", "1.0-final", "1.RELEASE", "1.0.0-0.0"])
+def test_version_key_equivalent(version):
+    from stac.version import version_key
+    assert version_key("1") == version_key(version)
+
+
+def test_version_key_snapshot_before_release():
+    from stac.version import version_key
+    assert version_key("1.2.0-SNAPSHOT") < version_key("1.2.0")
+    assert version_key("1.2.0-rc1") < version_key("1.2.0-SNAPSHOT")
+
+
+def test_version_key_numeric():
+    from stac.version import version_key
+    assert version_key("4.9") < version_key("4.10")
+    assert version_key("4.10") < version_key("4.10.1")
+
+
+def test_most_recent():
+    from stac.version import most_recent
+    versions = ['1.0', '1.10', '1.0-rc1', '1.9', '1.2-SNAPSHOT', '1.2']
+
+    assert ['1.10', '1.9', '1.2'] == most_recent(versions, 3)
+
+
+def test_most_recent_fewer_than_limit():
+    from stac.version import most_recent
+    assert ['1.1', '1.0'] == most_recent(iter(['1.0', '1.1']), 5)
+
+
+INDEXED_VERSIONS = [
+    '1.0', '1.4', '1.4.7', '1.5.2', '2.0-rc1', '2.0', '2.1', '3.0-SNAPSHOT', '3.0', '3.1']
+
+
+@pytest.mark.parametrize('spec,expected', [
+    ('[1.4]', '1.4'),
+    ('1.4.7', '1.4.7'),
+    ('[1.4,1.5)', '1.4.7'),
+    ('[1.4,1.5.2]', '1.5.2'),
+    ('(,2.0)', '2.0-rc1'),
+    ('(,2.0]', '2.0'),
+    ('[2.0,)', '3.1'),
+    ('(2.1,3.0)', '3.0-SNAPSHOT'),
+    ('(,1.4),[2.0,2.1)', '2.0'),
+    ('[3.0,3.1), (,1.0]', '3.0'),
+    ('(3.1,)', None),
+    ('[1.1,1.2]', None),
+    ('[1.3]', None),
+])
+def test_version_index_latest(spec, expected):
+    from stac.version import VersionIndex
+    shuffled = list(INDEXED_VERSIONS)
+    random.Random(42).shuffle(shuffled)
+
+    assert expected == VersionIndex(shuffled).latest(spec)
+
+
+@pytest.mark.parametrize('spec', [
+    '', '[', '[1.0', '1.0]', '[1.0,2.0,3.0]', '(1.0)', '[]', '[2.0,1.0]', '(1.0,1.0)', '[1.0],',
+    '[1.0]x'])
+def test_parse_range_invalid(spec):
+    from stac.version import parse_range
+
+    with pytest.raises(ValueError):
+        parse_range(spec)
+
+
+def test_version_range_contains():
+    from stac.version import parse_range
+    version_range = parse_range('(,1.1),(1.1,)')
+
+    assert '1.0' in version_range
+    assert '1.1.0' not in version_range
+    assert version_range.contains('1.1.1')
+    assert '(,1.1),(1.1,)' == str(version_range)
+
+
+def test_version_index_latest_all():
+    from stac.version import VersionIndex
+    assert '3.1' == VersionIndex(INDEXED_VERSIONS).latest()
+    assert VersionIndex().latest() is None
+
+
+def test_version_index_matching():
+    from stac.version import VersionIndex
+    index = VersionIndex(INDEXED_VERSIONS)
+
+    assert ['2.1', '2.0', '1.4.7', '1.4'] == index.matching('[1.4,1.5),[2.0,2.1]')
+
+
+def test_version_index_add():
+    from stac.version import VersionIndex
+    index = VersionIndex(['1.0', '2.0'])
+
+    assert index.add('1.5')
+    assert not index.add('1.5')
+    assert index.add('1.5.0')
+    assert ['1.0', '1.5', '1.5.0', '2.0'] == list(index)
+    assert 4 == len(index)
+    assert '1.5' in index
+    assert '1.6' not in index
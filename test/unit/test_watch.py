@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""
+"""
+
+import threading
+
+import mock
+import pytest
+import requests
+
+
+def _results(*results):
+    """Return each result in turn and then the last one forever."""
+    remaining = list(results)
+
+    def next_result(*args, **kwargs):
+        result = remaining.pop(0) if len(remaining) > 1 else remaining[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return next_result
+
+
+@pytest.fixture
+def version_dao():
+    from stac.http import VersionApiDao
+    return mock.Mock(spec=VersionApiDao)
+
+
+@pytest.fixture
+def watcher(version_dao):
+    from stac.watch import ArtifactWatcher
+    watcher = ArtifactWatcher(version_dao, min_interval=0.01, max_interval=0.05)
+    yield watcher
+    watcher.close()
+
+
+class TestWatchInterval(object):
+    def test_backs_off_until_max(self):
+        from stac.watch import _Watch
+        watch = _Watch('com.example.services.mail', None, False, None, 1.0)
+
+        watch.update_interval(False, 0, 1.0, 2.0)
+        assert 1.5 == watch.interval
+        watch.update_interval(False, 1, 1.0, 2.0)
+        assert 2.0 == watch.interval
+
+    def test_resets_on_change(self):
+        from stac.watch import _Watch
+        watch = _Watch('com.example.services.mail', None, False, None, 1.0)
+
+        watch.update_interval(False, 0, 1.0, 100.0)
+        watch.update_interval(True, 10, 1.0, 100.0)
+
+        assert 1.0 == watch.interval
+
+    def test_limited_by_release_frequency(self):
+        from stac.watch import _Watch
+        watch = _Watch('com.example.services.mail', None, False, None, 1.0)
+
+        watch.update_interval(True, 100, 1.0, 100.0)
+        watch.update_interval(True, 150, 1.0, 100.0)
+        for now in range(151, 200):
+            watch.update_interval(False, now, 1.0, 100.0)
+
+        assert 5.0 == watch.interval
+
+
+class TestArtifactWatcher(object):
+    def test_invalid_intervals(self, version_dao):
+        from stac.watch import ArtifactWatcher
+
+        with pytest.raises(ValueError):
+            ArtifactWatcher(version_dao, min_interval=0)
+        with pytest.raises(ValueError):
+            ArtifactWatcher(version_dao, min_interval=10, max_interval=5)
+
+    def test_new_version_callback(self, version_dao, watcher):
+        version_dao.get_most_recent_version_if_changed.side_effect = _results(
+            ('1.0.0', {'If-None-Match': '"a"'}), None, ('1.0.1', {'If-None-Match': '"b"'}), None)
+        events = []
+        seen = threading.Event()
+
+        def callback(event):
+            events.append(event)
+            seen.set()
+
+        watcher.watch('com.example.services.mail', callback=callback)
+
+        assert seen.wait(5)
+        assert 1 == len(events)
+        assert 'com.example.services.mail' == events[0].name
+        assert '1.0.1' == events[0].version
+        assert '1.0.0' == events[0].previous
+        calls = version_dao.get_most_recent_version_if_changed.call_args_list
+        assert calls[0] == mock.call(
+            'com.example.services', 'mail', validators=None, remote=False, integration=False)
+        assert {'If-None-Match': '"a"'} == calls[1][1]['validators']
+
+    def test_events_with_current_version(self, version_dao, watcher):
+        version_dao.get_most_recent_version_if_changed.return_value = ('1.0.1', {})
+
+        watcher.watch('com.example.services.mail', current='1.0.0')
+        events = list(watcher.events(timeout=0.5))
+
+        assert 1 == len(events)
+        assert '1.0.1' == events[0].version
+        assert '1.0.0' == events[0].previous
+
+    def test_events_end_when_closed(self, version_dao, watcher):
+        version_dao.get_most_recent_version_if_changed.return_value = None
+        watcher.watch('com.example.services.mail')
+        threading.Timer(0.05, watcher.close).start()
+
+        assert [] == list(watcher.events())
+
+    def test_not_found_until_first_release(self, version_dao, watcher):
+        not_found = mock.Mock(spec=requests.Response)
+        not_found.status_code = 404
+        error = requests.HTTPError("Not found", request=requests.Request(), response=not_found)
+        version_dao.get_most_recent_version_if_changed.side_effect = _results(
+            error, error, ('1.0.0', {}))
+
+        watcher.watch('com.example.services.mail')
+        event = next(watcher.events(timeout=5))
+
+        assert '1.0.0' == event.version
+        assert event.previous is None
+
+    def test_errors_polled_again(self, version_dao, watcher):
+        version_dao.get_most_recent_version_if_changed.side_effect = _results(
+            ('1.0.0', {}), requests.ConnectionError("Connection reset"), ('1.0.1', {}))
+
+        watcher.watch('com.example.services.mail')
+        event = next(watcher.events(timeout=5))
+
+        assert '1.0.1' == event.version
+
+    def test_unconditional_dao(self):
+        from stac.http import AqlVersionDao
+        from stac.watch import ArtifactWatcher
+
+        dao = mock.Mock(spec=AqlVersionDao)
+        dao.get_most_recent_versions.side_effect = _results(
+            ['1.0.0-SNAPSHOT'], ['1.0.1-SNAPSHOT'])
+
+        with ArtifactWatcher(
+                dao, is_integration=True, min_interval=0.01, max_interval=0.05) as watcher:
+            watcher.watch('com.example.services.mail')
+            event = next(watcher.events(timeout=5))
+
+        assert '1.0.1-SNAPSHOT' == event.version
+        dao.get_most_recent_versions.assert_called_with(
+            'com.example.services', 'mail', 1, remote=False, integration=True)
+
+    def test_unwatch(self, version_dao, watcher):
+        version_dao.get_most_recent_version_if_changed.return_value = None
+        watcher.watch('com.example.services.mail')
+        watcher.unwatch('com.example.services.mail')
+
+        with pytest.raises(KeyError):
+            watcher.get_interval('com.example.services.mail')
+
+    def test_watch_after_close(self, watcher):
+        watcher.close()
+
+        with pytest.raises(RuntimeError):
+            watcher.watch('com.example.services.mail')
+
+    def test_metrics(self, version_dao):
+        from stac.metrics import MetricsRegistry
+        from stac.watch import ArtifactWatcher
+
+        version_dao.get_most_recent_version_if_changed.side_effect = _results(
+            ('1.0.0', {}), None, ('1.0.1', {}), None)
+        registry = MetricsRegistry()
+
+        with ArtifactWatcher(
+                version_dao, min_interval=0.01, max_interval=0.05, metrics=registry) as watcher:
+            watcher.watch('com.example.services.mail')
+            next(watcher.events(timeout=5))
+
+        assert 1 == registry.get_count('stac_watch_polls_total', {'result': 'unchanged'})
+        assert 1 == registry.get_count('stac_watch_polls_total', {'result': 'changed'})
+        assert 1 <= registry.get_count('stac_watch_polls_total', {'result': 'not_modified'})